@@ -0,0 +1,5 @@
+"""
+Бенчмарки горячих путей API. Запуск из каталога pereval_restapi:
+    python -m benchmarks.serializers
+Настройки — benchmarks.settings (SQLite в памяти, если не задано иное).
+"""
@@ -0,0 +1,278 @@
+"""
+Бенчмарк API /submitData/ и PerevalDataManager на базе из 1k/100k/1M перевалов.
+Для каждого сценария измеряются пропускная способность, перцентили задержки, число SQL-запросов
+на запрос и пиковая память; результаты сохраняются в JSON для сравнения запусков (benchmarks.compare).
+    python -m benchmarks.api --sizes 1000 100000 --requests 200
+    BENCH_DATABASE=postgres python -m benchmarks.api --sizes 1000000 --keepdb
+Запросы идут через APIClient со всеми middleware, без сети.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+from pereval import geo  # noqa: E402
+from pereval.models import Area, Image, Level, Pereval, User  # noqa: E402
+from PIL import Image as PILImage  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SEED_BATCH = 5000
+PASSES_PER_USER = 50
+SCENARIOS = ("post_0_images", "post_1_image", "post_5_images", "get_by_id", "get_by_email", "patch")
+
+
+def seed(size, rng):
+    """
+    Заполняет базу до size перевалов: пользователь на каждые PASSES_PER_USER перевалов,
+    уровни сложности у всех, изображение у каждого десятого. Уже заполненная база (--keepdb) не трогается.
+    """
+    existing = Pereval.objects.count()
+    if existing >= size:
+        return
+    area, _ = Area.objects.get_or_create(title="Бенчмарк")
+    for start in range(existing, size, SEED_BATCH):
+        stop = min(start + SEED_BATCH, size)
+        users = User.objects.bulk_create(
+            [
+                User(email=f"user{n}@bench.tld", first_name="Имя", last_name="Фамилия", phone="79990000000")
+                for n in range(start // PASSES_PER_USER, (stop - 1) // PASSES_PER_USER + 1)
+            ],
+            ignore_conflicts=True,
+        )
+        users = {user.email: user for user in User.objects.filter(email__in=[user.email for user in users])}
+        perevals = []
+        for n in range(start, stop):
+            latitude, longitude = round(rng.uniform(35, 55), 6), round(rng.uniform(30, 90), 6)
+            pereval = Pereval(
+                beauty_title="пер.",
+                title=f"Перевал {n}",
+                other_titles=f"Pass {n}",
+                connect="Соединяет долины",
+                user=users[f"user{n // PASSES_PER_USER}@bench.tld"],
+                area=area,
+                latitude=latitude,
+                longitude=longitude,
+                height=rng.randint(500, 5500),
+                geohash=geo.encode(latitude, longitude),
+            )
+            pereval.search_text = pereval.build_search_text()
+            perevals.append(pereval)
+        perevals = Pereval.objects.bulk_create(perevals)
+        Level.objects.bulk_create([Level(pereval=pereval, summer="1А", winter="2Б") for pereval in perevals])
+        Image.objects.bulk_create(
+            [Image(pereval=pereval, title="Фото", image=f"images/bench/{pereval.id}.jpg") for pereval in perevals[::10]]
+        )
+
+
+def jpeg_bytes():
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (640, 480), (90, 120, 150)).save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class Scenarios:
+    """Построение одного запроса каждого сценария; подготовка данных не входит в измерение."""
+
+    def __init__(self, client, rng, size):
+        self.client = client
+        self.rng = rng
+        self.size = size
+        self.counter = 0
+        self.jpeg = jpeg_bytes()
+        self.id_range = Pereval.objects.order_by("id").values_list("id", flat=True)
+        self.min_id, self.max_id = self.id_range.first(), self.id_range.last()
+
+    def payload(self, images):
+        self.counter += 1
+        return {
+            "user": {
+                "email": f"bench{self.counter % 100}@bench.tld",
+                "first_name": "Имя",
+                "last_name": "Фамилия",
+                "phone": "79990000000",
+            },
+            "area": {"title": "Бенчмарк"},
+            "pereval": {
+                "beauty_title": "пер.",
+                "title": f"Новый перевал {time.time_ns()}-{self.counter}",
+                "other_titles": "Bench",
+                "connect": "Бенчмарк",
+                "coords": {
+                    "latitude": round(self.rng.uniform(35, 55), 6),
+                    "longitude": round(self.rng.uniform(30, 90), 6),
+                    "height": 2000,
+                },
+                "level": {"winter": "", "summer": "1А", "autumn": "", "spring": ""},
+                "images": [{"title": f"Фото {n}"} for n in range(images)],
+            },
+        }
+
+    def post(self, images):
+        data = {"data": json.dumps(self.payload(images))}
+        if images:
+            # Разные байты у каждого файла: загрузка не схлопывается дедупликацией хранилища
+            data["images"] = [io.BytesIO(self.jpeg + f"{self.counter}-{n}".encode()) for n in range(images)]
+            for n, file in enumerate(data["images"]):
+                file.name = f"photo{n}.jpg"
+        return lambda: self.client.post(reverse("submit_data"), data)
+
+    def random_id(self):
+        return self.rng.randint(self.min_id, self.max_id)
+
+    def prepare(self, scenario):
+        if scenario.startswith("post_"):
+            return self.post(int(scenario.split("_")[1]))
+        if scenario == "get_by_id":
+            url = reverse("submit_data_detail", args=[self.random_id()])
+            return lambda: self.client.get(url)
+        if scenario == "get_by_email":
+            email = f"user{self.rng.randrange(max(1, self.size // PASSES_PER_USER))}@bench.tld"
+            return lambda: self.client.get(reverse("submit_data"), {"user__email": email})
+        if scenario == "patch":
+            pereval = Pereval.objects.filter(id__gte=self.random_id(), status="new").order_by("id").first()
+            pereval = pereval or Pereval.objects.filter(status="new").first()
+            data = self.payload(0)
+            data["pereval"]["title"] = pereval.title
+            data["pereval"]["coords"].update(latitude=float(pereval.latitude), longitude=float(pereval.longitude))
+            url = reverse("submit_data_detail", args=[pereval.id])
+            body = {"data": json.dumps(data)}
+            return lambda: self.client.patch(url, body, format="multipart", HTTP_IF_MATCH=pereval.etag)
+        raise ValueError(f"Неизвестный сценарий {scenario}")
+
+
+def percentile(values, share):
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(share * (len(values) - 1))))
+    return values[index]
+
+
+def run_scenario(scenarios, scenario, requests, instrumented):
+    """
+    Два прохода: замер времени без инструментирования, затем instrumented запросов
+    под tracemalloc и CaptureQueriesContext для числа запросов к БД и пиковой памяти.
+    """
+    caches["default"].clear()
+    timings = []
+    errors = 0
+    for _ in range(requests):
+        send = scenarios.prepare(scenario)
+        start = time.perf_counter()
+        response = send()
+        timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    queries = []
+    peaks = []
+    for _ in range(instrumented):
+        send = scenarios.prepare(scenario)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured:
+            send()
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        queries.append(len(captured.captured_queries))
+        reset_queries()
+
+    total = sum(timings)
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / total, 2) if total else None,
+        "latency_ms": {
+            "mean": round(statistics.mean(timings) * 1000, 3),
+            "p50": round(percentile(timings, 0.50) * 1000, 3),
+            "p90": round(percentile(timings, 0.90) * 1000, 3),
+            "p99": round(percentile(timings, 0.99) * 1000, 3),
+            "max": round(max(timings) * 1000, 3),
+        },
+        "queries": {"mean": round(statistics.mean(queries), 2), "max": max(queries)} if queries else None,
+        "peak_memory_kb": round(max(peaks) / 1024, 1) if peaks else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="число перевалов в базе")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--instrumented", type=int, default=20, help="запросов для подсчета SQL и памяти")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--keepdb", action="store_true", help="не удалять тестовую базу после запуска")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="файл результатов (по умолчанию benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    results = []
+    try:
+        # Варианты изображений строятся вне запроса, в измерение их не включаем
+        with mock.patch("pereval.data_manager.schedule_variants"):
+            for size in sorted(args.sizes):
+                started = time.perf_counter()
+                seed(size, rng)
+                print(f"База заполнена до {size} перевалов за {time.perf_counter() - started:.1f} с", file=sys.stderr)
+                scenarios = Scenarios(APIClient(), rng, size)
+                for scenario in args.scenarios:
+                    result = run_scenario(scenarios, scenario, args.requests, args.instrumented)
+                    result["size"] = size
+                    results.append(result)
+                    latency = result["latency_ms"]
+                    print(
+                        f"{size:>8} {scenario:<14} {result['throughput_rps']:>9} req/s  "
+                        f"p50 {latency['p50']:>8} мс  p99 {latency['p99']:>8} мс  "
+                        f"SQL {result['queries']['mean'] if result['queries'] else '-':>5}  "
+                        f"память {result['peak_memory_kb']} КБ  ошибок {result['errors']}"
+                    )
+    finally:
+        if not args.keepdb:
+            connection.creation.destroy_test_db(connection.settings_dict["NAME"], verbosity=0)
+
+    report = {
+        "created_at": datetime.now().astimezone().isoformat(),
+        "git_revision": git_revision(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "machine": platform.platform(),
+        "arguments": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{connection.vendor}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Результаты: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Сравнение двух файлов результатов benchmarks.api: изменение p50, p99, пропускной способности,
+числа SQL-запросов и памяти по каждой паре (размер базы, сценарий).
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding="utf-8") as file:
+        report = json.load(file)
+    return report, {(result["size"], result["scenario"]): result for result in report["results"]}
+
+
+def change(old, new):
+    if old is None or new is None:
+        return "-"
+    if not old:
+        return f"{new}"
+    return f"{new} ({(new - old) / old:+.0%})"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    baseline, old_results = load(args.baseline)
+    candidate, new_results = load(args.candidate)
+    for report in (baseline, candidate):
+        print(f"{report['created_at']}  {report.get('git_revision')}  {report['database']}")
+    for key in sorted(old_results.keys() & new_results.keys()):
+        old, new = old_results[key], new_results[key]
+        old_queries = old["queries"]["mean"] if old["queries"] else None
+        new_queries = new["queries"]["mean"] if new["queries"] else None
+        print(
+            f"{key[0]:>8} {key[1]:<14} "
+            f"p50 {change(old['latency_ms']['p50'], new['latency_ms']['p50'])} мс  "
+            f"p99 {change(old['latency_ms']['p99'], new['latency_ms']['p99'])} мс  "
+            f"req/s {change(old['throughput_rps'], new['throughput_rps'])}  "
+            f"SQL {change(old_queries, new_queries)}  "
+            f"память {change(old['peak_memory_kb'], new['peak_memory_kb'])} КБ"
+        )
+    for key in sorted(old_results.keys() ^ new_results.keys()):
+        print(f"{key[0]:>8} {key[1]:<14} есть только в одном из файлов")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""
+Бенчмарк одновременных медленных клиентов: один воркер ASGI (uvicorn, асинхронные GET) против одного
+синхронного воркера WSGI (gunicorn). Медленные клиенты растягивают отправку GET /submitData/<id>/
+на --slow-seconds, как мобильный клиент на плохой связи; параллельно быстрый клиент шлет такие же запросы
+и замеряет задержку. Для каждого сервера записываются число завершенных медленных запросов,
+время до последнего ответа и перцентили задержки быстрых запросов.
+    pip install uvicorn gunicorn
+    python -m benchmarks.concurrency --slow-clients 200 --slow-seconds 5
+    BENCH_DATABASE=postgres python -m benchmarks.concurrency --servers asgi wsgi --keepdb
+Серверы работают с тестовой базой бенчмарка; для SQLite она создается во временном файле.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from pereval.models import Pereval  # noqa: E402
+
+from benchmarks.api import RESULTS_DIR, git_revision, percentile, seed  # noqa: E402
+
+SERVERS = {
+    "asgi": [
+        "uvicorn",
+        "pereval_restapi.asgi:application",
+        "--workers",
+        "1",
+        "--port",
+        "{port}",
+        "--log-level",
+        "warning",
+    ],
+    "wsgi": [
+        "gunicorn",
+        "pereval_restapi.wsgi:application",
+        "--workers",
+        "1",
+        "--worker-class",
+        "sync",
+        "--bind",
+        "127.0.0.1:{port}",
+        "--log-level",
+        "warning",
+    ],
+}
+
+
+def start_server(name, port, database_name):
+    command = [part.format(port=port) for part in SERVERS[name]]
+    if shutil.which(command[0]) is None:
+        raise SystemExit(f"{command[0]} не установлен: pip install {command[0]}")
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "benchmarks.settings",
+        "BENCH_DATABASE_NAME": database_name,
+        "PEREVAL_METRICS_ENABLED": "0",
+    }
+    process = subprocess.Popen(command, env=env, cwd=Path(__file__).resolve().parent.parent)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"Сервер {name} не запустился за 30 с")
+
+
+async def request(port, path, slow_seconds=0.0, timeout=60.0):
+    """
+    GET path по HTTP/1.1; при slow_seconds запрос отправляется по байту через равные интервалы.
+    :return: tuple (код ответа или None, время в секундах)
+    """
+    start = time.perf_counter()
+    payload = f"GET {path} HTTP/1.1\r\nHost: localhost\r\nAccept: application/json\r\nConnection: close\r\n\r\n"
+    payload = payload.encode()
+    writer = None
+    try:
+        async with asyncio.timeout(timeout):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            if slow_seconds:
+                delay = slow_seconds / len(payload)
+                for offset in range(len(payload)):
+                    writer.write(payload[offset : offset + 1])
+                    await writer.drain()
+                    await asyncio.sleep(delay)
+            else:
+                writer.write(payload)
+                await writer.drain()
+            response = await reader.read()
+        status = int(response.split(b" ", 2)[1]) if response.startswith(b"HTTP/") else None
+    except (OSError, TimeoutError, ValueError, IndexError):
+        status = None
+    finally:
+        if writer is not None:
+            writer.close()
+    return status, time.perf_counter() - start
+
+
+async def run(port, ids, args, rng):
+    """Медленные клиенты и одновременный с ними быстрый клиент; результат — dict метрик."""
+    paths = [f"/api/submitData/{rng.choice(ids)}/" for _ in range(args.slow_clients)]
+    started = time.perf_counter()
+    slow = [asyncio.create_task(request(port, path, args.slow_seconds, args.timeout)) for path in paths]
+
+    probes = []
+    while not all(task.done() for task in slow) and len(probes) < args.probes:
+        probes.append(await request(port, f"/api/submitData/{rng.choice(ids)}/", timeout=args.timeout))
+    slow = [await task for task in slow]
+    elapsed = time.perf_counter() - started
+
+    completed = [duration for status, duration in slow if status == 200]
+    probe_timings = [duration for status, duration in probes if status == 200]
+    return {
+        "slow_clients": args.slow_clients,
+        "slow_completed": len(completed),
+        "slow_failed": args.slow_clients - len(completed),
+        "elapsed_s": round(elapsed, 3),
+        "slow_latency_s": {
+            "p50": round(percentile(completed, 0.50), 3),
+            "max": round(max(completed), 3),
+        }
+        if completed
+        else None,
+        "probes": len(probes),
+        "probe_errors": len(probes) - len(probe_timings),
+        "probe_latency_ms": {
+            "p50": round(percentile(probe_timings, 0.50) * 1000, 3),
+            "p99": round(percentile(probe_timings, 0.99) * 1000, 3),
+            "max": round(max(probe_timings) * 1000, 3),
+        }
+        if probe_timings
+        else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--servers", nargs="+", choices=list(SERVERS), default=list(SERVERS))
+    parser.add_argument("--size", type=int, default=1000, help="число перевалов в базе")
+    parser.add_argument("--slow-clients", type=int, default=200, help="одновременных медленных клиентов")
+    parser.add_argument("--slow-seconds", type=float, default=5.0, help="время отправки одного медленного запроса")
+    parser.add_argument("--probes", type=int, default=500, help="не более N быстрых запросов за прогон")
+    parser.add_argument("--timeout", type=float, default=60.0, help="таймаут одного запроса, с")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--keepdb", action="store_true", help="не удалять тестовую базу после запуска")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="файл результатов (по умолчанию benchmarks/results/)")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    if connection.vendor == "sqlite" and not connection.settings_dict["TEST"]["NAME"]:
+        # Серверы — отдельные процессы, база в памяти им недоступна
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(prefix="pereval-bench-"), "db.sqlite3")
+    database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    results = []
+    try:
+        seed(args.size, rng)
+        ids = list(Pereval.objects.values_list("id", flat=True))
+        connection.close()
+        for name in args.servers:
+            process = start_server(name, args.port, database_name)
+            try:
+                result = {"server": name, **asyncio.run(run(args.port, ids, args, rng))}
+            finally:
+                process.terminate()
+                process.wait()
+            results.append(result)
+            probe = result["probe_latency_ms"] or {}
+            print(
+                f"{name:<5} медленных завершено {result['slow_completed']}/{args.slow_clients} "
+                f"за {result['elapsed_s']} с  быстрых {result['probes']} (ошибок {result['probe_errors']})  "
+                f"p50 {probe.get('p50', '-')} мс  p99 {probe.get('p99', '-')} мс"
+            )
+    finally:
+        if not args.keepdb:
+            connection.creation.destroy_test_db(database_name, verbosity=0)
+
+    report = {
+        "benchmark": "concurrency",
+        "created_at": datetime.now().astimezone().isoformat(),
+        "git_revision": git_revision(),
+        "database": connection.vendor,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "machine": platform.platform(),
+        "arguments": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-concurrency-{connection.vendor}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f"Результаты: {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Сравнение PerevalDetailSerializer и PerevalDetailFastSerializer на странице из 1000 перевалов.
+Проверяет, что JSON совпадает байт в байт, и печатает время сериализации.
+    python -m benchmarks.serializers [--rows 1000] [--repeat 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from pereval.models import Area, Image, Level, Pereval, User  # noqa: E402
+from pereval.serializers import PerevalDetailFastSerializer, PerevalDetailSerializer  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+
+def seed(rows, images_per_pereval=2):
+    """Создает rows перевалов с уровнями и изображениями."""
+    users = User.objects.bulk_create(
+        [
+            User(email=f"user{i}@bench.tld", first_name="Имя", last_name="Фамилия", phone="79990000000")
+            for i in range(10)
+        ]
+    )
+    area = Area.objects.create(title="Бенчмарк")
+    perevals = Pereval.objects.bulk_create(
+        [
+            Pereval(
+                beauty_title="пер.",
+                title=f"Перевал {i}",
+                other_titles="",
+                connect="",
+                user=users[i % len(users)],
+                area=area,
+                latitude=40 + i / 10000,
+                longitude=70 + i / 10000,
+                height=1000 + i,
+            )
+            for i in range(rows)
+        ]
+    )
+    Level.objects.bulk_create([Level(pereval=pereval, summer="1А", winter="2Б") for pereval in perevals])
+    Image.objects.bulk_create(
+        [
+            Image(
+                pereval=pereval,
+                title=f"Фото {n}",
+                image=f"images/{pereval.id}-{n}.jpg",
+                variants={"thumbnail": {"webp": f"variants/images/{pereval.id}-{n}.jpg/thumbnail.webp"}},
+            )
+            for pereval in perevals
+            for n in range(images_per_pereval)
+        ]
+    )
+
+
+def render_drf(request, limit):
+    perevals = list(Pereval.objects.with_details().order_by("id")[:limit])
+    return JSONRenderer().render(PerevalDetailSerializer(perevals, many=True, context={"request": request}).data)
+
+
+def render_fast(request, limit):
+    rows = list(PerevalDetailFastSerializer.values(Pereval.objects.order_by("id"))[:limit])
+    return JSONRenderer().render(PerevalDetailFastSerializer(rows, many=True, context={"request": request}).data)
+
+
+def measure(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    call_command("migrate", verbosity=0)
+    seed(args.rows)
+    request = APIRequestFactory().get("/api/submitData/")
+
+    if render_drf(request, args.rows) != render_fast(request, args.rows):
+        print("Ответы сериализаторов различаются", file=sys.stderr)
+        return 1
+
+    drf = measure(render_drf, args.repeat, request, args.rows)
+    fast = measure(render_fast, args.repeat, request, args.rows)
+    print(f"Страница из {args.rows} перевалов, {args.repeat} повторов, ответы совпадают байт в байт")
+    print(f"PerevalDetailSerializer:     медиана {statistics.median(drf) * 1000:8.1f} мс")
+    print(f"PerevalDetailFastSerializer: медиана {statistics.median(fast) * 1000:8.1f} мс")
+    print(f"Ускорение: {statistics.median(drf) / statistics.median(fast):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
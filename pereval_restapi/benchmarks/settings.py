@@ -0,0 +1,43 @@
+import os
+import tempfile
+
+from pereval_restapi.settings import *  # noqa: F403
+
+SECRET_KEY = os.getenv("SECRET_KEY") or "benchmark"
+DEBUG = False
+ALLOWED_HOSTS = ["testserver", "localhost"]
+
+# BENCH_DATABASE=postgres — отдельная тестовая БД pereval_bench на сервере из FSTR_DB_*;
+# иначе SQLite: в памяти или в файле BENCH_SQLITE_PATH (с --keepdb заполненная база переиспользуется)
+if os.getenv("BENCH_DATABASE") == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": "preval_db",
+            "USER": os.getenv("FSTR_DB_LOGIN"),
+            "PASSWORD": os.getenv("FSTR_DB_PASS"),
+            "HOST": os.getenv("FSTR_DB_HOST"),
+            "PORT": os.getenv("FSTR_DB_PORT"),
+            "TEST": {"NAME": "pereval_bench"},
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+            "TEST": {"NAME": os.getenv("BENCH_SQLITE_PATH")},
+        }
+    }
+
+# Серверы, запущенные benchmarks.concurrency, работают с уже созданной тестовой базой
+if os.getenv("BENCH_DATABASE_NAME"):
+    DATABASES["default"]["NAME"] = os.getenv("BENCH_DATABASE_NAME")
+
+MEDIA_ROOT = os.getenv("BENCH_MEDIA_ROOT") or tempfile.mkdtemp(prefix="pereval-bench-")
+
+# Варианты изображений в бенчмарках не строятся
+PEREVAL_IMAGE_VARIANT_WORKERS = 0
+
+# Бенчмарки работают с одной базой, без реплик
+PEREVAL_READ_REPLICAS = []
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from pereval.models import Area
+
+
+@admin.register(Area)
+class AreaAdmin(admin.ModelAdmin):
+    list_display = ("title", "parent", "path")
+    readonly_fields = ("path",)
+    search_fields = ("title",)
+    ordering = ("path",)
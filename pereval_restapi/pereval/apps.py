@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
 
 
 class PerevalConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "pereval"
+
+    def ready(self):
+        from pereval import signals  # noqa: F401
+
+        post_migrate.connect(install_search_index, sender=self)
+
+
+def install_search_index(sender, using, plan=None, **kwargs):
+    # Миграции, пересоздающие таблицу перевалов в SQLite, удаляют триггеры поискового индекса
+    from pereval import search
+
+    connection = connections[using]
+    if "pereval_pereval" in connection.introspection.table_names():
+        search.install(connection)
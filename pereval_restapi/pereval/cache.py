@@ -0,0 +1,112 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from pereval import replicas
+
+
+class DetailCache:
+    """
+    Кэш готового JSON ответа GET /submitData/<id>/.
+    Ключ включает id перевала и его поколение: инвалидация увеличивает поколение,
+    и старые записи просто перестают читаться, пока не истечет их TTL.
+    Счетчики попаданий и промахов ведутся в памяти процесса.
+    """
+
+    prefix = "pereval:detail"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def cache(self):
+        return caches[settings.PEREVAL_DETAIL_CACHE_ALIAS]
+
+    def _version_key(self, pereval_id):
+        return f"{self.prefix}:version:{pereval_id}"
+
+    def _data_key(self, pereval_id, version, base_url):
+        # Ссылки на изображения абсолютные, поэтому схема и хост входят в ключ.
+        # Реплика может отставать: ее ответы не должен получить клиент, закрепленный за основной базой
+        return f"{self.prefix}:{pereval_id}:{version}:{replicas.read_alias()}:{base_url}"
+
+    def _timeout(self):
+        # Ответ с реплики мог быть собран до последней записи уже после сброса поколения:
+        # он живет не дольше окна отставания реплики
+        if replicas.read_alias() == DEFAULT_DB_ALIAS:
+            return settings.PEREVAL_DETAIL_CACHE_TIMEOUT
+        return min(settings.PEREVAL_DETAIL_CACHE_TIMEOUT, settings.PEREVAL_READ_YOUR_WRITES_SECONDS)
+
+    def _version(self, pereval_id):
+        key = self._version_key(pereval_id)
+        version = self.cache.get(key)
+        if version is None:
+            # Начальное поколение уникально, чтобы после вытеснения счетчика не прочитать старые данные
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    async def _aversion(self, pereval_id):
+        key = self._version_key(pereval_id)
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+            version = await self.cache.aget(key)
+        return version
+
+    def get(self, pereval_id, base_url):
+        """
+        :param pereval_id: ID перевала
+        :param base_url: схема и хост запроса, например http://example.com/
+        :return: tuple (тело ответа или None, поколение для последующего set)
+        """
+        version = self._version(pereval_id)
+        body = self.cache.get(self._data_key(pereval_id, version, base_url))
+        self._count(body)
+        return body, version
+
+    async def aget(self, pereval_id, base_url):
+        """Асинхронный вариант get через async API кэша Django."""
+        version = await self._aversion(pereval_id)
+        body = await self.cache.aget(self._data_key(pereval_id, version, base_url))
+        self._count(body)
+        return body, version
+
+    def _count(self, body):
+        with self._lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def set(self, pereval_id, version, base_url, body):
+        self.cache.set(self._data_key(pereval_id, version, base_url), body, self._timeout())
+
+    async def aset(self, pereval_id, version, base_url, body):
+        await self.cache.aset(self._data_key(pereval_id, version, base_url), body, self._timeout())
+
+    def invalidate(self, pereval_id):
+        """Сбрасывает кэш перевала после фиксации текущей транзакции."""
+        transaction.on_commit(lambda: self._bump(pereval_id))
+
+    def _bump(self, pereval_id):
+        key = self._version_key(pereval_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, time.time_ns(), timeout=None)
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
+
+
+detail_cache = DetailCache()
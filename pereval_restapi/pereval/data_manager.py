@@ -1,33 +1,115 @@
-from django.db import IntegrityError
+import hashlib
+import os
+from decimal import Decimal
+from functools import partial
 
-from pereval.models import Area, Image, Level, Pereval, User
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+
+from pereval import geo
+from pereval.cache import detail_cache
+from pereval.image_variants import schedule_variants
+from pereval.models import Area, Blob, Image, Level, Pereval, PerevalChange, UploadSession, User
+from pereval.storage import ContentAddressedStorage, get_image_storage
+from pereval.uploads import StoredUploadedFile
+
+COORD_QUANT = Decimal("0.000001")
+
+
+def upsert(model, values, conflict_field, increment=None):
+    """
+    Вставляет строку или возвращает существующую по уникальному полю conflict_field.
+    На PostgreSQL и SQLite (3.35+) — INSERT ... ON CONFLICT ... RETURNING. Без increment это DO NOTHING:
+    существующая строка не перезаписывается и не блокируется, а читается вторым запросом SELECT.
+    С increment это DO UPDATE, который прибавляет переданное значение к полю за один запрос; прочие поля
+    существующей строки остаются прежними, но СУБД записывает новую версию строки.
+    На прочих СУБД — get_or_create с повтором при гонке.
+    :param model: класс модели
+    :param values: dict имя поля -> значение
+    :param conflict_field: имя уникального поля
+    :param increment: имя числового поля-счетчика (опционально)
+    :return: объект модели
+    """
+    db = router.db_for_write(model)
+    connection = connections[db]
+    if connection.vendor not in ("postgresql", "sqlite") or not connection.features.can_return_columns_from_insert:
+        lookup = {conflict_field: values[conflict_field]}
+        defaults = {name: value for name, value in values.items() if name != conflict_field}
+        try:
+            with transaction.atomic(using=db):
+                obj, created = model.objects.using(db).get_or_create(**lookup, defaults=defaults)
+        except IntegrityError:
+            obj, created = model.objects.using(db).get(**lookup), False
+        if increment and not created:
+            model.objects.using(db).filter(pk=obj.pk).update(**{increment: F(increment) + values[increment]})
+            obj.refresh_from_db(fields=[increment])
+        return obj
+
+    qn = connection.ops.quote_name
+    opts = model._meta
+    # Значения готовим как обычный INSERT: с default, auto_now_add и преобразованием под СУБД
+    obj = model(**values)
+    fields = [field for field in opts.local_concrete_fields if not field.primary_key]
+    params = [field.get_db_prep_save(field.pre_save(obj, add=True), connection) for field in fields]
+    conflict_column = qn(opts.get_field(conflict_field).column)
+    returning = [field.attname for field in opts.concrete_fields]
+    if increment:
+        column = qn(opts.get_field(increment).column)
+        action = f"DO UPDATE SET {column} = {qn(opts.db_table)}.{column} + EXCLUDED.{column}"
+    else:
+        action = "DO NOTHING"
+    sql = (
+        f"INSERT INTO {qn(opts.db_table)} ({', '.join(qn(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))}) "
+        f"ON CONFLICT ({conflict_column}) {action} "
+        f"RETURNING {', '.join(qn(field.column) for field in opts.concrete_fields)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        # DO NOTHING не возвращает существующую строку
+        return model.objects.using(db).get(**{conflict_field: values[conflict_field]})
+    return model.from_db(db, returning, row)
+
+
+class VersionConflict(ValueError):
+    """Перевал изменился после того, как клиент получил его версию."""
+
+
+def coord_key(value):
+    """Приводит координату к точности поля DecimalField(decimal_places=6)."""
+    return Decimal(str(value)).quantize(COORD_QUANT)
 
 
 class PerevalDataManager:
     """Класс для работы с данными о перевалах и связанных сущностях."""
 
+    bulk_batch_size = 500
+    # Размер IN-списков при поиске существующих записей; держим ниже лимита параметров SQLite
+    lookup_batch_size = 900
+
     def create_user(self, user_data):
         """
         Создает или возвращает существующего пользователя.
+        Выполняется одним upsert-запросом, поэтому параллельные запросы с одним email не конфликтуют.
         :param user_data: dict с полями email, first_name, last_name, patronymic, phone
         :return: объект User
         """
         email = user_data.get("email")
         if not email:
             raise ValueError("Email обязателен")
-        user = User.objects.filter(email=email).first()
-        if user:
-            return user
-
-        else:
-            user = User.objects.create(
-                email=email,
-                first_name=user_data.get("first_name", ""),
-                last_name=user_data.get("last_name", ""),
-                patronymic=user_data.get("patronymic"),
-                phone=user_data.get("phone"),
-            )
-            return user
+        return upsert(
+            User,
+            {
+                "email": email,
+                "first_name": user_data.get("first_name", ""),
+                "last_name": user_data.get("last_name", ""),
+                "patronymic": user_data.get("patronymic"),
+                "phone": user_data.get("phone"),
+            },
+            conflict_field="email",
+        )
 
     def create_area(self, area_data):
         """
@@ -38,19 +120,22 @@ class PerevalDataManager:
         title = area_data.get("title")
         parent_id = area_data.get("parent_id")
 
+        parent_path = ""
+        if parent_id:
+            parent_path = Area.objects.filter(id=parent_id).values_list("path", flat=True).first()
+            if parent_path is None:
+                raise ValueError(f"Район с parent_id {parent_id} не найден")
         try:
-            if parent_id:
-                parent = Area.objects.get(id=parent_id)
-            else:
-                parent = None
-
-            area, created = Area.objects.get_or_create(title=title, defaults={"parent": parent})
-            return area
-        except Area.DoesNotExist:
-            raise ValueError(f"Район с parent_id {parent_id} не найден")
+            area = upsert(Area, {"title": title, "parent_id": parent_id or None}, conflict_field="title")
         except IntegrityError:
             raise ValueError(f"Ошибка при создании района {title}")
 
+        if not area.path:
+            # Район только что создан: путь зависит от id, поэтому записываем его отдельным запросом
+            area.path = parent_path + Area.path_segment(area.id)
+            Area.objects.filter(id=area.id).update(path=area.path)
+        return area
+
     def create_pereval(self, pereval_data, user, area):
         """
         Создает новый перевал.
@@ -97,13 +182,14 @@ class PerevalDataManager:
         except IntegrityError:
             raise ValueError(f"Уровень сложности для перевала {pereval.id} уже существует")
 
-    def create_images(self, pereval, images_data, image_files):
+    def build_images(self, images_data, image_files, pereval=None):
         """
-        Создает изображения для перевала.
-        :param pereval: объект Pereval
+        Сохраняет файлы изображений в хранилище и возвращает несохраненные объекты Image.
+        Запись файлов вынесена из транзакции, чтобы не держать соединение с БД на время ввода-вывода.
         :param images_data: список dict с полем title
         :param image_files: список файлов
-        :return: список объектов Image
+        :param pereval: объект Pereval, если он уже известен
+        :return: список объектов Image без id
         """
         if len(images_data) != len(image_files):
             raise ValueError("Количество заголовков изображений не совпадает с количеством файлов")
@@ -111,70 +197,454 @@ class PerevalDataManager:
         images = []
         for image_data, image_file in zip(images_data, image_files):
             try:
-                image = Image.objects.create(pereval=pereval, title=image_data.get("title"), image=image_file)
+                image = Image(pereval=pereval, title=image_data.get("title"))
+                if isinstance(image_file, StoredUploadedFile):
+                    # Файл уже записан в хранилище обработчиком загрузки
+                    image.image.name = image_file.storage_name
+                else:
+                    image.image.save(image_file.name, image_file, save=False)
                 images.append(image)
             except Exception as e:
                 raise ValueError(f"Ошибка при создании изображения: {str(e)}")
         return images
 
+    def create_images(self, pereval, images_data, image_files):
+        """
+        Создает изображения для перевала.
+        :param pereval: объект Pereval
+        :param images_data: список dict с полем title
+        :param image_files: список файлов
+        :return: список объектов Image
+        """
+        images = self.build_images(images_data, image_files, pereval)
+        return self._insert_images(pereval, images)
+
+    def attach_upload(self, session):
+        """
+        Завершает загрузку по частям: кладет собранный файл на место по хешу и добавляет изображение
+        к перевалу через create_images. Хеш считается до транзакции, как и запись файлов в build_images.
+        Файл сессии удаляется только после фиксации транзакции: если статус перевала успел смениться
+        или транзакция упала, сессию можно завершить повторно.
+        :param session: объект UploadSession, у которого offset == length
+        :return: объект Image
+        """
+        if not Pereval.objects.filter(id=session.pereval_id, status="new").exists():
+            raise ValueError("Добавлять изображения можно только к перевалу в статусе 'new'")
+
+        storage = get_image_storage()
+        path = storage.upload_path(session.id)
+        sha256 = hashlib.sha256()
+        with open(path, "r+b") as file:
+            # За последней принятой частью мог остаться хвост оборванной записи
+            file.truncate(session.length)
+            for block in iter(partial(file.read, 1024 * 1024), b""):
+                sha256.update(block)
+        sha256 = sha256.hexdigest()
+        # Переносится копия: при откате блоб без записи Blob подберет gc_media, а файл сессии цел
+        name = storage.adopt(storage.staging_copy(path), sha256, os.path.splitext(session.file_name)[1])
+        image_file = StoredUploadedFile(
+            storage, name, session.file_name, session.content_type, session.length, None, sha256
+        )
+
+        with image_file, transaction.atomic():
+            pereval = Pereval.objects.select_for_update().get(id=session.pereval_id)
+            if pereval.status != "new":
+                raise ValueError("Добавлять изображения можно только к перевалу в статусе 'new'")
+            # Параллельное завершение той же сессии уже добавило изображение
+            image_id = UploadSession.objects.select_for_update().values_list("image_id", flat=True).get(pk=session.pk)
+            if image_id is not None:
+                image = Image.objects.get(id=image_id)
+            else:
+                (image,) = self.create_images(pereval, [{"title": session.title}], [image_file])
+                # Новое изображение меняет представление перевала: версия, ETag и журнал изменений
+                Pereval.objects.filter(id=pereval.id).touch()
+                UploadSession.objects.filter(pk=session.pk).update(image=image)
+                transaction.on_commit(partial(storage.discard_upload, session.id))
+        session.image = image
+        return image
+
+    def _acquire_blobs(self, images):
+        """
+        Регистрирует файлы изображений в таблице Blob и увеличивает их счетчики ссылок.
+        Один upsert-запрос на каждый уникальный файл; файлы вне content-addressed хранилища пропускаются.
+        """
+        storage = Image._meta.get_field("image").storage
+        if not isinstance(storage, ContentAddressedStorage):
+            return
+
+        counts = {}
+        for image in images:
+            if storage.blob_sha256(image.image.name):
+                counts[image.image.name] = counts.get(image.image.name, 0) + 1
+
+        blob_ids = {}
+        for name, count in counts.items():
+            blob = upsert(
+                Blob,
+                {"name": name, "sha256": storage.blob_sha256(name), "size": storage.size(name), "refcount": count},
+                conflict_field="name",
+                increment="refcount",
+            )
+            blob_ids[name] = blob.id
+
+        for image in images:
+            image.blob_id = blob_ids.get(image.image.name)
+
+    def _insert_images(self, pereval, images):
+        for image in images:
+            image.pereval = pereval
+        self._acquire_blobs(images)
+        try:
+            images = Image.objects.bulk_create(images)
+        except IntegrityError as e:
+            raise ValueError(f"Ошибка при создании изображения: {str(e)}")
+        # bulk_create не отправляет post_save, поэтому кэш ответа сбрасываем явно
+        detail_cache.invalidate(pereval.id)
+        # Варианты строятся вне потока запроса и только после фиксации транзакции
+        transaction.on_commit(partial(schedule_variants, [(image.id, image.image.name) for image in images]))
+        return images
+
+    def _update_images(self, pereval, images_data, new_images):
+        """
+        Приводит изображения перевала к списку images_data минимумом записей:
+        UPDATE только измененных title, DELETE только убранных, INSERT только новых.
+        :param pereval: объект Pereval
+        :param images_data: список dict с полями id (для существующих) и title
+        :param new_images: несохраненные объекты Image для элементов без id
+        """
+        kept = {image["id"]: image for image in images_data if "id" in image}
+        existing = {image.id: image for image in pereval.images.all()}
+        unknown = sorted(kept.keys() - existing.keys())
+        if unknown:
+            raise ValueError(f"Изображения {', '.join(map(str, unknown))} не принадлежат перевалу")
+
+        renamed = []
+        for image_id, image_data in kept.items():
+            image = existing[image_id]
+            if "title" in image_data and image.title != image_data["title"]:
+                image.title = image_data["title"]
+                renamed.append(image)
+        if renamed:
+            Image.objects.bulk_update(renamed, ["title"])
+            # bulk_update не отправляет post_save
+            detail_cache.invalidate(pereval.id)
+
+        removed = [image_id for image_id in existing if image_id not in kept]
+        if removed:
+            # delete() отправляет post_delete: счетчики ссылок на файлы и кэш обновляют сигналы
+            Image.objects.filter(id__in=removed).delete()
+        if new_images:
+            self._insert_images(pereval, new_images)
+
     def submit_data(self, data, image_files=None):
         """
         Основной метод для добавления полного набора данных о перевале.
+        Все записи в БД выполняются в одной транзакции: при ошибке на любом шаге
+        ничего не сохраняется. Файлы изображений пишутся в хранилище до начала транзакции.
         :param data: dict с полями user, area, pereval
-        :param images_data: список dict с полями title, image (файл)
+        :param image_files: список файлов изображений
         :return: объект Pereval
         """
-        user = self.create_user(data["user"])
-        area = self.create_area(data["area"])
-        pereval = self.create_pereval(data["pereval"], user, area)
-        self.create_level(pereval, data["pereval"]["level"])
-
+        images = []
         if image_files and data.get("pereval", {}).get("images"):
-            self.create_images(pereval, data["pereval"]["images"], image_files)
+            images = self.build_images(data["pereval"]["images"], image_files)
+
+        with transaction.atomic():
+            user = self.create_user(data["user"])
+            area = self.create_area(data["area"])
+            pereval = self.create_pereval(data["pereval"], user, area)
+            self.create_level(pereval, data["pereval"]["level"])
+            if images:
+                self._insert_images(pereval, images)
 
         return pereval
 
-    def update_pereval(self, pereval_id, pereval_data, area, image_files=None):
+    def submit_many(self, items, batch_size=None):
+        """
+        Пакетное добавление перевалов.
+        Пользователи и районы разрешаются один раз на уникальный ключ, перевалы и уровни
+        сложности вставляются через bulk_create пачками по batch_size.
+        :param items: список dict с полями user, area, pereval (как в submit_data)
+        :param batch_size: размер пачки вставки, по умолчанию bulk_batch_size
+        :return: список результатов той же длины: {"id": int} или {"error": str}
+        """
+        batch_size = batch_size or self.bulk_batch_size
+        results = [None] * len(items)
+
+        users = self._resolve_users([item["user"] for item in items])
+        areas, area_errors = self._resolve_areas([item["area"] for item in items])
+
+        pending = []
+        for index, item in enumerate(items):
+            title = item["area"].get("title")
+            if title in area_errors:
+                results[index] = {"error": area_errors[title]}
+            else:
+                pending.append(index)
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            self._insert_batch(items, batch, users, areas, results)
+
+        return results
+
+    def _resolve_users(self, users_data):
+        """
+        Возвращает пользователей по email, создавая недостающих одной пачкой.
+        Для новых пользователей используются данные первого вхождения email.
+        :return: dict email -> User
+        """
+        by_email = {}
+        for user_data in users_data:
+            by_email.setdefault(user_data["email"], user_data)
+
+        emails = list(by_email)
+        users = {}
+        for start in range(0, len(emails), self.lookup_batch_size):
+            chunk = emails[start : start + self.lookup_batch_size]
+            users.update((user.email, user) for user in User.objects.filter(email__in=chunk))
+
+        missing = [email for email in emails if email not in users]
+        if missing:
+            User.objects.bulk_create(
+                [
+                    User(
+                        email=email,
+                        first_name=by_email[email].get("first_name", ""),
+                        last_name=by_email[email].get("last_name", ""),
+                        patronymic=by_email[email].get("patronymic"),
+                        phone=by_email[email].get("phone"),
+                    )
+                    for email in missing
+                ],
+                batch_size=self.lookup_batch_size,
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts не возвращает id, а часть строк могла вставить параллельная транзакция
+            for start in range(0, len(missing), self.lookup_batch_size):
+                chunk = missing[start : start + self.lookup_batch_size]
+                users.update((user.email, user) for user in User.objects.filter(email__in=chunk))
+        return users
+
+    def _resolve_areas(self, areas_data):
+        """
+        Возвращает районы по названию, создавая недостающие одной пачкой.
+        :return: tuple (dict title -> Area, dict title -> текст ошибки)
+        """
+        by_title = {}
+        for area_data in areas_data:
+            by_title.setdefault(area_data.get("title"), area_data)
+
+        titles = list(by_title)
+        areas = {}
+        for start in range(0, len(titles), self.lookup_batch_size):
+            chunk = titles[start : start + self.lookup_batch_size]
+            areas.update((area.title, area) for area in Area.objects.filter(title__in=chunk))
+
+        missing = [title for title in titles if title not in areas]
+        parent_ids = {by_title[title].get("parent_id") for title in missing} - {None}
+        parent_paths = {}
+        if parent_ids:
+            parent_paths = dict(Area.objects.filter(id__in=parent_ids).values_list("id", "path"))
+
+        errors = {}
+        new_areas = []
+        for title in missing:
+            parent_id = by_title[title].get("parent_id")
+            if parent_id and parent_id not in parent_paths:
+                errors[title] = f"Район с parent_id {parent_id} не найден"
+                continue
+            new_areas.append(Area(title=title, parent_id=parent_id or None))
+
+        if not new_areas:
+            return areas, errors
+        Area.objects.bulk_create(new_areas, batch_size=self.lookup_batch_size, ignore_conflicts=True)
+        # ignore_conflicts не возвращает id, а часть строк могла вставить параллельная транзакция
+        created = []
+        inserted = [area.title for area in new_areas]
+        for start in range(0, len(inserted), self.lookup_batch_size):
+            chunk = inserted[start : start + self.lookup_batch_size]
+            for area in Area.objects.filter(title__in=chunk):
+                areas[area.title] = area
+                # Пустой путь только у строк, вставленных этой транзакцией: чужие фиксируются уже с путем
+                if not area.path:
+                    area.path = parent_paths.get(area.parent_id, "") + Area.path_segment(area.id)
+                    created.append(area)
+        Area.objects.bulk_update(created, ["path"], batch_size=self.lookup_batch_size)
+        return areas, errors
+
+    def _insert_batch(self, items, batch, users, areas, results):
+        """
+        Вставляет одну пачку перевалов и их уровней сложности.
+        Дубликаты по ограничению unique_pereval отсекаются заранее и попадают в results как ошибки.
+        """
+        titles = {items[index]["pereval"]["title"] for index in batch}
+        existing = {
+            (title, coord_key(latitude), coord_key(longitude))
+            for title, latitude, longitude in Pereval.objects.filter(title__in=titles).values_list(
+                "title", "latitude", "longitude"
+            )
+        }
+
+        to_create = []
+        for index in batch:
+            pereval_data = items[index]["pereval"]
+            coords = pereval_data["coords"]
+            key = (pereval_data["title"], coord_key(coords["latitude"]), coord_key(coords["longitude"]))
+            if key in existing:
+                results[index] = {"error": "Перевал с такими данными уже существует"}
+                continue
+            existing.add(key)
+            pereval = Pereval(
+                beauty_title=pereval_data.get("beauty_title"),
+                title=pereval_data["title"],
+                other_titles=pereval_data.get("other_titles"),
+                connect=pereval_data.get("connect"),
+                user=users[items[index]["user"]["email"]],
+                area=areas[items[index]["area"].get("title")],
+                latitude=key[1],
+                longitude=key[2],
+                height=coords["height"],
+                status="new",
+                # bulk_create не вызывает save(), поэтому geohash и поисковый текст заполняем сами
+                geohash=geo.encode(key[1], key[2]),
+            )
+            pereval.search_text = pereval.build_search_text()
+            to_create.append((index, pereval))
+
+        if not to_create:
+            return
+
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Pereval.objects.bulk_create([pereval for _, pereval in to_create])
+                    # bulk_create не отправляет post_save, запись в журнал изменений делаем сами
+                    PerevalChange.record([pereval for _, pereval in to_create], PerevalChange.CREATED)
+                created = to_create
+            except IntegrityError:
+                # Между проверкой и вставкой параллельный запрос занял ключ: вставляем пачку построчно
+                created = []
+                for index, pereval in to_create:
+                    try:
+                        with transaction.atomic():
+                            pereval.save(force_insert=True)
+                        created.append((index, pereval))
+                    except IntegrityError:
+                        pereval.pk = None
+                        results[index] = {"error": "Перевал с такими данными уже существует"}
+
+            Level.objects.bulk_create(
+                [
+                    Level(
+                        pereval=pereval,
+                        winter=items[index]["pereval"]["level"].get("winter"),
+                        summer=items[index]["pereval"]["level"].get("summer"),
+                        autumn=items[index]["pereval"]["level"].get("autumn"),
+                        spring=items[index]["pereval"]["level"].get("spring"),
+                    )
+                    for index, pereval in created
+                ]
+            )
+
+        for index, pereval in created:
+            results[index] = {"id": pereval.id}
+
+    def update_pereval(self, pereval_id, pereval_data, area, image_files=None, expected_versions=None):
         """
         Обновляет существующий перевал, если его статус 'new'.
+        Если передан непустой список images, он задает итоговый набор изображений: элементы с id сохраняют
+        существующие изображения (title обновляется на месте), элементы без id добавляются из image_files
+        по порядку, остальные изображения перевала удаляются. Изображения не меняются, если список пуст
+        или в нем нет id и не переданы файлы.
         :param pereval_id: ID перевала
         :param pereval_data: dict с полями beauty_title, title, other_titles, connect,
                             coords (latitude, longitude, height), level (winter, summer, autumn, spring), images
         :param area: объект Area
-        :param image_files: список файлов изображений
+        :param image_files: файлы новых изображений (элементов images без id)
+        :param expected_versions: версии из If-Match; если текущая не среди них — VersionConflict.
+                                  None — без проверки
         :return: объект Pereval
         """
         try:
-            pereval = Pereval.objects.get(id=pereval_id)
-            if pereval.status != "new":
-                raise ValueError("Редактирование возможно только для статуса 'new'")
-
-            pereval.beauty_title = pereval_data.get("beauty_title")
-            pereval.title = pereval_data["title"]
-            pereval.other_titles = pereval_data.get("other_titles")
-            pereval.connect = pereval_data.get("connect")
-            pereval.area = area
-            pereval.latitude = pereval_data["coords"]["latitude"]
-            pereval.longitude = pereval_data["coords"]["longitude"]
-            pereval.height = pereval_data["coords"]["height"]
-            pereval.save()
-
-            level = pereval.level
-            level.winter = pereval_data["level"].get("winter")
-            level.summer = pereval_data["level"].get("summer")
-            level.autumn = pereval_data["level"].get("autumn")
-            level.spring = pereval_data["level"].get("spring")
-            level.save()
-
-            if image_files and pereval_data.get("images"):
-                pereval.images.all().delete()
-                self.create_images(pereval, pereval_data["images"], image_files)
+            images_data = pereval_data.get("images") or []
+            new_images_data = [image for image in images_data if "id" not in image]
+            if len(new_images_data) == len(images_data) and not image_files:
+                # Ни ссылок на существующие изображения, ни файлов: обновляются только поля перевала
+                images_data = []
+            images = self.build_images(new_images_data, image_files or []) if images_data else []
+
+            with transaction.atomic():
+                pereval = Pereval.objects.select_for_update().get(id=pereval_id)
+                if expected_versions is not None and pereval.version not in expected_versions:
+                    raise VersionConflict(f"Перевал уже изменен: текущая версия {pereval.version}")
+                if pereval.status != "new":
+                    raise ValueError("Редактирование возможно только для статуса 'new'")
+
+                pereval.beauty_title = pereval_data.get("beauty_title")
+                pereval.title = pereval_data["title"]
+                pereval.other_titles = pereval_data.get("other_titles")
+                pereval.connect = pereval_data.get("connect")
+                pereval.area = area
+                pereval.latitude = pereval_data["coords"]["latitude"]
+                pereval.longitude = pereval_data["coords"]["longitude"]
+                pereval.height = pereval_data["coords"]["height"]
+                pereval.save()
+
+                level = pereval.level
+                level.winter = pereval_data["level"].get("winter")
+                level.summer = pereval_data["level"].get("summer")
+                level.autumn = pereval_data["level"].get("autumn")
+                level.spring = pereval_data["level"].get("spring")
+                level.save()
+
+                if images_data:
+                    self._update_images(pereval, images_data, images)
 
             return pereval
 
+        except VersionConflict:
+            raise
         except Pereval.DoesNotExist:
             raise ValueError("Перевал не найден")
         except IntegrityError:
             raise ValueError("Ошибка: некорректные данные перевала")
         except Exception as e:
             raise ValueError(f"Ошибка: {str(e)}")
+
+    def transition_status(self, pereval_ids, status):
+        """
+        Переводит перевалы в новый статус модерации. Допустимые переходы — Pereval.STATUS_TRANSITIONS;
+        все допустимые перевалы пакета обновляются одним UPDATE.
+        :param pereval_ids: список ID перевалов
+        :param status: новый статус
+        :return: список dict в порядке pereval_ids: id, previous (прежний статус или None, если перевала нет)
+                 и error при отказе
+        """
+        if status not in dict(Pereval.STATUS_CHOICES):
+            raise ValueError(f"Неизвестный статус '{status}'")
+
+        with transaction.atomic():
+            current = dict(
+                Pereval.objects.select_for_update().filter(id__in=set(pereval_ids)).values_list("id", "status")
+            )
+            allowed = [
+                pereval_id
+                for pereval_id, previous in current.items()
+                if status in Pereval.STATUS_TRANSITIONS.get(previous, ())
+            ]
+            if allowed:
+                Pereval.objects.filter(id__in=allowed).transition(status)
+                for pereval_id in allowed:
+                    detail_cache.invalidate(pereval_id)
+
+        results = []
+        for pereval_id in pereval_ids:
+            previous = current.get(pereval_id)
+            result = {"id": pereval_id, "previous": previous}
+            if previous is None:
+                result["error"] = "Перевал не найден"
+            elif status not in Pereval.STATUS_TRANSITIONS.get(previous, ()):
+                result["error"] = f"Переход из статуса '{previous}' в '{status}' недопустим"
+            results.append(result)
+        return results
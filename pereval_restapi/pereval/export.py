@@ -0,0 +1,165 @@
+import csv
+import io
+import json
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+
+from pereval.models import Pereval
+from pereval.serializers import PerevalDetailFastSerializer
+
+# Формат: (тип содержимого, расширение файла)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "geojson": ("application/geo+json", "geojson"),
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+CSV_COLUMNS = (
+    "id",
+    "beauty_title",
+    "title",
+    "other_titles",
+    "connect",
+    "user_email",
+    "user_first_name",
+    "user_last_name",
+    "user_patronymic",
+    "user_phone",
+    "area_title",
+    "area_parent_id",
+    "latitude",
+    "longitude",
+    "height",
+    "level_winter",
+    "level_summer",
+    "level_autumn",
+    "level_spring",
+    "status",
+    "date_added",
+    "images",
+)
+
+
+def next_since():
+    """
+    Значение since для следующей инкрементальной выгрузки.
+    Отстает на PEREVAL_CHANGES_SETTLE_SECONDS: updated_at ставится до фиксации транзакции,
+    и перевал, зафиксированный после начала выгрузки, попадет в следующую.
+    """
+    return timezone.now() - timedelta(seconds=settings.PEREVAL_CHANGES_SETTLE_SECONDS)
+
+
+def export_queryset(since=None, area=None):
+    """
+    :param since: выгружать только перевалы, измененные начиная с этого момента (datetime)
+    :param area: объект Area — только перевалы района и его подрайонов
+    :return: QuerySet перевалов
+    """
+    queryset = Pereval.objects.all()
+    if since is not None:
+        queryset = queryset.filter(updated_at__gte=since)
+    if area is not None:
+        queryset = queryset.in_area(area)
+    return queryset
+
+
+def iter_perevals(queryset, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Перевалы в формате GET /submitData/<id>/ с постоянным расходом памяти.
+    Строки читаются серверным курсором по chunk_size, изображения — одним запросом на каждую порцию.
+    :param queryset: QuerySet перевалов
+    :param context: контекст сериализатора (request или base_url для ссылок на изображения)
+    :param chunk_size: размер порции
+    :return: итератор dict
+    """
+    serializer = PerevalDetailFastSerializer([], many=True, context=context)
+    rows = PerevalDetailFastSerializer.values(queryset.order_by("id")).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        images = serializer.load_images([row["id"] for row in chunk])
+        for row in chunk:
+            yield serializer.to_representation(row, images.get(row["id"], []))
+
+
+def ndjson_lines(perevals):
+    for pereval in perevals:
+        yield json.dumps(pereval, ensure_ascii=False) + "\n"
+
+
+def csv_lines(perevals):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line(CSV_COLUMNS)
+    for pereval in perevals:
+        user, area, coords, level = pereval["user"], pereval["area"], pereval["coords"], pereval["level"] or {}
+        yield line(
+            [
+                pereval["id"],
+                pereval["beauty_title"],
+                pereval["title"],
+                pereval["other_titles"],
+                pereval["connect"],
+                user["email"],
+                user["first_name"],
+                user["last_name"],
+                user["patronymic"],
+                user["phone"],
+                area["title"],
+                area["parent_id"],
+                coords["latitude"],
+                coords["longitude"],
+                coords["height"],
+                level.get("winter"),
+                level.get("summer"),
+                level.get("autumn"),
+                level.get("spring"),
+                pereval["status"],
+                pereval["date_added"],
+                # Ссылки на изображения через пробел
+                " ".join(image["image"] for image in pereval["images"] if image["image"]),
+            ]
+        )
+
+
+def geojson_lines(perevals):
+    yield '{"type":"FeatureCollection","features":[\n'
+    separator = ""
+    for pereval in perevals:
+        properties = {key: value for key, value in pereval.items() if key != "coords"}
+        properties["height"] = pereval["coords"]["height"]
+        feature = {
+            "type": "Feature",
+            "id": pereval["id"],
+            "geometry": {
+                "type": "Point",
+                "coordinates": [pereval["coords"]["longitude"], pereval["coords"]["latitude"]],
+            },
+            "properties": properties,
+        }
+        yield separator + json.dumps(feature, ensure_ascii=False)
+        separator = ",\n"
+    yield "\n]}\n"
+
+
+WRITERS = {"ndjson": ndjson_lines, "csv": csv_lines, "geojson": geojson_lines}
+
+
+def stream(export_format, queryset, context=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Выгрузка в формате export_format частями по chunk_size перевалов.
+    :return: итератор str
+    """
+    lines = WRITERS[export_format](iter_perevals(queryset, context, chunk_size))
+    while chunk := "".join(islice(lines, chunk_size)):
+        yield chunk
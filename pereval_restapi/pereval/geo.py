@@ -0,0 +1,144 @@
+import math
+
+from django.db.models import Q
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Кодирует координаты в geohash.
+    :param latitude: широта в градусах
+    :param longitude: долгота в градусах
+    :param precision: длина хеша в символах
+    :return: str
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    result = []
+    bit = 0
+    char = 0
+    even = True
+    while len(result) < precision:
+        if even:
+            middle = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= middle:
+                char = char * 2 + 1
+                lon_range[0] = middle
+            else:
+                char = char * 2
+                lon_range[1] = middle
+        else:
+            middle = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= middle:
+                char = char * 2 + 1
+                lat_range[0] = middle
+            else:
+                char = char * 2
+                lat_range[1] = middle
+        even = not even
+        bit += 1
+        if bit == 5:
+            result.append(BASE32[char])
+            bit = 0
+            char = 0
+    return "".join(result)
+
+
+def cell_size(precision):
+    """
+    Размер ячейки geohash заданной длины.
+    :return: tuple (высота по широте, ширина по долготе) в градусах
+    """
+    bits = 5 * precision
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def next_prefix(prefix):
+    """
+    Следующий geohash той же длины в лексикографическом порядке; None для последнего.
+    Диапазон [prefix, next_prefix(prefix)) покрывает все хеши, начинающиеся с prefix.
+    """
+    chars = list(prefix)
+    for index in range(len(chars) - 1, -1, -1):
+        position = BASE32.index(chars[index])
+        if position < len(BASE32) - 1:
+            chars[index] = BASE32[position + 1]
+            return "".join(chars[: index + 1])
+        chars[index] = BASE32[0]
+    return None
+
+
+def prefix_q(prefixes, field="geohash"):
+    """
+    Условие "geohash начинается с одного из префиксов" в виде диапазонов,
+    которые используют обычный B-tree индекс на любой СУБД и при любой collation.
+    """
+    condition = Q()
+    for prefix in sorted(set(prefixes)):
+        upper = next_prefix(prefix)
+        if upper is None:
+            condition |= Q(**{f"{field}__gte": prefix})
+        else:
+            condition |= Q(**{f"{field}__gte": prefix, f"{field}__lt": upper})
+    return condition
+
+
+def bbox_prefixes(min_lat, min_lon, max_lat, max_lon, max_cells=16):
+    """
+    Набор geohash-ячеек максимальной точности, покрывающих прямоугольник не более чем max_cells ячейками.
+    Прямоугольник не должен пересекать антимеридиан (min_lon <= max_lon).
+    :return: список префиксов или None, если прямоугольник слишком велик для индекса
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        x0 = math.floor((min_lon + 180) / width)
+        x1 = math.floor(min(max_lon + 180, 360 - 1e-9) / width)
+        y0 = math.floor((min_lat + 90) / height)
+        y1 = math.floor(min(max_lat + 90, 180 - 1e-9) / height)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > max_cells:
+            continue
+        return [
+            encode(-90 + (y + 0.5) * height, -180 + (x + 0.5) * width, precision)
+            for x in range(x0, x1 + 1)
+            for y in range(y0, y1 + 1)
+        ]
+    return None
+
+
+def neighborhood(latitude, longitude, precision):
+    """
+    Ячейка точки и восемь соседних.
+    :return: tuple (список префиксов, гарантированный радиус покрытия в км)
+    """
+    height, width = cell_size(precision)
+    latitude, longitude = float(latitude), float(longitude)
+    center_lat = -90 + (math.floor((latitude + 90) / height) + 0.5) * height
+    center_lon = -180 + (math.floor((longitude + 180) / width) + 0.5) * width
+
+    cells = set()
+    for dy in (-1, 0, 1):
+        cell_lat = center_lat + dy * height
+        if not -90 < cell_lat < 90:
+            continue
+        for dx in (-1, 0, 1):
+            cell_lon = (center_lon + dx * width + 180) % 360 - 180
+            cells.add(encode(cell_lat, cell_lon, precision))
+
+    # Точка лежит в центральной ячейке, значит до внешней границы блока 3x3 не меньше одной ячейки
+    edge_lat = min(abs(center_lat) + 1.5 * height, 90)
+    radius = min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * math.cos(math.radians(edge_lat)))
+    return sorted(cells), radius
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Расстояние по большому кругу между двумя точками в километрах."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,135 @@
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image as PILImage
+from PIL import ImageOps, UnidentifiedImageError
+
+from pereval.cache import detail_cache
+from pereval.models import Image, Pereval
+from pereval.storage import get_image_storage
+
+logger = logging.getLogger(__name__)
+
+# Максимальная сторона варианта в пикселях
+VARIANT_SIZES = {
+    "thumbnail": 320,
+    "medium": 1024,
+    "large": 2048,
+}
+VARIANT_FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(source_name, variant, extension):
+    """
+    Имя файла варианта в хранилище, однозначно выводимое из имени оригинала.
+    :param source_name: имя оригинала в хранилище
+    :param variant: ключ из VARIANT_SIZES
+    :param extension: ключ из VARIANT_FORMATS
+    :return: str
+    """
+    return f"variants/{source_name}/{variant}.{extension}"
+
+
+def generate_variants(source_name):
+    """
+    Строит уменьшенные копии изображения во всех размерах и форматах.
+    Выполняется в процессе-обработчике и не обращается к БД. Имена вариантов выводятся из имени
+    оригинала, поэтому для уже обработанного блоба готовые варианты переиспользуются.
+    :param source_name: имя оригинала в хранилище
+    :return: dict {variant: {extension: имя файла}}; пустой, если файл не является изображением
+    """
+    existing = {
+        variant: {extension: variant_name(source_name, variant, extension) for extension in VARIANT_FORMATS}
+        for variant in VARIANT_SIZES
+    }
+    if all(default_storage.exists(name) for files in existing.values() for name in files.values()):
+        return existing
+
+    try:
+        with get_image_storage().open(source_name) as source, PILImage.open(source) as original:
+            original = ImageOps.exif_transpose(original)
+            original = original.convert("RGB")
+            variants = {}
+            for variant, size in VARIANT_SIZES.items():
+                resized = original.copy()
+                resized.thumbnail((size, size), PILImage.Resampling.LANCZOS)
+                variants[variant] = {}
+                for extension, (pil_format, options) in VARIANT_FORMATS.items():
+                    buffer = io.BytesIO()
+                    resized.save(buffer, pil_format, **options)
+                    name = variant_name(source_name, variant, extension)
+                    if default_storage.exists(name):
+                        default_storage.delete(name)
+                    variants[variant][extension] = default_storage.save(name, ContentFile(buffer.getvalue()))
+            return variants
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning("Не удалось построить варианты для %s: %s", source_name, e)
+        return {}
+
+
+def get_executor():
+    """Пул процессов для генерации вариантов, создается при первом обращении."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PEREVAL_IMAGE_VARIANT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                # Процессы стартуют через spawn и настраивают Django до импорта этого модуля
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def save_variants(image_id, variants):
+    """Сохраняет имена вариантов изображения, обновляет версию перевала и сбрасывает кэш его ответа."""
+    Image.objects.filter(id=image_id).update(variants=variants)
+    pereval_id = Image.objects.filter(id=image_id).values_list("pereval_id", flat=True).first()
+    if pereval_id is not None:
+        # Ссылки на варианты входят в ответ, поэтому это новая версия перевала
+        Pereval.objects.filter(id=pereval_id).touch()
+        detail_cache.invalidate(pereval_id)
+
+
+def _store_variants(image_id, future):
+    try:
+        save_variants(image_id, future.result())
+    except Exception:
+        logger.exception("Не удалось сохранить варианты изображения %s", image_id)
+    finally:
+        # Колбэк обычно выполняется в служебном потоке пула: соединение этого потока закрываем сразу
+        for connection in connections.all(initialized_only=True):
+            if not connection.in_atomic_block:
+                connection.close()
+
+
+def schedule_variants(images):
+    """
+    Ставит генерацию вариантов в очередь пула процессов.
+    При PEREVAL_IMAGE_VARIANT_WORKERS = 0 варианты строятся синхронно в текущем процессе.
+    :param images: список пар (id изображения, имя файла в хранилище)
+    """
+    if not settings.PEREVAL_IMAGE_VARIANT_WORKERS:
+        for image_id, source_name in images:
+            save_variants(image_id, generate_variants(source_name))
+        return
+
+    executor = get_executor()
+    for image_id, source_name in images:
+        future = executor.submit(generate_variants, source_name)
+        future.add_done_callback(partial(_store_variants, image_id))
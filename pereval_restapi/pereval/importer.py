@@ -0,0 +1,145 @@
+import csv
+import json
+import re
+
+LEVEL_FIELDS = ("winter", "summer", "autumn", "spring")
+USER_FIELDS = ("email", "first_name", "last_name", "patronymic", "phone")
+# Обязательные колонки CSV; остальные из export.CSV_COLUMNS необязательны
+CSV_REQUIRED = (
+    "title",
+    "latitude",
+    "longitude",
+    "height",
+    "user_email",
+    "user_first_name",
+    "user_last_name",
+    "area_title",
+)
+READ_SIZE = 1 << 16
+
+FEATURES_RE = re.compile(r'"features"\s*:\s*\[')
+
+
+def optional(value):
+    return None if value in ("", None) else value
+
+
+def item_from_flat(row):
+    """
+    Запись в формате поля data POST /submitData/ из плоской строки с колонками CSV_COLUMNS.
+    Пустые значения необязательных полей становятся None.
+    """
+    return {
+        "user": {
+            "email": row["user_email"],
+            "first_name": row["user_first_name"],
+            "last_name": row["user_last_name"],
+            "patronymic": optional(row.get("user_patronymic")),
+            "phone": optional(row.get("user_phone")),
+        },
+        "area": {"title": row["area_title"], "parent_id": optional(row.get("area_parent_id"))},
+        "pereval": {
+            "beauty_title": optional(row.get("beauty_title")),
+            "title": row["title"],
+            "other_titles": optional(row.get("other_titles")),
+            "connect": row.get("connect") or "",
+            "coords": {"latitude": row["latitude"], "longitude": row["longitude"], "height": row["height"]},
+            "level": {season: optional(row.get(f"level_{season}")) for season in LEVEL_FIELDS},
+        },
+    }
+
+
+def item_from_detail(pereval, coords=None):
+    """Запись в формате поля data POST /submitData/ из перевала в формате GET /submitData/<id>/."""
+    level = pereval.get("level") or {}
+    return {
+        "user": {field: pereval["user"].get(field) for field in USER_FIELDS},
+        "area": {"title": pereval["area"]["title"], "parent_id": pereval["area"].get("parent_id")},
+        "pereval": {
+            "beauty_title": pereval.get("beauty_title"),
+            "title": pereval["title"],
+            "other_titles": pereval.get("other_titles"),
+            "connect": pereval.get("connect") or "",
+            "coords": coords or pereval["coords"],
+            "level": {season: level.get(season) for season in LEVEL_FIELDS},
+        },
+    }
+
+
+def item_from_feature(feature):
+    """
+    Запись из GeoJSON Feature с геометрией Point. Свойства — в формате GET /submitData/<id>/
+    (как в выгрузке) или плоские с колонками CSV_COLUMNS. Высота — третья координата или свойство height.
+    """
+    geometry = feature["geometry"]
+    if geometry["type"] != "Point":
+        raise ValueError("ожидается геометрия Point")
+    longitude, latitude, *rest = geometry["coordinates"]
+    properties = feature.get("properties") or {}
+    height = rest[0] if rest else properties.get("height")
+    if isinstance(properties.get("user"), dict):
+        return item_from_detail(properties, {"latitude": latitude, "longitude": longitude, "height": height})
+    return item_from_flat({**properties, "latitude": latitude, "longitude": longitude, "height": height})
+
+
+def csv_records(file):
+    reader = csv.DictReader(file)
+    missing = [column for column in CSV_REQUIRED if column not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"В CSV нет колонок: {', '.join(missing)}")
+    return reader
+
+
+def item_from_ndjson(line):
+    """Запись из строки NDJSON в формате GET /submitData/<id>/; испорченная строка отклоняется отдельно от прочих."""
+    return item_from_detail(json.loads(line))
+
+
+def ndjson_records(file):
+    # Строки разбираются в item_from_ndjson: ошибка JSON в одной строке не прерывает чтение файла
+    for line in file:
+        if line.strip():
+            yield line
+
+
+def geojson_records(file, read_size=READ_SIZE):
+    """
+    Элементы массива features из GeoJSON FeatureCollection по одному.
+    Файл читается блоками по read_size, в памяти — только текущий блок и недочитанный объект.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    while (match := FEATURES_RE.search(buffer)) is None:
+        data = file.read(read_size)
+        if not data:
+            raise ValueError("В GeoJSON нет массива features")
+        buffer += data
+
+    buffer, position, eof = buffer[match.end() :], 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        if position < len(buffer):
+            try:
+                feature, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield feature
+                continue
+        elif eof:
+            raise ValueError("Неожиданный конец GeoJSON")
+        data = file.read(read_size)
+        eof = not data
+        buffer, position = buffer[position:] + data, 0
+
+
+# Формат: (чтение записей из файла, преобразование записи в формат POST /submitData/)
+READERS = {
+    "csv": (csv_records, item_from_flat),
+    "geojson": (geojson_records, item_from_feature),
+    "ndjson": (ndjson_records, item_from_ndjson),
+}
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from pereval.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет сохраненные ответы на запросы с Idempotency-Key старше PEREVAL_IDEMPOTENCY_TTL. "
+        "Запускается по расписанию (cron); устаревшие записи и без нее не отдаются повторам."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            help="Удалять записи старше N секунд; по умолчанию PEREVAL_IDEMPOTENCY_TTL",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="Записей на один DELETE")
+
+    def handle(self, *args, **options):
+        older_than = options["older_than"]
+        if older_than is None:
+            older_than = settings.PEREVAL_IDEMPOTENCY_TTL
+        if older_than < 0 or options["batch_size"] <= 0:
+            raise CommandError("older-than должен быть неотрицательным, batch-size — положительным")
+        deleted = IdempotencyKey.expire(timezone.now() - timedelta(seconds=older_than), options["batch_size"])
+        self.stdout.write(f"Удалено ключей идемпотентности: {deleted}")
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from pereval import export
+from pereval.models import Area
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоковая выгрузка перевалов в NDJSON, CSV или GeoJSON с постоянным расходом памяти. "
+        "Значение since для следующей инкрементальной выгрузки печатается в stderr."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(export.FORMATS), default="ndjson", dest="export_format")
+        parser.add_argument("--output", help="Файл выгрузки; по умолчанию stdout")
+        parser.add_argument("--since", help="Только перевалы, измененные начиная с момента ISO 8601")
+        parser.add_argument("--area", type=int, help="ID района: перевалы района и его подрайонов")
+        parser.add_argument("--base-url", help="Адрес сервиса для абсолютных ссылок на изображения")
+        parser.add_argument("--chunk-size", type=int, default=export.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                raise CommandError(f"Некорректная дата since: {options['since']}")
+        area = None
+        if options["area"] is not None:
+            area = Area.objects.filter(id=options["area"]).first()
+            if area is None:
+                raise CommandError(f"Район {options['area']} не найден")
+        if options["chunk_size"] <= 0:
+            raise CommandError("chunk-size должен быть положительным")
+
+        next_since = export.next_since()
+        chunks = export.stream(
+            options["export_format"],
+            export.export_queryset(since, area),
+            context={"base_url": options["base_url"]},
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+        self.stderr.write(f"since для следующей выгрузки: {next_since.isoformat()}")
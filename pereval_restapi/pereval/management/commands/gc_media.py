@@ -0,0 +1,151 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pereval.models import Blob, Image
+from pereval.storage import ContentAddressedStorage
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет файлы изображений, на которые не ссылается ни одна запись Image: оригиналы в blobs/ и images/, "
+        "их уменьшенные копии в variants/ и брошенные временные файлы загрузки. Дерево хранилища обходится "
+        "потоково, ссылки проверяются пакетами по индексу, поэтому память не зависит от числа файлов."
+    )
+
+    roots = ("blobs", "images", "variants")
+    variants_dir = "variants"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Только показать файлы без ссылок, не удалять")
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=3600,
+            help="Не трогать файлы, измененные за последние N секунд (загрузки в процессе). По умолчанию 3600",
+        )
+        parser.add_argument("--rate", type=float, default=0, help="Не более N удалений в секунду; 0 — без ограничения")
+        parser.add_argument("--batch-size", type=int, default=500, help="Файлов на один запрос проверки ссылок")
+        parser.add_argument("--progress", type=int, default=10000, help="Печатать прогресс каждые N файлов")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0 or options["progress"] <= 0 or options["rate"] < 0 or options["grace"] < 0:
+            raise CommandError("batch-size и progress должны быть положительными, rate и grace — неотрицательными")
+        self.storage = Image._meta.get_field("image").storage
+        self.dry_run = options["dry_run"]
+        self.rate = options["rate"]
+        self.next_delete_at = 0.0
+        self.stats = {"scanned": 0, "orphaned": 0, "deleted": 0, "bytes": 0}
+
+        self.cutoff = time.time() - options["grace"]
+        batch = []
+        for name, stat in self.walk():
+            self.stats["scanned"] += 1
+            if stat.st_mtime <= self.cutoff:
+                batch.append((name, stat.st_size))
+            if len(batch) >= options["batch_size"]:
+                self.collect(batch)
+                batch = []
+            if self.stats["scanned"] % options["progress"] == 0:
+                self.report("Просмотрено")
+        self.collect(batch)
+        self.report("Готово (пробный запуск)" if self.dry_run else "Готово")
+
+    def report(self, prefix):
+        stats = self.stats
+        action = "к удалению" if self.dry_run else "удалено"
+        self.stdout.write(
+            f"{prefix}: файлов {stats['scanned']}, без ссылок {stats['orphaned']}, "
+            f"{action} {stats['deleted']} ({stats['bytes'] / 1024 / 1024:.1f} МБ)"
+        )
+
+    def walk(self):
+        """
+        Файлы под каталогами roots хранилища: пары (имя в хранилище, os.stat_result).
+        Каталоги читаются итератором scandir, в памяти — только стек еще не обойденных подкаталогов.
+        """
+        location = self.storage.location
+        stack = [root for root in reversed(self.roots) if os.path.isdir(os.path.join(location, root))]
+        while stack:
+            directory = stack.pop()
+            subdirectories = []
+            with os.scandir(os.path.join(location, directory)) as entries:
+                for entry in entries:
+                    name = f"{directory}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirectories.append(name)
+                    elif entry.is_file(follow_symlinks=False):
+                        try:
+                            yield name, entry.stat(follow_symlinks=False)
+                        except FileNotFoundError:
+                            continue
+            stack.extend(sorted(subdirectories, reverse=True))
+
+    def source_name(self, name):
+        """Имя оригинала, к которому относится файл: для variants/<оригинал>/<копия> — оригинал."""
+        if name.startswith(f"{self.variants_dir}/"):
+            return name[len(self.variants_dir) + 1 :].rpartition("/")[0]
+        return name
+
+    def collect(self, batch):
+        """Находит в пакете файлы без ссылок одним запросом к Image (и одним к Blob) и удаляет их."""
+        if not batch:
+            return
+        content_addressed = isinstance(self.storage, ContentAddressedStorage)
+        staging = f"{self.storage.staging_dir}/" if content_addressed else None
+
+        def is_staging(name):
+            return staging is not None and name.startswith(staging)
+
+        sources = {self.source_name(name) for name, _ in batch if not is_staging(name)}
+        referenced = set(Image.objects.filter(image__in=sources).values_list("image", flat=True))
+        orphans = [(name, size) for name, size in batch if is_staging(name) or self.source_name(name) not in referenced]
+
+        blob_names = [name for name, _ in orphans if content_addressed and self.storage.blob_sha256(name)]
+        if blob_names:
+            # Счетчик больше нуля при отсутствии Image — запись в процессе создания, файл не трогаем
+            live = set(Blob.objects.filter(name__in=blob_names, refcount__gt=0).values_list("name", flat=True))
+            orphans = [(name, size) for name, size in orphans if name not in live]
+            if not self.dry_run:
+                Blob.objects.filter(name__in=blob_names, refcount=0).delete()
+
+        self.stats["orphaned"] += len(orphans)
+        for name, size in orphans:
+            if self.dry_run:
+                self.stdout.write(name)
+            elif not self.remove(name):
+                continue
+            self.stats["deleted"] += 1
+            self.stats["bytes"] += size
+
+    def remove(self, name):
+        self.throttle()
+        path = self.storage.path(name)
+        try:
+            # Файл могли переиспользовать после обхода: adopt обновляет время изменения
+            if os.stat(path).st_mtime > self.cutoff:
+                return False
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        self.remove_empty_parents(name)
+        return True
+
+    def throttle(self):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        if self.next_delete_at > now:
+            time.sleep(self.next_delete_at - now)
+        self.next_delete_at = max(now, self.next_delete_at) + 1 / self.rate
+
+    def remove_empty_parents(self, name):
+        """Удаляет опустевшие каталоги от файла вверх, не выше корневых каталогов roots."""
+        directory = os.path.dirname(name)
+        while "/" in directory:
+            try:
+                os.rmdir(self.storage.path(directory))
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
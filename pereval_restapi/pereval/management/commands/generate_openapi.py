@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from pereval import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Генерирует схему OpenAPI (openapi.json и openapi.yaml) в PEREVAL_OPENAPI_DIR при сборке. "
+        "/swagger.json и /swagger.yaml отдают эти файлы, не обращаясь к drf_yasg; "
+        "после изменения эндпоинтов схему нужно сгенерировать заново."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="schema_formats",
+            nargs="+",
+            choices=list(schema.CONTENT_TYPES),
+            default=list(schema.CONTENT_TYPES),
+            help="Форматы схемы; по умолчанию все",
+        )
+        parser.add_argument("--output-dir", help="Каталог для файлов схемы; по умолчанию PEREVAL_OPENAPI_DIR")
+        parser.add_argument("--url", help="Базовый URL API в схеме, например https://pereval.example.com/")
+
+    def handle(self, *args, **options):
+        directory = options["output_dir"] or settings.PEREVAL_OPENAPI_DIR
+        for schema_format in options["schema_formats"]:
+            path = schema.write(schema_format, schema.generate(schema_format, options["url"]), directory)
+            self.stdout.write(f"Схема записана: {path}")
@@ -0,0 +1,115 @@
+import csv
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from pereval import importer
+from pereval.data_manager import PerevalDataManager
+from pereval.serializers import SubmitDataSerializer
+
+
+class FormatError(Exception):
+    """Файл импорта испорчен целиком (нет колонок, сломана структура GeoJSON): читать дальше нельзя."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт перевалов из CSV (колонки как в export_perevals), GeoJSON FeatureCollection или NDJSON. "
+        "Файл читается потоково, записи проверяются правилами POST /submitData/ и вставляются пачками "
+        "через bulk_create; дубликаты по названию и координатам отклоняются."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Файл импорта; - для stdin")
+        parser.add_argument(
+            "--format",
+            choices=list(importer.READERS),
+            dest="import_format",
+            help="Формат файла; по умолчанию по расширению",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000, help="Записей на одну пачку вставки")
+        parser.add_argument("--rejects", help="Файл NDJSON для отклоненных записей; по умолчанию stderr")
+        parser.add_argument("--progress", type=int, default=10000, help="Печатать прогресс каждые N записей")
+
+    def handle(self, *args, **options):
+        if options["batch_size"] <= 0 or options["progress"] <= 0:
+            raise CommandError("batch-size и progress должны быть положительными")
+        import_format = options["import_format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        if import_format not in importer.READERS:
+            raise CommandError(f"Укажите --format: {', '.join(importer.READERS)}")
+        read, convert = importer.READERS[import_format]
+
+        self.manager = PerevalDataManager()
+        self.stats = {"read": 0, "created": 0, "rejected": 0}
+        self.started = time.monotonic()
+        self.rejects = open(options["rejects"], "w", encoding="utf-8") if options["rejects"] else None
+        source = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8-sig", newline="")
+        try:
+            batch = []
+            for number, record in enumerate(self.records(read, source), 1):
+                self.stats["read"] = number
+                try:
+                    item = convert(record)
+                except (KeyError, TypeError, ValueError, AttributeError) as error:
+                    self.reject(number, f"Некорректная запись: {error!r}")
+                    continue
+                serializer = SubmitDataSerializer(data=item)
+                if serializer.is_valid():
+                    batch.append((number, serializer.validated_data))
+                else:
+                    self.reject(number, serializer.errors)
+                if len(batch) >= options["batch_size"]:
+                    self.insert(batch)
+                    batch = []
+                if number % options["progress"] == 0:
+                    self.report("Прочитано")
+            self.insert(batch)
+        except FormatError as error:
+            # Файл не разбирается целиком: строки до ошибки уже вставлены
+            self.report("Прервано")
+            raise CommandError(f"Ошибка формата {import_format} после записи {self.stats['read']}: {error}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if self.rejects:
+                self.rejects.close()
+        self.report("Готово")
+
+    def records(self, read, source):
+        """
+        Записи файла из функции чтения формата. Ошибки самого чтения — структурные и становятся FormatError;
+        ошибки отдельной записи возникают при ее преобразовании и только отклоняют ее.
+        """
+        try:
+            yield from read(source)
+        except (ValueError, csv.Error) as error:
+            raise FormatError(error) from error
+
+    def insert(self, batch):
+        if not batch:
+            return
+        results = self.manager.submit_many([item for _, item in batch])
+        for (number, _), result in zip(batch, results):
+            if "id" in result:
+                self.stats["created"] += 1
+            else:
+                self.reject(number, result["error"])
+
+    def reject(self, number, message):
+        self.stats["rejected"] += 1
+        if self.rejects:
+            self.rejects.write(json.dumps({"record": number, "message": message}, ensure_ascii=False) + "\n")
+        else:
+            self.stderr.write(f"Запись {number}: {message}")
+
+    def report(self, prefix):
+        stats = self.stats
+        elapsed = time.monotonic() - self.started
+        rate = stats["read"] / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{prefix}: записей {stats['read']}, добавлено {stats['created']}, отклонено {stats['rejected']} "
+            f"({rate:.0f} записей/с)"
+        )
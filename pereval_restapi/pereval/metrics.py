@@ -0,0 +1,309 @@
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from pereval.cache import detail_cache
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+# Имя метрики: (описание, границы корзин); метки у всех — endpoint и method
+HISTOGRAMS = {
+    "pereval_http_request_duration_seconds": ("Время обработки запроса", LATENCY_BUCKETS),
+    "pereval_http_db_queries": ("Число SQL-запросов за запрос", QUERY_BUCKETS),
+    "pereval_http_db_duration_seconds": ("Время SQL-запросов за запрос", LATENCY_BUCKETS),
+    "pereval_http_serializer_duration_seconds": ("Время сериализации и рендеринга за запрос", LATENCY_BUCKETS),
+    "pereval_http_request_size_bytes": ("Размер тела запроса", SIZE_BUCKETS),
+    "pereval_http_response_size_bytes": ("Размер тела ответа", SIZE_BUCKETS),
+}
+COUNTERS = {
+    "pereval_http_requests_total": "Число запросов по статусу ответа",
+    "pereval_detail_cache_total": "Обращения к кэшу GET /submitData/<id>/ по результату",
+}
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Registry:
+    """
+    Счетчики и гистограммы процесса. Запись — пара операций со словарем под блокировкой;
+    для нескольких процессов снимок периодически пишется в PEREVAL_METRICS_DIR и суммируется при чтении.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._start()
+
+    def _start(self):
+        # Уникально и после повторного использования pid: снимок прежнего процесса не перезаписывается
+        self._file_name = f"{os.getpid()}-{time.time_ns()}.json"
+        self._flushed_at = 0.0
+
+    def inc(self, name, labels, value=1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        index = bisect_left(HISTOGRAMS[name][1], value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(HISTOGRAMS[name][1]) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        """
+        :return: dict со списками counters [name, labels, value] и histograms [name, labels, корзины, сумма, число]
+        """
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [
+                [name, list(labels), list(buckets), total, count]
+                for (name, labels), (buckets, total, count) in self._histograms.items()
+            ]
+        counters += [
+            ["pereval_detail_cache_total", [["result", result]], value]
+            for result, value in detail_cache.stats().items()
+        ]
+        return {"counters": counters, "histograms": histograms}
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def after_fork(self):
+        """Воркер, порожденный fork (gunicorn --preload): собственный файл и счет с нуля."""
+        self._lock = threading.Lock()
+        self.reset()
+        self._start()
+
+    def _directory(self):
+        directory = settings.PEREVAL_METRICS_DIR
+        return Path(directory) if directory else None
+
+    def flush(self, force=False):
+        """Пишет снимок процесса в PEREVAL_METRICS_DIR не чаще PEREVAL_METRICS_FLUSH_SECONDS."""
+        directory = self._directory()
+        now = time.monotonic()
+        if directory is None or (not force and now - self._flushed_at < settings.PEREVAL_METRICS_FLUSH_SECONDS):
+            return
+        self._flushed_at = now
+        directory.mkdir(parents=True, exist_ok=True)
+        temporary = directory / f".{self._file_name}.tmp"
+        temporary.write_text(json.dumps(self.snapshot()))
+        os.replace(temporary, directory / self._file_name)
+
+    def collect(self):
+        """
+        Снимки всех процессов: текущий из памяти, остальные из PEREVAL_METRICS_DIR.
+        Файлы завершившихся процессов остаются: счетчики накопительные, каталог очищают при перезапуске сервиса.
+        """
+        snapshots = [self.snapshot()]
+        directory = self._directory()
+        if directory is not None and directory.is_dir():
+            for path in directory.glob("*.json"):
+                if path.name == self._file_name:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # Файл удален или дописывается другим процессом прямо сейчас
+                    continue
+        return merge(snapshots)
+
+
+def merge(snapshots):
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            if name not in HISTOGRAMS or len(buckets) != len(HISTOGRAMS[name][1]) + 1:
+                # Снимок процесса со старыми корзинами после обновления кода
+                continue
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets, strict=True)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected):
+    """Текстовый формат экспозиции Prometheus."""
+    counters, histograms = collected
+    lines = []
+    for name, description in COUNTERS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+        for (metric, labels), value in sorted(counters.items()):
+            if metric == name:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+    for name, (description, bounds) in HISTOGRAMS.items():
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip((*bounds, float("inf")), buckets, strict=True):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{_labels(labels, [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush(force=True))
+os.register_at_fork(after_in_child=registry.after_fork)
+
+_current = contextvars.ContextVar("pereval_request_metrics", default=None)
+
+
+class RequestMetrics:
+    """Накопители одного запроса; execute_wrapper для всех соединений с БД."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+@contextmanager
+def serializer_timer():
+    """Учитывает время блока как время сериализации текущего запроса."""
+    state = _current.get()
+    if state is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        state.serializer_time += time.perf_counter() - start
+
+
+class MetricsJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with serializer_timer():
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class MetricsMiddleware:
+    """
+    Гистограммы по эндпоинту (имени URL) и методу: время запроса, число и время SQL-запросов,
+    время сериализации, размеры запроса и ответа.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.PEREVAL_METRICS_ENABLED:
+            return self.get_response(request)
+
+        state = RequestMetrics()
+        token = _current.set(state)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                self.wrap_connections(stack, state)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, state, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.PEREVAL_METRICS_ENABLED:
+            return await self.get_response(request)
+
+        state = RequestMetrics()
+        token = _current.set(state)
+        start = time.perf_counter()
+        # Async ORM и синхронные представления выполняют SQL в потоке запроса для sync_to_async,
+        # поэтому обертка ставится на соединения этого потока
+        stack = ExitStack()
+        try:
+            await sync_to_async(self.wrap_connections)(stack, state)
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current.reset(token)
+        self.record(request, response, state, time.perf_counter() - start)
+        return response
+
+    def wrap_connections(self, stack, state):
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(state))
+
+    def record(self, request, response, state, duration):
+        match = getattr(request, "resolver_match", None)
+        labels = (("endpoint", (match.url_name or match.route) if match else "unmatched"), ("method", request.method))
+        registry.inc("pereval_http_requests_total", (*labels, ("status", str(response.status_code))))
+        registry.observe("pereval_http_request_duration_seconds", labels, duration)
+        registry.observe("pereval_http_db_queries", labels, state.queries)
+        registry.observe("pereval_http_db_duration_seconds", labels, state.db_time)
+        registry.observe("pereval_http_serializer_duration_seconds", labels, state.serializer_time)
+        registry.observe("pereval_http_request_size_bytes", labels, int(request.META.get("CONTENT_LENGTH") or 0))
+        if not response.streaming:
+            registry.observe("pereval_http_response_size_bytes", labels, len(response.content))
+        registry.flush()
+
+
+def metrics_view(request):
+    """GET /metrics — метрики всех процессов сервиса в формате Prometheus."""
+    registry.flush()
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pereval',
+            index=models.Index(fields=['user', 'date_added', 'id'], name='pereval_user_date_idx'),
+        ),
+    ]
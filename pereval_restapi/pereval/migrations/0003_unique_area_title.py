@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 12:30
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_areas(apps, schema_editor):
+    # create_area всегда искал район по title, поэтому дубликаты сливаем в самый ранний
+    Area = apps.get_model('pereval', 'Area')
+    Pereval = apps.get_model('pereval', 'Pereval')
+    duplicates = Area.objects.values('title').annotate(keep_id=Min('id'), total=Count('id')).filter(total__gt=1)
+    for row in duplicates:
+        extra_ids = list(Area.objects.filter(title=row['title']).exclude(id=row['keep_id']).values_list('id', flat=True))
+        Pereval.objects.filter(area_id__in=extra_ids).update(area_id=row['keep_id'])
+        Area.objects.filter(parent_id__in=extra_ids).update(parent_id=row['keep_id'])
+        Area.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0002_pereval_user_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_areas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='area',
+            constraint=models.UniqueConstraint(fields=('title',), name='unique_area_title'),
+        ),
+    ]
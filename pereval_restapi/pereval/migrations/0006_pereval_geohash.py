@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 12:36
+
+from django.db import migrations, models
+
+from pereval.geo import encode
+
+
+def fill_geohash(apps, schema_editor):
+    Pereval = apps.get_model('pereval', 'Pereval')
+    last_id = 0
+    while True:
+        batch = list(Pereval.objects.filter(id__gt=last_id).order_by('id').only('id', 'latitude', 'longitude')[:2000])
+        if not batch:
+            break
+        for pereval in batch:
+            pereval.geohash = encode(pereval.latitude, pereval.longitude)
+        Pereval.objects.bulk_update(batch, ['geohash'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0005_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pereval',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(fill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-17 12:38
+
+from django.db import migrations, models
+
+
+def fill_area_path(apps, schema_editor):
+    Area = apps.get_model('pereval', 'Area')
+    parents = dict(Area.objects.values_list('id', 'parent_id'))
+    paths = {}
+
+    def build(area_id, seen=()):
+        if area_id not in paths:
+            parent_id = parents[area_id]
+            # Цикл в старых данных разрываем: район становится корнем
+            prefix = build(parent_id, seen + (area_id,)) if parent_id and parent_id not in seen else ''
+            paths[area_id] = prefix + str(area_id).zfill(10)
+        return paths[area_id]
+
+    for area_id in parents:
+        build(area_id)
+    Area.objects.bulk_update(
+        [Area(id=area_id, path=path) for area_id, path in paths.items()], ['path'], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0006_pereval_geohash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_area_path, migrations.RunPython.noop),
+    ]
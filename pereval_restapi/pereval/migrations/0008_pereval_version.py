@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-17 12:42
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_updated_at(apps, schema_editor):
+    # Существующие строки при добавлении поля получают время миграции; честнее взять дату создания
+    Pereval = apps.get_model('pereval', 'Pereval')
+    Pereval.objects.update(updated_at=F('date_added'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0007_area_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pereval',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pereval',
+            name='version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+    ]
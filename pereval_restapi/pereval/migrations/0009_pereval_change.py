@@ -0,0 +1,54 @@
+# Generated by Django 5.2 on 2026-10-17 12:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def record_existing(apps, schema_editor):
+    # Уже существующие перевалы попадают в журнал как созданные, чтобы синхронизация с нуля их увидела
+    Pereval = apps.get_model('pereval', 'Pereval')
+    PerevalChange = apps.get_model('pereval', 'PerevalChange')
+    last_id = 0
+    while True:
+        batch = list(
+            Pereval.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'user_id', 'status', 'version')[:2000]
+        )
+        if not batch:
+            break
+        PerevalChange.objects.bulk_create(
+            [
+                PerevalChange(pereval_id=pk, user_id=user_id, kind='created', status=status, version=version)
+                for pk, user_id, status, version in batch
+            ]
+        )
+        last_id = batch[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0008_pereval_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PerevalChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pereval_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('created', 'Создан'), ('updated', 'Изменен'), ('status', 'Изменен статус'), ('deleted', 'Удален')], max_length=10)),
+                ('status', models.CharField(choices=[('new', 'Новый'), ('pending', 'На модерации'), ('accepted', 'Принят'), ('rejected', 'Отклонён')], max_length=20)),
+                ('version', models.PositiveIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='pereval.user')),
+            ],
+            options={
+                'verbose_name': 'Изменение перевала',
+                'verbose_name_plural': 'Изменения перевалов',
+                'indexes': [models.Index(fields=['user', 'id'], name='perevalchange_user_id_idx')],
+            },
+        ),
+        migrations.RunPython(record_existing, migrations.RunPython.noop),
+    ]
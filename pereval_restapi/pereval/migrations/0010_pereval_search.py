@@ -0,0 +1,44 @@
+# Generated by Django 5.2 on 2026-10-17 12:50
+
+from django.db import migrations, models
+
+from pereval.search import install, search_document, uninstall
+
+
+def fill_search_text(apps, schema_editor):
+    Pereval = apps.get_model('pereval', 'Pereval')
+    fields = ('title', 'beauty_title', 'other_titles', 'connect')
+    last_id = 0
+    while True:
+        batch = list(Pereval.objects.filter(id__gt=last_id).order_by('id').only('id', *fields)[:2000])
+        if not batch:
+            break
+        for pereval in batch:
+            pereval.search_text = search_document(*(getattr(pereval, field) for field in fields))
+        Pereval.objects.bulk_update(batch, ['search_text'])
+        last_id = batch[-1].id
+
+
+def install_index(apps, schema_editor):
+    install(schema_editor.connection)
+
+
+def uninstall_index(apps, schema_editor):
+    uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0009_pereval_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pereval',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 12:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0010_pereval_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pereval',
+            index=models.Index(fields=['status', 'date_added', 'id'], name='pereval_status_date_idx'),
+        ),
+    ]
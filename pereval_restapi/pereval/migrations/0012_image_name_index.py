@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 13:00
+
+import pereval.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0011_pereval_status_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=models.ImageField(db_index=True, storage=pereval.storage.get_image_storage, upload_to='images/%Y/%m/%d/'),
+        ),
+    ]
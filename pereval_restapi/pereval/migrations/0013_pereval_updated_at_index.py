@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0012_image_name_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pereval',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
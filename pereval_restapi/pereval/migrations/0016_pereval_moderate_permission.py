@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 13:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0015_upload_session'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='pereval',
+            options={'permissions': [('moderate_pereval', 'Может модерировать перевалы')], 'verbose_name': 'Перевал', 'verbose_name_plural': 'Перевалы'},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-17 13:50
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pereval', '0016_pereval_moderate_permission'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='pereval',
+            options={'permissions': [('moderate_pereval', 'Может модерировать перевалы'), ('export_pereval', 'Может выгружать все перевалы с контактами авторов')], 'verbose_name': 'Перевал', 'verbose_name_plural': 'Перевалы'},
+        ),
+    ]
@@ -1,4 +1,14 @@
-from django.db import models
+import heapq
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Concat, Substr
+from django.utils import timezone
+
+from pereval import geo, search
+from pereval.storage import get_image_storage
 
 
 class User(models.Model):
@@ -17,15 +27,130 @@ class User(models.Model):
 
 
 class Area(models.Model):
+    # Сегмент материализованного пути: id, дополненный нулями. Только цифры, чтобы сравнение
+    # строк не зависело от collation СУБД и поиск поддерева шел диапазоном по индексу
+    PATH_SEGMENT_WIDTH = 10
+
     title = models.CharField(max_length=255)
     parent = models.ForeignKey("self", on_delete=models.SET_NULL, null=True, blank=True)
+    path = models.CharField(max_length=255, db_index=True, editable=False, default="")
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def path_segment(cls, pk):
+        return str(pk).zfill(cls.PATH_SEGMENT_WIDTH)
+
+    @staticmethod
+    def subtree_q(path, field="path"):
+        """
+        Условие "путь начинается с path": район и все его потомки.
+        :param path: материализованный путь корня поддерева
+        :param field: имя поля пути, например area__path для Pereval
+        """
+        upper = str(int(path) + 1).zfill(len(path))
+        return Q(**{f"{field}__gte": path, f"{field}__lt": upper})
+
+    def clean(self):
+        if self.pk and self.parent_id:
+            parent_path = Area.objects.filter(id=self.parent_id).values_list("path", flat=True).first() or ""
+            if self.path and parent_path.startswith(self.path):
+                raise ValidationError({"parent": "Район не может быть вложен в собственный подрайон"})
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет район и поддерживает материализованный путь, в том числе у всех потомков
+        при смене родителя.
+        """
+        parent_path = Area.objects.filter(id=self.parent_id).values_list("path", flat=True).first() or ""
+        if self.pk and self.path and parent_path.startswith(self.path):
+            raise ValueError("Район не может быть вложен в собственный подрайон")
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            old_path = self.path
+            self.path = parent_path + self.path_segment(self.pk)
+            if self.path == old_path:
+                return
+            Area.objects.filter(pk=self.pk).update(path=self.path)
+            if old_path:
+                Area.objects.filter(self.subtree_q(old_path)).exclude(pk=self.pk).update(
+                    path=Concat(Value(self.path), Substr("path", len(old_path) + 1), output_field=models.CharField())
+                )
+
     class Meta:
         verbose_name = "Район"
         verbose_name_plural = "Районы"
+        constraints = [models.UniqueConstraint(fields=["title"], name="unique_area_title")]
+
+
+class PerevalQuerySet(models.QuerySet):
+    def with_details(self):
+        """
+        Подгружает всё, что нужно PerevalDetailSerializer, фиксированным числом запросов:
+        user, area, level — через JOIN, images — одним дополнительным запросом.
+        """
+        return self.select_related("user", "area", "level").prefetch_related("images")
+
+    def touch(self):
+        """
+        Отмечает перевалы измененными одним UPDATE: увеличивает version и обновляет updated_at.
+        Нужен, когда меняется представление перевала без вызова save().
+        """
+        count = self.update(version=F("version") + 1, updated_at=timezone.now())
+        PerevalChange.record(self.all().only("id", "user_id", "status", "version"), PerevalChange.UPDATED)
+        return count
+
+    def transition(self, status):
+        """
+        Переводит перевалы в статус status одним UPDATE, увеличивая version, и пишет журнал изменений.
+        Допустимость перехода проверяет вызывающий код.
+        :param status: новый статус
+        :return: int — число обновленных перевалов
+        """
+        count = self.update(status=status, version=F("version") + 1, updated_at=timezone.now())
+        PerevalChange.record(self.all().only("id", "user_id", "status", "version"), PerevalChange.STATUS)
+        return count
+
+    def in_area(self, area):
+        """Перевалы района и всех его подрайонов — один диапазонный запрос по индексу пути."""
+        return self.filter(Area.subtree_q(area.path, field="area__path"))
+
+    def in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """
+        Перевалы внутри прямоугольника. Отбор идет по индексу geohash, точная граница — по координатам.
+        Если min_lon > max_lon, прямоугольник пересекает антимеридиан.
+        """
+        if min_lon > max_lon:
+            return self.in_bbox(min_lat, min_lon, max_lat, 180) | self.in_bbox(min_lat, -180, max_lat, max_lon)
+        queryset = self.filter(
+            latitude__gte=min_lat, latitude__lte=max_lat, longitude__gte=min_lon, longitude__lte=max_lon
+        )
+        prefixes = geo.bbox_prefixes(min_lat, min_lon, max_lat, max_lon)
+        if prefixes:
+            queryset = queryset.filter(geo.prefix_q(prefixes))
+        return queryset
+
+    def nearest(self, latitude, longitude, limit):
+        """
+        Ближайшие к точке перевалы.
+        Кандидаты берутся из ячейки geohash точки и восьми соседних, начиная с мелких ячеек;
+        результат принимается, когда limit-й кандидат ближе гарантированного радиуса покрытия.
+        Порядок уточняется точным расстоянием по формуле гаверсинусов.
+        :return: список пар (расстояние в км, id), ближайшие первыми
+        """
+        for precision in range(8, 0, -1):
+            prefixes, radius = geo.neighborhood(latitude, longitude, precision)
+            ranked = self._rank_by_distance(self.filter(geo.prefix_q(prefixes)), latitude, longitude, limit)
+            if len(ranked) >= limit and ranked[-1][0] <= radius:
+                return ranked
+        return self._rank_by_distance(self, latitude, longitude, limit)
+
+    @staticmethod
+    def _rank_by_distance(queryset, latitude, longitude, limit):
+        rows = queryset.values_list("id", "latitude", "longitude").iterator(chunk_size=2000)
+        return heapq.nsmallest(limit, ((geo.haversine_km(latitude, longitude, lat, lon), pk) for pk, lat, lon in rows))
 
 
 class Pereval(models.Model):
@@ -35,6 +160,11 @@ class Pereval(models.Model):
         ("accepted", "Принят"),
         ("rejected", "Отклонён"),
     ]
+    # Допустимые переходы модерации: из статуса — в статусы
+    STATUS_TRANSITIONS = {
+        "new": ("pending",),
+        "pending": ("accepted", "rejected"),
+    }
 
     beauty_title = models.CharField(max_length=50, blank=True, null=True)
     title = models.CharField(max_length=255)
@@ -47,14 +177,63 @@ class Pereval(models.Model):
     height = models.IntegerField()
     date_added = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="new")
+    geohash = models.CharField(max_length=12, db_index=True, editable=False, default="")
+    # Нормализованные названия и описание для полнотекстового поиска (см. pereval.search)
+    search_text = models.TextField(editable=False, default="")
+    # Растет при каждом изменении; по нему строятся ETag и проверка If-Match
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Индекс — для инкрементальной выгрузки (since)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = PerevalQuerySet.as_manager()
+
+    SEARCH_FIELDS = ("title", "beauty_title", "other_titles", "connect")
 
     def __str__(self):
         return f"{self.beauty_title or ''} {self.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус на момент чтения: по нему журнал изменений отличает смену статуса от правки
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def build_search_text(self):
+        return search.search_document(*(getattr(self, field) for field in self.SEARCH_FIELDS))
+
+    @property
+    def etag(self):
+        return f'"{self.id}.{self.version}"'
+
+    def save(self, *args, **kwargs):
+        self.geohash = geo.encode(self.latitude, self.longitude)
+        self.search_text = self.build_search_text()
+        if not self._state.adding:
+            self.version += 1
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            extra = {"version", "updated_at"}
+            if {"latitude", "longitude"} & set(update_fields):
+                extra.add("geohash")
+            if set(self.SEARCH_FIELDS) & set(update_fields):
+                extra.add("search_text")
+            kwargs["update_fields"] = {*update_fields, *extra}
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Перевал"
         verbose_name_plural = "Перевалы"
         constraints = [models.UniqueConstraint(fields=["title", "latitude", "longitude"], name="unique_pereval")]
+        indexes = [
+            models.Index(fields=["user", "date_added", "id"], name="pereval_user_date_idx"),
+            # Очередь модерации: перевалы статуса от старых к новым
+            models.Index(fields=["status", "date_added", "id"], name="pereval_status_date_idx"),
+        ]
+        permissions = [
+            ("moderate_pereval", "Может модерировать перевалы"),
+            ("export_pereval", "Может выгружать все перевалы с контактами авторов"),
+        ]
 
 
 class Level(models.Model):
@@ -72,10 +251,30 @@ class Level(models.Model):
         verbose_name_plural = "Уровни сложности"
 
 
+class Blob(models.Model):
+    """Файл в content-addressed хранилище; refcount — число ссылающихся на него Image."""
+
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = "Файл"
+        verbose_name_plural = "Файлы"
+
+
 class Image(models.Model):
     pereval = models.ForeignKey(Pereval, on_delete=models.CASCADE, related_name="images")
     title = models.CharField(max_length=255, blank=True, null=True)
-    image = models.ImageField(upload_to="images/%Y/%m/%d/")
+    # Индекс нужен gc_media для проверки ссылок на файлы пакетами
+    image = models.ImageField(upload_to="images/%Y/%m/%d/", storage=get_image_storage, db_index=True)
+    blob = models.ForeignKey(Blob, on_delete=models.PROTECT, null=True, blank=True, related_name="images")
+    variants = models.JSONField(default=dict, blank=True)
     date_added = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -86,6 +285,239 @@ class Image(models.Model):
         verbose_name_plural = "Изображения"
 
 
+class PerevalChange(models.Model):
+    """
+    Журнал изменений перевалов для инкрементальной синхронизации клиентов.
+    id записи служит курсором: клиент запрашивает изменения с id больше последнего полученного.
+    """
+
+    CREATED = "created"
+    UPDATED = "updated"
+    STATUS = "status"
+    DELETED = "deleted"
+    KIND_CHOICES = [
+        (CREATED, "Создан"),
+        (UPDATED, "Изменен"),
+        (STATUS, "Изменен статус"),
+        (DELETED, "Удален"),
+    ]
+
+    # Без ограничений внешнего ключа: запись об удалении переживает сам перевал, а при удалении
+    # пользователя каскадно удаляемые перевалы пишут записи, ссылающиеся на удаляемого пользователя
+    pereval_id = models.BigIntegerField()
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name="+")
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=Pereval.STATUS_CHOICES)
+    version = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()}: перевал {self.pereval_id}, версия {self.version}"
+
+    @classmethod
+    def record(cls, perevals, kind):
+        """
+        Добавляет в журнал по записи на каждый перевал одним INSERT.
+        :param perevals: итерируемое объектов Pereval (нужны id, user_id, status, version)
+        :param kind: тип изменения из KIND_CHOICES
+        :return: список созданных записей
+        """
+        return cls.objects.bulk_create(
+            [
+                cls(
+                    pereval_id=pereval.id,
+                    user_id=pereval.user_id,
+                    kind=kind,
+                    status=pereval.status,
+                    version=pereval.version,
+                )
+                for pereval in perevals
+            ]
+        )
+
+    @classmethod
+    def feed(cls, user_id, since, limit, settled_before):
+        """
+        Изменения перевалов пользователя после курсора, свернутые до последнего состояния каждого перевала.
+        :param user_id: ID пользователя
+        :param since: курсор — id последней полученной записи журнала
+        :param limit: максимальное число записей журнала за один вызов
+        :param settled_before: записи новее этого момента не отдаются
+        :return: tuple (список изменений, следующий курсор, есть ли еще записи)
+        """
+        rows = list(
+            cls.objects.filter(user_id=user_id, id__gt=since, created_at__lte=settled_before)
+            .order_by("id")
+            .values_list("id", "pereval_id", "kind", "status", "version", "created_at")[: limit + 1]
+        )
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        changes = {}
+        for _, pereval_id, kind, status, version, created_at in rows:
+            previous = changes.pop(pereval_id, None)
+            # Перевал, созданный и затем измененный в пределах окна, для клиента все еще новый
+            if previous and previous["change"] == cls.CREATED and kind != cls.DELETED:
+                kind = cls.CREATED
+            changes[pereval_id] = {
+                "id": pereval_id,
+                "change": kind,
+                "status": status,
+                "version": version,
+                "changed_at": created_at,
+            }
+        next_cursor = rows[-1][0] if rows else since
+        return list(changes.values()), next_cursor, has_more
+
+    class Meta:
+        verbose_name = "Изменение перевала"
+        verbose_name_plural = "Изменения перевалов"
+        indexes = [models.Index(fields=["user", "id"], name="perevalchange_user_id_idx")]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Первый ответ на запрос с заголовком Idempotency-Key. Повтор с тем же ключом получает сохраненный ответ
+    без повторной обработки; пока status_code пуст, первый запрос еще выполняется.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response = models.JSONField(null=True)
+    created_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+    @classmethod
+    def claim(cls, key, fingerprint, now, ttl, lock_timeout):
+        """
+        Занимает ключ для обработки запроса; существующая запись находится одним запросом по уникальному индексу.
+        :param key: значение Idempotency-Key
+        :param fingerprint: отпечаток запроса
+        :param now: текущий момент
+        :param ttl: timedelta, сколько хранится ответ
+        :param lock_timeout: timedelta, после которой незавершенная обработка считается брошенной
+        :return: tuple (запись, True если ключ занят этим запросом)
+        """
+        record = cls.objects.filter(key=key).first()
+        if record is None:
+            try:
+                with transaction.atomic():
+                    return cls.objects.create(key=key, fingerprint=fingerprint, created_at=now), True
+            except IntegrityError:
+                # Одновременный запрос с тем же ключом успел раньше
+                return cls.winner(key, fingerprint, now), False
+
+        expired = record.created_at <= now - ttl
+        abandoned = record.status_code is None and record.created_at <= now - lock_timeout
+        if not expired and not abandoned:
+            return record, False
+        # Ответ устарел или обработчик не завершился (например, упал процесс): ключ занимается заново
+        taken = cls.objects.filter(pk=record.pk, created_at=record.created_at).update(
+            fingerprint=fingerprint, status_code=None, response=None, created_at=now
+        )
+        if not taken:
+            return cls.winner(key, fingerprint, now), False
+        record.fingerprint, record.status_code, record.response, record.created_at = fingerprint, None, None, now
+        return record, True
+
+    @classmethod
+    def winner(cls, key, fingerprint, now):
+        """
+        Запись запроса, занявшего ключ одновременно с текущим: ее отпечаток решает между 409 и 422.
+        Если она уже освобождена, возвращается незанятая запись с отпечатком текущего запроса — клиент повторит.
+        """
+        try:
+            return cls.objects.get(key=key)
+        except cls.DoesNotExist:
+            return cls(key=key, fingerprint=fingerprint, created_at=now)
+
+    def complete(self, status_code, response):
+        """Сохраняет ответ для повторов."""
+        type(self).objects.filter(pk=self.pk).update(status_code=status_code, response=response)
+
+    def release(self):
+        """Освобождает ключ, если ответ не должен повторяться (ошибка сервера): повтор обработается заново."""
+        type(self).objects.filter(pk=self.pk, status_code__isnull=True).delete()
+
+    @classmethod
+    def expire(cls, before, batch_size=1000):
+        """
+        Удаляет записи старше before пакетами по индексу created_at, не блокируя таблицу надолго.
+        :return: число удаленных записей
+        """
+        deleted = 0
+        while True:
+            ids = list(cls.objects.filter(created_at__lt=before).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += cls.objects.filter(pk__in=ids).delete()[0]
+
+    class Meta:
+        verbose_name = "Ключ идемпотентности"
+        verbose_name_plural = "Ключи идемпотентности"
+
+
+class UploadSession(models.Model):
+    """
+    Возобновляемая загрузка изображения перевала по частям. Части (PUT с Content-Range) дописываются
+    в файл сессии в хранилище, offset — число уже принятых байт; после завершения image ссылается
+    на созданное изображение, и повторное завершение возвращает его же.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    pereval = models.ForeignKey(Pereval, on_delete=models.CASCADE, related_name="upload_sessions")
+    title = models.CharField(max_length=255, blank=True, null=True)
+    file_name = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    length = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    image = models.ForeignKey(Image, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.file_name}: {self.offset} из {self.length} байт"
+
+    def advance(self, start, received):
+        """
+        Сдвигает offset после записи части, только если его не сдвинул параллельный запрос.
+        :return: True, если offset обновлен
+        """
+        updated = (
+            type(self).objects.filter(pk=self.pk, offset=start, image__isnull=True).update(offset=start + received)
+        )
+        if updated:
+            self.offset = start + received
+        return bool(updated)
+
+    def discard(self):
+        """Удаляет сессию вместе с недокачанным файлом."""
+        get_image_storage().discard_upload(self.pk)
+        self.delete()
+
+    @classmethod
+    def expire(cls, before, batch_size=1000):
+        """
+        Удаляет сессии, созданные раньше before, и их файлы пакетами по индексу created_at.
+        :return: число удаленных сессий
+        """
+        storage = get_image_storage()
+        deleted = 0
+        while True:
+            ids = list(cls.objects.filter(created_at__lt=before).values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            for pk in ids:
+                storage.discard_upload(pk)
+            deleted += cls.objects.filter(pk__in=ids).delete()[0]
+
+    class Meta:
+        verbose_name = "Загрузка по частям"
+        verbose_name_plural = "Загрузки по частям"
+
+
 class ActivityType(models.Model):
     title = models.CharField(max_length=100)
 
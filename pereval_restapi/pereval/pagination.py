@@ -0,0 +1,181 @@
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination:
+    """
+    Keyset-пагинация по паре (date_added, id).
+    Курсор кодирует последнюю отданную пару, поэтому стоимость запроса страницы
+    не зависит от её номера, а вставки новых записей не сдвигают выдачу.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    default_page_size = 50
+    max_page_size = 200
+
+    def __init__(self, descending=True):
+        self.descending = descending
+        self.page_size = None
+        self.next_cursor = None
+        self.request = None
+
+    def get_page_size(self, request):
+        """
+        Возвращает размер страницы из запроса, ограниченный max_page_size.
+        :param request: объект Request
+        :return: int
+        """
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw is None:
+            return self.default_page_size
+        try:
+            page_size = int(raw)
+        except ValueError:
+            raise ValueError("Некорректный размер страницы")
+        if page_size <= 0:
+            raise ValueError("Некорректный размер страницы")
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, date_added, pk):
+        payload = json.dumps([date_added.isoformat(), pk]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """
+        Разбирает курсор в пару (date_added, id).
+        :param cursor: строка курсора из query-параметра
+        :return: tuple (datetime, int)
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw_date, pk = json.loads(base64.urlsafe_b64decode(padded))
+            date_added = parse_datetime(raw_date)
+            if date_added is None or not isinstance(pk, int):
+                raise ValueError
+            return date_added, pk
+        except (TypeError, ValueError, binascii.Error):
+            raise ValueError("Некорректный курсор")
+
+    def paginate_queryset(self, queryset, request):
+        """
+        Возвращает одну страницу queryset, упорядоченного по (date_added, id).
+        :param queryset: QuerySet перевалов (модели или строки .values())
+        :param request: объект Request
+        :return: список объектов страницы
+        """
+        return self._page(list(self._page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """Асинхронный вариант paginate_queryset для async-представлений."""
+        return self._page([row async for row in self._page_queryset(queryset, request)])
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        if self.descending:
+            queryset = queryset.order_by("-date_added", "-id")
+        else:
+            queryset = queryset.order_by("date_added", "id")
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            date_added, pk = self.decode_cursor(cursor)
+            if self.descending:
+                queryset = queryset.filter(Q(date_added__lt=date_added) | Q(date_added=date_added, id__lt=pk))
+            else:
+                queryset = queryset.filter(Q(date_added__gt=date_added) | Q(date_added=date_added, id__gt=pk))
+
+        # Запрашиваем на одну запись больше, чтобы понять, есть ли следующая страница
+        return queryset[: self.page_size + 1]
+
+    def _page(self, page):
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            last = page[-1]
+            if isinstance(last, dict):
+                # Строки .values()
+                self.next_cursor = self.encode_cursor(last["date_added"], last["id"])
+            else:
+                self.next_cursor = self.encode_cursor(last.date_added, last.id)
+        else:
+            self.next_cursor = None
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_headers(self):
+        """
+        Заголовки ответа со ссылкой на следующую страницу (RFC 8288).
+        :return: dict
+        """
+        next_link = self.get_next_link()
+        if next_link is None:
+            return {}
+        return {"Link": f'<{next_link}>; rel="next"'}
+
+
+class RankPagination(KeysetPagination):
+    """
+    Keyset-пагинация ранжированной выдачи по паре (score, id), меньший score — выше.
+    Курсор хранит пару последнего результата; float в JSON сохраняется без потери точности.
+    """
+
+    default_page_size = 20
+    max_page_size = 100
+
+    def encode_cursor(self, score, pk):
+        payload = json.dumps([score, pk]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """
+        Разбирает курсор в пару (score, id).
+        :param cursor: строка курсора из query-параметра
+        :return: tuple (float, int)
+        """
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            score, pk = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(score, int | float) or not isinstance(pk, int):
+                raise ValueError
+            return float(score), pk
+        except (TypeError, ValueError, binascii.Error):
+            raise ValueError("Некорректный курсор")
+
+    def paginate_ranked(self, fetch, request):
+        """
+        Возвращает одну страницу ранжированной выдачи.
+        :param fetch: функция (limit, after) -> список пар (score, id), упорядоченных по возрастанию
+        :param request: объект Request
+        :return: список пар (score, id) страницы
+        """
+        return self._ranked_page(fetch(*self._ranked_args(request)))
+
+    async def apaginate_ranked(self, fetch, request):
+        """Асинхронный вариант paginate_ranked: fetch — корутина (limit, after) -> список пар (score, id)."""
+        return self._ranked_page(await fetch(*self._ranked_args(request)))
+
+    def _ranked_args(self, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        return self.page_size + 1, self.decode_cursor(cursor) if cursor else None
+
+    def _ranked_page(self, page):
+        if len(page) > self.page_size:
+            page = page[: self.page_size]
+            self.next_cursor = self.encode_cursor(*page[-1])
+        else:
+            self.next_cursor = None
+        return page
@@ -0,0 +1,21 @@
+from rest_framework.permissions import BasePermission
+
+
+class CanModerate(BasePermission):
+    """Доступ к модерации: сотрудники (is_staff) и пользователи с правом pereval.moderate_pereval."""
+
+    message = "Недостаточно прав для модерации"
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.has_perm("pereval.moderate_pereval")))
+
+
+class CanExport(BasePermission):
+    """Доступ к выгрузке с email и телефонами авторов: сотрудники и пользователи с правом pereval.export_pereval."""
+
+    message = "Недостаточно прав для выгрузки"
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and (user.is_staff or user.has_perm("pereval.export_pereval")))
@@ -0,0 +1,113 @@
+import contextvars
+import math
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PIN_COOKIE = "pereval_primary_until"
+PIN_HEADER = "X-Read-Primary-Until"
+
+# Реплика, с которой читает текущий запрос; None — основная база
+_replica = contextvars.ContextVar("pereval_replica", default=None)
+
+
+@contextmanager
+def read_from(alias):
+    """
+    Чтение в блоке — с реплики alias (None — с основной базы).
+    Вне блока, в том числе в командах управления, чтение идет с основной базы.
+    """
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+def read_alias():
+    """
+    Алиас базы для чтения сейчас. Внутри транзакции основной базы — всегда она:
+    транзакция должна видеть собственные изменения, а select_for_update — блокировать строки.
+    """
+    alias = _replica.get()
+    if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+class PrimaryReplicaRouter:
+    """Запись — в основную базу, чтение — с реплики, выбранной ReplicaMiddleware для запроса."""
+
+    def db_for_read(self, model, **hints):
+        return read_alias()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же строки, что и основная база
+        databases = {DEFAULT_DB_ALIAS, *settings.PEREVAL_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Безопасные запросы (GET, HEAD, OPTIONS) читают с одной реплики из PEREVAL_READ_REPLICAS на весь запрос,
+    изменяющие — с основной базы. После успешного изменяющего запроса клиент на PEREVAL_READ_YOUR_WRITES_SECONDS
+    закрепляется за основной базой, чтобы не увидеть данные до своей записи: ответ содержит cookie
+    pereval_primary_until и заголовок X-Read-Primary-Until; клиент без cookie возвращает заголовок сам.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with read_from(self.choose(request)):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        with read_from(self.choose(request)):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def choose(self, request):
+        """Реплика для запроса или None, если он читает с основной базы."""
+        replicas = settings.PEREVAL_READ_REPLICAS
+        if not replicas or request.method not in SAFE_METHODS or self.pinned(request):
+            return None
+        return random.choice(replicas)
+
+    def pinned(self, request):
+        raw = request.headers.get(PIN_HEADER) or request.COOKIES.get(PIN_COOKIE)
+        try:
+            until = float(raw)
+        except (TypeError, ValueError):
+            return False
+        now = time.time()
+        # Метку ставит сервер; дальше окна от текущего момента она может быть только подделанной
+        return now < until <= now + settings.PEREVAL_READ_YOUR_WRITES_SECONDS
+
+    def pin(self, request, response):
+        if not settings.PEREVAL_READ_REPLICAS or request.method in SAFE_METHODS or response.status_code >= 400:
+            return response
+        window = settings.PEREVAL_READ_YOUR_WRITES_SECONDS
+        # Отбрасываем доли миллисекунды, а не округляем: округленная вверх метка выходит за окно
+        until = f"{math.floor((time.time() + window) * 1000) / 1000:.3f}"
+        response[PIN_HEADER] = until
+        response.set_cookie(PIN_COOKIE, until, max_age=window, httponly=True, samesite="Lax")
+        return response
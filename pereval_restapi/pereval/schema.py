@@ -0,0 +1,105 @@
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+API_INFO = openapi.Info(
+    title="Pereval API",
+    default_version="v1",
+    description="API для управления данными перевалов",
+    contact=openapi.Contact(email="harisova.karina.k@gmail.com"),
+    license=openapi.License(name="BSD License"),
+)
+
+CONTENT_TYPES = {"json": "application/json", "yaml": "application/yaml"}
+
+# Прочитанные файлы схемы: путь -> (mtime_ns, размер, тело, ETag)
+_loaded = {}
+_lock = threading.Lock()
+
+
+def schema_path(schema_format, directory=None):
+    return Path(directory or settings.PEREVAL_OPENAPI_DIR) / f"openapi.{schema_format}"
+
+
+def generate(schema_format, url=None):
+    """
+    Строит схему OpenAPI по всем эндпоинтам проекта через drf_yasg.
+    :param schema_format: "json" или "yaml"
+    :param url: базовый URL API в схеме (host и schemes); None — клиент подставит адрес, с которого загрузил схему
+    :return: bytes
+    """
+    schema = OpenAPISchemaGenerator(API_INFO, url=url).get_schema(request=None, public=True)
+    codec = OpenAPICodecJson([], pretty=True) if schema_format == "json" else OpenAPICodecYaml([])
+    return codec.encode(schema)
+
+
+def write(schema_format, body, directory=None):
+    """Записывает схему атомарно: работающий сервер не прочитает файл наполовину."""
+    path = schema_path(schema_format, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(body)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def load(schema_format):
+    """
+    Сгенерированная схема с диска; файл перечитывается, только если изменился.
+    :return: tuple (тело, ETag) или None, если файла нет
+    """
+    path = schema_path(schema_format)
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    with _lock:
+        cached = _loaded.get(path)
+        if cached is None or cached[:2] != (stat.st_mtime_ns, stat.st_size):
+            body = path.read_bytes()
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            cached = _loaded[path] = (stat.st_mtime_ns, stat.st_size, body, etag)
+    return cached[2:]
+
+
+def schema_view(request, schema_format):
+    """
+    GET /swagger.json, /swagger.yaml — схема API, сгенерированная командой generate_openapi.
+    drf_yasg не вызывается: файл отдается с ETag по содержимому и долгим кэшированием.
+    Без файла схема строится на лету только при DEBUG.
+    """
+    loaded = load(schema_format)
+    if loaded is not None:
+        body, etag = loaded
+        cache_control = f"public, max-age={settings.PEREVAL_OPENAPI_MAX_AGE}"
+    elif settings.DEBUG:
+        body = generate(schema_format, url=f"{request.scheme}://{request.get_host()}")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        cache_control = "no-cache"
+    else:
+        return JsonResponse(
+            {"status": 503, "message": "Схема API не сгенерирована: выполните python manage.py generate_openapi"},
+            status=503,
+        )
+
+    response = HttpResponse(headers={"ETag": etag, "Cache-Control": cache_control})
+    conditional = get_conditional_response(request, etag=etag, response=response)
+    if conditional is not response:
+        return conditional
+    response.content = body
+    response["Content-Type"] = CONTENT_TYPES[schema_format]
+    return response
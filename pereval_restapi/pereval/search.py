@@ -0,0 +1,178 @@
+import re
+import unicodedata
+
+from django.db import connections
+
+from pereval import replicas
+
+# Кириллица приводится к латинице, чтобы "Эльбрус" находился и по "elbrus", и наоборот
+TRANSLITERATION = {
+    "а": "a",
+    "б": "b",
+    "в": "v",
+    "г": "g",
+    "д": "d",
+    "е": "e",
+    "ё": "e",
+    "ж": "zh",
+    "з": "z",
+    "и": "i",
+    "й": "y",
+    "к": "k",
+    "л": "l",
+    "м": "m",
+    "н": "n",
+    "о": "o",
+    "п": "p",
+    "р": "r",
+    "с": "s",
+    "т": "t",
+    "у": "u",
+    "ф": "f",
+    "х": "h",
+    "ц": "ts",
+    "ч": "ch",
+    "ш": "sh",
+    "щ": "sch",
+    "ъ": "",
+    "ы": "y",
+    "ь": "",
+    "э": "e",
+    "ю": "yu",
+    "я": "ya",
+    "і": "i",
+    "ї": "yi",
+    "є": "e",
+    "ґ": "g",
+}
+# Распространенные варианты латинского написания, сводимые к одному
+LATIN_VARIANTS = (("kh", "h"), ("shch", "sch"), ("j", "y"), ("w", "v"))
+TOKEN_RE = re.compile(r"\w+")
+
+SQLITE_TABLE = "pereval_search"
+POSTGRES_INDEX = "pereval_search_gin"
+POSTGRES_CONFIG = "simple"
+
+
+def normalize(text):
+    """
+    Приводит текст к виду поискового индекса: нижний регистр, латиница без диакритики.
+    :param text: исходная строка или None
+    :return: str — слова через пробел
+    """
+    if not text:
+        return ""
+    # Сначала транслитерация: NFKD разложил бы "й" на "и" и бреве
+    text = "".join(TRANSLITERATION.get(char, char) for char in unicodedata.normalize("NFC", text.lower()))
+    text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+    for variant, canonical in LATIN_VARIANTS:
+        text = text.replace(variant, canonical)
+    return " ".join(TOKEN_RE.findall(text))
+
+
+def search_document(*fields):
+    """Поисковый текст перевала из названий и описания."""
+    return " ".join(filter(None, (normalize(field) for field in fields)))
+
+
+def query_tokens(query):
+    """Слова запроса после нормализации; каждое ищется как префикс."""
+    return normalize(query).split()
+
+
+def install(connection):
+    """
+    Создает индекс полнотекстового поиска, если его нет.
+    SQLite: таблица FTS5 с внешним содержимым и триггеры, которые поддерживают ее при любой записи,
+    включая bulk_create и update(). PostgreSQL: GIN-индекс по to_tsvector(search_text).
+    Вызывается из миграции и после каждого migrate: пересоздание таблицы перевалов в SQLite удаляет триггеры.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {POSTGRES_INDEX} ON pereval_pereval "
+                f"USING GIN (to_tsvector('{POSTGRES_CONFIG}', search_text))"
+            )
+        return
+    if connection.vendor != "sqlite":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f"{SQLITE_TABLE}_%"])
+        if len(cursor.fetchall()) == 3:
+            return
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            "USING fts5(search_text, content='pereval_pereval', content_rowid='id')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_insert AFTER INSERT ON pereval_pereval BEGIN "
+            f"INSERT INTO {SQLITE_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_delete AFTER DELETE ON pereval_pereval BEGIN "
+            f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {SQLITE_TABLE}_update AFTER UPDATE OF search_text ON pereval_pereval BEGIN "
+            f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}, rowid, search_text) "
+            "VALUES ('delete', old.id, old.search_text); "
+            f"INSERT INTO {SQLITE_TABLE}(rowid, search_text) VALUES (new.id, new.search_text); END"
+        )
+        # Пока триггеров не было, таблица могла отстать: перестраиваем по содержимому перевалов
+        cursor.execute(f"INSERT INTO {SQLITE_TABLE}({SQLITE_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {POSTGRES_INDEX}")
+        elif connection.vendor == "sqlite":
+            for suffix in ("insert", "delete", "update"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {SQLITE_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+
+
+def search(query, limit, after=None, using=None):
+    """
+    Перевалы, в названиях или описании которых есть все слова запроса (как префиксы).
+    Результат упорядочен по (score, id), меньший score — более релевантный.
+    :param query: строка запроса
+    :param limit: число результатов
+    :param after: пара (score, id) последнего результата предыдущей страницы
+    :param using: алиас БД; по умолчанию — база чтения текущего запроса (см. replicas.read_alias)
+    :return: список пар (score, id)
+    """
+    tokens = query_tokens(query)
+    if not tokens:
+        return []
+    connection = connections[using or replicas.read_alias()]
+
+    if connection.vendor == "postgresql":
+        score = f"(-ts_rank(to_tsvector('{POSTGRES_CONFIG}', p.search_text), q))::float8"
+        sql = (
+            f"SELECT {score}, p.id FROM pereval_pereval p, to_tsquery('{POSTGRES_CONFIG}', %s) q "
+            f"WHERE to_tsvector('{POSTGRES_CONFIG}', p.search_text) @@ q"
+        )
+        params = [" & ".join(f"{token}:*" for token in tokens)]
+    elif connection.vendor == "sqlite":
+        score = f"bm25({SQLITE_TABLE})"
+        sql = f"SELECT {score}, rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s"
+        params = [" ".join(f'"{token}"*' for token in tokens)]
+    else:
+        # Без полнотекстового индекса: подстроки по search_text, без ранжирования
+        score = "0.0"
+        sql = "SELECT 0.0, p.id FROM pereval_pereval p WHERE " + " AND ".join(["p.search_text LIKE %s"] * len(tokens))
+        params = [f"%{token}%" for token in tokens]
+    pk = "rowid" if connection.vendor == "sqlite" else "p.id"
+
+    if after is not None:
+        sql += f" AND ({score} > %s OR ({score} = %s AND {pk} > %s))"
+        params += [after[0], after[0], after[1]]
+    sql += f" ORDER BY {score}, {pk} LIMIT %s"
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(float(score), pk) for score, pk in cursor.fetchall()]
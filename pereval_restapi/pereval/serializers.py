@@ -1,5 +1,11 @@
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import filepath_to_uri
 from rest_framework import serializers
 
+from pereval import search
+from pereval.metrics import serializer_timer
 from pereval.models import Area, Image, Level, Pereval, User
 
 
@@ -25,11 +31,14 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 class AreaSerializer(serializers.ModelSerializer):
-    parent_id = serializers.IntegerField(source="parent.id", required=False, allow_null=True)
+    parent_id = serializers.IntegerField(required=False, allow_null=True)
 
     class Meta:
         model = Area
         fields = ["title", "parent_id"]
+        extra_kwargs = {
+            "title": {"validators": []},
+        }
 
     def validate(self, data):
         if not data.get("title"):
@@ -44,6 +53,8 @@ class LevelSerializer(serializers.ModelSerializer):
 
 
 class ImageDataSerializer(serializers.Serializer):
+    # id существующего изображения при редактировании; без id — новое изображение с файлом
+    id = serializers.IntegerField(min_value=1, required=False)
     title = serializers.CharField(max_length=255, required=False, allow_blank=True)
 
 
@@ -74,6 +85,9 @@ class PerevalSerializer(serializers.Serializer):
     def validate(self, data):
         if not data["title"].strip():
             raise serializers.ValidationError("Название перевала не может быть пустым")
+        image_ids = [image["id"] for image in data.get("images", []) if "id" in image]
+        if len(image_ids) != len(set(image_ids)):
+            raise serializers.ValidationError("Изображение указано несколько раз")
         return data
 
 
@@ -82,13 +96,18 @@ class SubmitDataSerializer(serializers.Serializer):
     area = AreaSerializer()
     pereval = PerevalSerializer()
 
+    def is_valid(self, *, raise_exception=False):
+        with serializer_timer():
+            return super().is_valid(raise_exception=raise_exception)
+
 
 class ImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    variants = serializers.SerializerMethodField()
 
     class Meta:
         model = Image
-        fields = ["title", "image", "date_added"]
+        fields = ["id", "title", "image", "variants", "date_added"]
 
     def get_image(self, obj):
         request = self.context.get("request")
@@ -96,6 +115,17 @@ class ImageSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.image.url)
         return None
 
+    def get_variants(self, obj):
+        """Уменьшенные копии: {"thumbnail": {"webp": url, "jpeg": url}, "medium": ..., "large": ...}."""
+        request = self.context.get("request")
+        if not request:
+            return {}
+        storage = obj.image.storage
+        return {
+            variant: {extension: request.build_absolute_uri(storage.url(name)) for extension, name in files.items()}
+            for variant, files in obj.variants.items()
+        }
+
 
 class PerevalDetailSerializer(serializers.ModelSerializer):
     user = UserSerializer()
@@ -130,3 +160,249 @@ class PerevalDetailSerializer(serializers.ModelSerializer):
             "height": data["coords"]["height"],
         }
         return data
+
+
+class BBoxQuerySerializer(serializers.Serializer):
+    min_lat = serializers.FloatField(min_value=-90, max_value=90)
+    min_lon = serializers.FloatField(min_value=-180, max_value=180)
+    max_lat = serializers.FloatField(min_value=-90, max_value=90)
+    max_lon = serializers.FloatField(min_value=-180, max_value=180)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=100)
+
+    def validate(self, data):
+        if data["min_lat"] > data["max_lat"]:
+            raise serializers.ValidationError("min_lat не может быть больше max_lat")
+        return data
+
+
+class NearestQuerySerializer(serializers.Serializer):
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lon = serializers.FloatField(min_value=-180, max_value=180)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=200)
+
+    def validate_q(self, value):
+        if not search.query_tokens(value):
+            raise serializers.ValidationError("Поисковый запрос не содержит слов")
+        return value
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    user__email = serializers.EmailField()
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=200)
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    since = serializers.DateTimeField(required=False)
+    area = serializers.IntegerField(min_value=1, required=False)
+
+
+class UploadSessionSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    file_name = serializers.CharField(max_length=255)
+    content_type = serializers.CharField(max_length=100)
+    length = serializers.IntegerField(min_value=1)
+
+    def validate_content_type(self, value):
+        if value not in settings.PEREVAL_UPLOAD_ALLOWED_TYPES:
+            raise serializers.ValidationError(f"Недопустимый тип файла {value}")
+        return value
+
+    def validate_length(self, value):
+        if value > settings.PEREVAL_UPLOAD_MAX_FILE_SIZE:
+            raise serializers.ValidationError(f"Размер файла превышает {settings.PEREVAL_UPLOAD_MAX_FILE_SIZE} байт")
+        return value
+
+
+class ModerationQueueQuerySerializer(serializers.Serializer):
+    status = serializers.ChoiceField(choices=Pereval.STATUS_CHOICES, default="pending")
+
+
+class StatusTransitionSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), min_length=1, max_length=1000)
+    status = serializers.ChoiceField(
+        choices=[
+            choice
+            for choice in Pereval.STATUS_CHOICES
+            if any(choice[0] in targets for targets in Pereval.STATUS_TRANSITIONS.values())
+        ]
+    )
+
+
+def _text(value):
+    # Так CharField отдает значение: None как есть, остальное через str()
+    return None if value is None else str(value)
+
+
+class PerevalDetailFastSerializer:
+    """
+    Сериализатор только для чтения, который строит тот же JSON, что PerevalDetailSerializer,
+    из строк .values() без создания полей DRF и моделей на каждый объект.
+    Изображения всех перевалов страницы загружаются одним запросом.
+    Использование повторяет DRF: PerevalDetailFastSerializer(rows, many=True, context=...).data.
+    """
+
+    value_fields = (
+        "id",
+        "beauty_title",
+        "title",
+        "other_titles",
+        "connect",
+        "user__email",
+        "user__first_name",
+        "user__last_name",
+        "user__patronymic",
+        "user__phone",
+        "area__title",
+        "area__parent_id",
+        "latitude",
+        "longitude",
+        "height",
+        "level__id",
+        "level__winter",
+        "level__summer",
+        "level__autumn",
+        "level__spring",
+        "status",
+        "date_added",
+        # Не входят в ответ, нужны для ETag и Last-Modified
+        "version",
+        "updated_at",
+    )
+    image_fields = ("pereval_id", "id", "title", "image", "variants", "date_added")
+
+    def __init__(self, instance, many=False, context=None):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.request = self.context.get("request")
+        self.storage = Image._meta.get_field("image").storage
+        # Часовой пояс фиксируем один раз, а не ищем в DateTimeField на каждое значение
+        self.datetime = serializers.DateTimeField(default_timezone=timezone.get_current_timezone()).to_representation
+        self.file_url = self.get_file_url()
+
+    def get_file_url(self):
+        """
+        Функция имя файла -> абсолютный URL, как request.build_absolute_uri(storage.url(name)).
+        Для файловой системы префикс считается один раз, и URL собирается конкатенацией.
+        """
+        request, storage = self.request, self.storage
+        if request is None:
+            # Вне запроса (выгрузка из команды) ссылки строятся от base_url из контекста, если он задан
+            base_url = self.context.get("base_url")
+            if not base_url:
+                return None
+            return lambda name: base_url.rstrip("/") + "/" + storage.url(name).lstrip("/")
+        if not isinstance(storage, FileSystemStorage):
+            return lambda name: request.build_absolute_uri(storage.url(name))
+        prefix = request.build_absolute_uri(storage.url(""))
+
+        def file_url(name):
+            # Точечные сегменты urljoin нормализует, их оставляем штатному пути
+            if "/." in name or name.startswith("."):
+                return request.build_absolute_uri(storage.url(name))
+            return prefix + filepath_to_uri(name).lstrip("/")
+
+        return file_url
+
+    @classmethod
+    def values(cls, queryset):
+        """Превращает queryset перевалов в строки, которые принимает сериализатор."""
+        return queryset.values(*cls.value_fields)
+
+    @property
+    def data(self):
+        rows = self.instance if self.many else [self.instance]
+        return self._represent(rows, self.load_images([row["id"] for row in rows]))
+
+    async def adata(self):
+        """Асинхронный вариант data: изображения загружаются через async ORM."""
+        rows = self.instance if self.many else [self.instance]
+        return self._represent(rows, await self.aload_images([row["id"] for row in rows]))
+
+    def _represent(self, rows, images):
+        with serializer_timer():
+            result = [self.to_representation(row, images.get(row["id"], [])) for row in rows]
+        return result if self.many else result[0]
+
+    def load_images(self, pereval_ids):
+        """
+        :param pereval_ids: список ID перевалов
+        :return: dict ID перевала -> список изображений в формате ImageSerializer
+        """
+        if not pereval_ids:
+            return {}
+        return self._group_images(self._image_rows(pereval_ids))
+
+    async def aload_images(self, pereval_ids):
+        if not pereval_ids:
+            return {}
+        return self._group_images([row async for row in self._image_rows(pereval_ids)])
+
+    def _image_rows(self, pereval_ids):
+        return Image.objects.filter(pereval_id__in=pereval_ids).order_by("id").values_list(*self.image_fields)
+
+    def _group_images(self, rows):
+        images = {}
+        file_url, datetime = self.file_url, self.datetime
+        for pereval_id, image_id, title, name, variants, date_added in rows:
+            if file_url:
+                image = file_url(name) if name else None
+                variants = {
+                    variant: {extension: file_url(file) for extension, file in files.items()}
+                    for variant, files in variants.items()
+                }
+            else:
+                image, variants = None, {}
+            images.setdefault(pereval_id, []).append(
+                {
+                    "id": image_id,
+                    "title": _text(title),
+                    "image": image,
+                    "variants": variants,
+                    "date_added": datetime(date_added),
+                }
+            )
+        return images
+
+    def to_representation(self, row, images):
+        text = _text
+        parent_id = row["area__parent_id"]
+        return {
+            "id": row["id"],
+            "beauty_title": text(row["beauty_title"]),
+            "title": text(row["title"]),
+            "other_titles": text(row["other_titles"]),
+            "connect": text(row["connect"]),
+            "user": {
+                "email": text(row["user__email"]),
+                "first_name": text(row["user__first_name"]),
+                "last_name": text(row["user__last_name"]),
+                "patronymic": text(row["user__patronymic"]),
+                "phone": text(row["user__phone"]),
+            },
+            "area": {
+                "title": text(row["area__title"]),
+                "parent_id": None if parent_id is None else int(parent_id),
+            },
+            "coords": {
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+                "height": int(row["height"]),
+            },
+            "level": None
+            if row["level__id"] is None
+            else {
+                "winter": text(row["level__winter"]),
+                "summer": text(row["level__summer"]),
+                "autumn": text(row["level__autumn"]),
+                "spring": text(row["level__spring"]),
+            },
+            "images": images,
+            "status": text(row["status"]),
+            "date_added": self.datetime(row["date_added"]),
+        }
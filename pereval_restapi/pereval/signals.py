@@ -0,0 +1,64 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from pereval.cache import detail_cache
+from pereval.models import Area, Blob, Image, Level, Pereval, PerevalChange, User
+
+
+@receiver(post_delete, sender=Image)
+def release_blob(sender, instance, **kwargs):
+    # Файлы с нулевым счетчиком не удаляются сразу: их подбирает сборщик мусора после паузы,
+    # чтобы не потерять файл, который в этот момент повторно загружает другой запрос
+    if instance.blob_id:
+        Blob.objects.filter(id=instance.blob_id, refcount__gt=0).update(refcount=F("refcount") - 1)
+
+
+@receiver(post_save, sender=Pereval)
+@receiver(post_delete, sender=Pereval)
+def invalidate_pereval(sender, instance, **kwargs):
+    detail_cache.invalidate(instance.id)
+
+
+@receiver(post_save, sender=Level)
+@receiver(post_delete, sender=Level)
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_pereval_part(sender, instance, **kwargs):
+    detail_cache.invalidate(instance.pereval_id)
+
+
+def touch_perevals(queryset):
+    queryset.touch()
+    for pereval_id in queryset.values_list("id", flat=True).iterator():
+        detail_cache.invalidate(pereval_id)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_perevals(sender, instance, created, **kwargs):
+    # Данные пользователя и района встроены в ответ каждого их перевала
+    if not created:
+        touch_perevals(Pereval.objects.filter(user=instance))
+
+
+@receiver(post_save, sender=Area)
+def invalidate_area_perevals(sender, instance, created, **kwargs):
+    if not created:
+        touch_perevals(Pereval.objects.filter(area=instance))
+
+
+@receiver(post_save, sender=Pereval)
+def record_pereval_change(sender, instance, created, **kwargs):
+    if created:
+        kind = PerevalChange.CREATED
+    elif instance.status != getattr(instance, "_loaded_status", instance.status):
+        kind = PerevalChange.STATUS
+    else:
+        kind = PerevalChange.UPDATED
+    PerevalChange.record([instance], kind)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Pereval)
+def record_pereval_delete(sender, instance, **kwargs):
+    PerevalChange.record([instance], PerevalChange.DELETED)
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+from django.core.files.storage import FileSystemStorage, storages
+
+BLOB_NAME_RE = re.compile(r"^blobs/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha256>[0-9a-f]{64})(\.[a-z0-9]+)?$")
+EXTENSION_ALIASES = {".jpeg": ".jpg"}
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, в котором имя файла определяется SHA-256 его содержимого:
+    blobs/ab/cd/abcd...ef.jpg. Одинаковые байты хранятся один раз, повторное сохранение
+    не переписывает существующий файл. Запись идет во временный файл в staging_dir
+    и атомарно переименовывается на место.
+    """
+
+    blob_dir = "blobs"
+    staging_dir = "blobs/tmp"
+    # Файлы загрузок по частям живут дольше, чем gc_media ждет временные файлы, поэтому отдельно от staging_dir
+    uploads_dir = "uploads"
+
+    def blob_name(self, sha256, extension=""):
+        """
+        Имя файла по хешу содержимого.
+        :param sha256: hex-строка SHA-256
+        :param extension: расширение исходного файла, например ".jpg"
+        :return: str
+        """
+        extension = extension.lower()
+        extension = EXTENSION_ALIASES.get(extension, extension)
+        return f"{self.blob_dir}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+    def blob_sha256(self, name):
+        """Возвращает SHA-256 из имени файла хранилища или None для прочих имен."""
+        match = BLOB_NAME_RE.match(name or "")
+        return match.group("sha256") if match else None
+
+    def staging_file(self):
+        """
+        Создает пустой временный файл для потоковой записи.
+        :return: tuple (абсолютный путь, открытый на запись файл)
+        """
+        directory = self.path(self.staging_dir)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, uuid.uuid4().hex)
+        return path, open(path, "xb")
+
+    def upload_path(self, session_id):
+        """
+        Путь файла сессии загрузки по частям; каталог создается при необходимости.
+        Готовый файл попадает на место по хешу через staging_copy и adopt.
+        :param session_id: id UploadSession
+        :return: абсолютный путь
+        """
+        directory = self.path(self.uploads_dir)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, str(session_id))
+
+    def staging_copy(self, path):
+        """
+        Копия файла во временном каталоге для adopt: исходный файл остается на месте.
+        Жесткая ссылка, если файловая система позволяет, иначе побайтовая копия.
+        :param path: абсолютный путь исходного файла
+        :return: абсолютный путь копии
+        """
+        directory = self.path(self.staging_dir)
+        os.makedirs(directory, exist_ok=True)
+        copy = os.path.join(directory, uuid.uuid4().hex)
+        try:
+            os.link(path, copy)
+        except OSError:
+            if not os.path.exists(path):
+                raise
+            shutil.copyfile(path, copy)
+        return copy
+
+    def discard_upload(self, session_id):
+        """Удаляет файл сессии загрузки по частям, если он есть."""
+        try:
+            os.remove(self.path(f"{self.uploads_dir}/{session_id}"))
+        except FileNotFoundError:
+            pass
+
+    def adopt(self, temp_path, sha256, extension=""):
+        """
+        Переносит полностью записанный временный файл на место по его хешу.
+        Если такой блоб уже есть, временный файл удаляется.
+        :param temp_path: путь, полученный из staging_file
+        :param sha256: хеш содержимого файла
+        :param extension: расширение исходного файла
+        :return: имя блоба в хранилище
+        """
+        name = self.blob_name(sha256, extension)
+        path = self.path(name)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            # Свежее время изменения защищает переиспользуемый файл от gc_media, пока запись Image не создана
+            os.utime(path)
+            return name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(temp_path, self.file_permissions_mode)
+        # Параллельная запись тех же байтов просто заменит файл идентичным
+        os.replace(temp_path, path)
+        return name
+
+    def _save(self, name, content):
+        temp_path, destination = self.staging_file()
+        sha256 = hashlib.sha256()
+        try:
+            with destination:
+                for chunk in content.chunks():
+                    sha256.update(chunk)
+                    destination.write(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        return self.adopt(temp_path, sha256.hexdigest(), os.path.splitext(name)[1])
+
+    def get_available_name(self, name, max_length=None):
+        # Имя все равно заменяется хешем содержимого, подбирать свободное не нужно
+        return name
+
+
+def get_image_storage():
+    return storages["images"]
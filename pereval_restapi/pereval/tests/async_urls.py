@@ -0,0 +1,19 @@
+"""URLconf тестов асинхронного пути: маршруты pereval.urls с представлениями as_async_view, как под ASGI."""
+
+from django.urls import include, path
+
+from pereval import urls
+from pereval.metrics import metrics_view
+
+
+def as_async(pattern):
+    cls = getattr(pattern.callback, "cls", None)
+    if not hasattr(cls, "as_async_view"):
+        return pattern
+    return path(str(pattern.pattern), cls.as_async_view(**pattern.callback.initkwargs), name=pattern.name)
+
+
+urlpatterns = [
+    path("metrics", metrics_view, name="metrics"),
+    path("api/", include([as_async(pattern) for pattern in urls.urlpatterns])),
+]
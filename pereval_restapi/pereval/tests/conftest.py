@@ -1,4 +1,7 @@
 import pytest
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User as AuthUser
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework.test import APIClient
 
@@ -6,6 +9,12 @@ from pereval.data_manager import PerevalDataManager
 from pereval.models import Area, Image, Level, Pereval, User
 
 
+@pytest.fixture(autouse=True)
+def clear_cache(settings):
+    # id перевалов повторяются между тестами, закэшированные ответы не должны переживать тест
+    caches[settings.PEREVAL_DETAIL_CACHE_ALIAS].clear()
+
+
 @pytest.fixture
 def client():
     return APIClient()
@@ -19,6 +28,13 @@ def test_user(db):
     return user
 
 
+@pytest.fixture
+def moderator(db):
+    user = AuthUser.objects.create_user("moderator", password="moderator")
+    user.user_permissions.add(Permission.objects.get(codename="moderate_pereval"))
+    return user
+
+
 @pytest.fixture
 def test_area(db):
     area = Area.objects.create(title="Тестовый хребет")
@@ -81,3 +97,9 @@ def test_image_file():
 @pytest.fixture
 def data_manager():
     return PerevalDataManager()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
@@ -0,0 +1,73 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from pereval.models import Area, Pereval
+
+
+class TestAreaTree:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, data_manager):
+        self.data_manager = data_manager
+        self.root = data_manager.create_area({"title": "Кавказ"})
+        self.ridge = data_manager.create_area({"title": "Центральный Кавказ", "parent_id": self.root.id})
+        self.massif = data_manager.create_area({"title": "Эльбрус", "parent_id": self.ridge.id})
+        self.other = data_manager.create_area({"title": "Алтай"})
+
+    def test_paths(self):
+        assert self.root.path == Area.path_segment(self.root.id)
+        assert self.massif.path == self.root.path + Area.path_segment(self.ridge.id) + Area.path_segment(self.massif.id)
+        assert Area.objects.get(id=self.massif.id).path == self.massif.path
+
+    def test_move_subtree(self):
+        self.ridge.parent = self.other
+        self.ridge.save()
+        massif = Area.objects.get(id=self.massif.id)
+        assert massif.path.startswith(self.other.path)
+        assert set(Area.objects.filter(Area.subtree_q(self.other.path)).values_list("id", flat=True)) == {
+            self.other.id,
+            self.ridge.id,
+            self.massif.id,
+        }
+
+    def test_cycle_rejected(self):
+        self.root.parent = self.massif
+        with pytest.raises(ValueError, match="собственный подрайон"):
+            self.root.save()
+
+    def test_create_area_unknown_parent(self):
+        with pytest.raises(ValueError, match="Район с parent_id 999 не найден"):
+            self.data_manager.create_area({"title": "Новый", "parent_id": 999})
+
+    def test_list_by_area_includes_descendants(self, client, test_user, django_assert_num_queries):
+        expected = set()
+        for i, area in enumerate([self.root, self.ridge, self.massif, self.massif, self.other]):
+            pereval = Pereval.objects.create(
+                title=f"Перевал {i}", user=test_user, area=area, latitude=43.0, longitude=42.0 + i, height=3000
+            )
+            if area != self.other:
+                expected.add(pereval.id)
+
+        # Район по id, страница перевалов и изображения — независимо от глубины дерева
+        with django_assert_num_queries(3):
+            response = client.get(reverse("submit_data"), {"area": self.ridge.id})
+        assert response.status_code == 200
+        assert {item["id"] for item in response.json()} == expected - {Pereval.objects.get(area=self.root).id}
+
+        response = client.get(reverse("submit_data"), {"area": self.root.id})
+        assert {item["id"] for item in response.json()} == expected
+
+    def test_list_by_unknown_area(self, client):
+        response = client.get(reverse("submit_data"), {"area": 999})
+        assert response.status_code == 404
+        assert response.json() == {"status": 404, "message": "Район не найден"}
+
+    def test_post_with_parent_area(self, client, test_data):
+        test_data["area"] = {"title": "Безенги", "parent_id": self.ridge.id}
+        test_data["pereval"]["images"] = []
+        response = client.post(reverse("submit_data"), {"data": json.dumps(test_data)}, format="multipart")
+        assert response.status_code == 200
+        area = Area.objects.get(title="Безенги")
+        assert area.parent == self.ridge
+        assert area.path.startswith(self.ridge.path)
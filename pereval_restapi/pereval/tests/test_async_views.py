@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.test import AsyncClient
+from django.urls import resolve, reverse
+from drf_yasg import openapi
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+from pereval import metrics
+from pereval.models import Area, Pereval
+
+ASYNC_URLCONF = "pereval.tests.async_urls"
+
+
+class TestAsyncViews:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, settings, media_root, test_pereval, test_image, test_user, moderator):
+        client.force_login(moderator)
+        self.client = client
+        self.settings = settings
+        self.test_pereval = test_pereval
+        self.async_client = AsyncClient()
+        self.async_client.force_login(moderator)
+        child = Area.objects.create(title="Подрайон", parent=test_pereval.area)
+        Pereval.objects.create(
+            title="Эльбрус", user=test_user, area=child, latitude=43.35, longitude=42.44, height=5642, status="pending"
+        )
+
+    def async_get(self, path, **headers):
+        return async_to_sync(self.async_client.get)(path, headers=headers)
+
+    def test_reads_are_served_by_coroutines(self):
+        for name, args in (("submit_data", []), ("submit_data_detail", [1]), ("submit_data_search", [])):
+            assert iscoroutinefunction(resolve(reverse(name, args=args, urlconf=ASYNC_URLCONF), ASYNC_URLCONF).func)
+
+    @pytest.mark.parametrize(
+        "name, params",
+        [
+            ("submit_data", {"user__email": "testuser@email.tld", "page_size": 1}),
+            ("submit_data", lambda pereval: {"area": pereval.area_id}),
+            ("submit_data", {}),
+            ("submit_data_bbox", {"min_lat": 40, "min_lon": 0, "max_lat": 50, "max_lon": 50}),
+            ("submit_data_nearest", {"lat": 43, "lon": 42, "limit": 2}),
+            ("submit_data_changes", {"user__email": "testuser@email.tld", "since": 0}),
+            ("submit_data_search", {"q": "эльбрус"}),
+            ("moderation_queue", {"status": "pending"}),
+            ("moderation_queue", {"cursor": "испорчен"}),
+        ],
+    )
+    def test_same_response_as_sync_view(self, name, params):
+        if callable(params):
+            params = params(self.test_pereval)
+        path = reverse(name)
+        expected = self.client.get(path, params, HTTP_ACCEPT="application/json")
+
+        self.settings.ROOT_URLCONF = ASYNC_URLCONF
+        query = "&".join(f"{key}={value}" for key, value in params.items())
+        response = async_to_sync(self.async_client.get)(f"{path}?{query}")
+        assert response.status_code == expected.status_code
+        assert response.json() == expected.json()
+        assert response.get("Link") == expected.get("Link")
+        assert response.get("ETag") == expected.get("ETag")
+        assert response["Vary"] == expected["Vary"]
+
+    def test_detail_cache_and_conditional_requests(self):
+        self.settings.ROOT_URLCONF = ASYNC_URLCONF
+        path = reverse("submit_data_detail", args=[self.test_pereval.id])
+        first = self.async_get(path)
+        assert first.status_code == 200
+        assert first["X-Cache"] == "MISS"
+        assert first.json()["images"][0]["image"].startswith("http://testserver/media/")
+        second = self.async_get(path)
+        assert second["X-Cache"] == "HIT"
+        assert second.content == first.content
+        assert self.async_get(path, if_none_match=first["ETag"]).status_code == 304
+        missing = self.async_get(reverse("submit_data_detail", args=[10**9]))
+        assert missing.status_code == 404
+        assert missing.json() == {"status": 404, "message": "Перевал не найден", "id": None}
+
+    def test_writes_and_browsable_api_use_sync_view(self, test_data):
+        self.settings.ROOT_URLCONF = ASYNC_URLCONF
+        response = async_to_sync(self.async_client.post)(reverse("submit_data"), {"data": json.dumps(test_data)})
+        assert response.status_code == 400
+        html = self.async_get(f"{reverse('submit_data')}?user__email=testuser@email.tld", accept="text/html")
+        assert html["Content-Type"].startswith("text/html")
+
+    def test_moderation_queue_checks_access(self):
+        self.settings.ROOT_URLCONF = ASYNC_URLCONF
+        anonymous = async_to_sync(AsyncClient().get)(reverse("moderation_queue"))
+        assert anonymous.status_code == 401
+        assert self.async_get(reverse("moderation_queue")).status_code == 200
+
+    def test_metrics_count_async_queries(self, settings, tmp_path):
+        settings.PEREVAL_METRICS_DIR = str(tmp_path)
+        metrics.registry.reset()
+        self.settings.ROOT_URLCONF = ASYNC_URLCONF
+        self.async_get(reverse("submit_data_detail", args=[self.test_pereval.id]))
+        histograms = {
+            (name, tuple(map(tuple, labels))): total
+            for name, labels, _, total, _ in metrics.registry.snapshot()["histograms"]
+        }
+        metrics.registry.reset()
+        labels = (("endpoint", "submit_data_detail"), ("method", "GET"))
+        # SQL async ORM выполняется в другом потоке, но учитывается в метриках запроса
+        assert histograms[("pereval_http_db_queries", labels)] >= 2
+
+    def test_schema_documents_async_views(self):
+        generator = OpenAPISchemaGenerator(
+            openapi.Info(title="Pereval API", default_version="v1"), urlconf=ASYNC_URLCONF
+        )
+        schema = generator.get_schema(public=True)
+        assert {"get", "post"} <= set(schema["paths"]["/submitData/"])
+        assert {"get", "patch"} <= set(schema["paths"]["/submitData/{id}/"])
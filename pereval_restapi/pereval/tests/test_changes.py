@@ -0,0 +1,92 @@
+import pytest
+from django.urls import reverse
+
+from pereval.models import Pereval, PerevalChange
+
+
+class TestPerevalChanges:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, settings, test_data, data_manager):
+        settings.PEREVAL_CHANGES_SETTLE_SECONDS = 0
+        self.client = client
+        self.test_data = test_data
+        self.data_manager = data_manager
+        self.url = reverse("submit_data_changes")
+
+    def get_changes(self, since=0, **params):
+        response = self.client.get(self.url, {"user__email": "testuser@email.tld", "since": since, **params})
+        assert response.status_code == 200
+        return response.json()
+
+    def test_records_create_update_and_status(self, test_pereval):
+        test_pereval.title = "Новое название"
+        test_pereval.save()
+        test_pereval.status = "accepted"
+        test_pereval.save()
+        kinds = list(PerevalChange.objects.order_by("id").values_list("kind", "version"))
+        assert kinds == [("created", 1), ("updated", 2), ("status", 3)]
+
+    def test_status_change_after_reload(self, test_pereval):
+        pereval = Pereval.objects.get(id=test_pereval.id)
+        pereval.status = "pending"
+        pereval.save()
+        assert PerevalChange.objects.order_by("id").last().kind == "status"
+
+    def test_feed_returns_deltas_since_cursor(self, test_pereval):
+        data = self.get_changes()
+        assert data["changes"] == [
+            {
+                "id": test_pereval.id,
+                "change": "created",
+                "status": "new",
+                "version": 1,
+                "changed_at": data["changes"][0]["changed_at"],
+            }
+        ]
+        cursor = data["next"]
+        assert self.get_changes(cursor)["changes"] == []
+
+        test_pereval.status = "accepted"
+        test_pereval.save()
+        data = self.get_changes(cursor)
+        assert [(c["id"], c["change"], c["status"]) for c in data["changes"]] == [
+            (test_pereval.id, "status", "accepted")
+        ]
+        assert data["next"] > cursor
+
+    def test_feed_collapses_changes_per_pereval(self, test_pereval):
+        test_pereval.title = "Новое название"
+        test_pereval.save()
+        data = self.get_changes()
+        assert len(data["changes"]) == 1
+        assert data["changes"][0]["change"] == "created"
+        assert data["changes"][0]["version"] == 2
+
+    def test_feed_pages_by_limit(self, db):
+        items = []
+        for i in range(5):
+            items.append(dict(self.test_data, pereval=dict(self.test_data["pereval"], title=f"Перевал {i}", images=[])))
+        self.data_manager.submit_many(items)
+
+        first = self.get_changes(limit=3)
+        assert len(first["changes"]) == 3
+        assert first["has_more"] is True
+        second = self.get_changes(first["next"], limit=3)
+        assert len(second["changes"]) == 2
+        assert second["has_more"] is False
+
+    def test_feed_records_delete(self, test_pereval):
+        cursor = self.get_changes()["next"]
+        pereval_id = test_pereval.id
+        test_pereval.delete()
+        assert [(c["id"], c["change"]) for c in self.get_changes(cursor)["changes"]] == [(pereval_id, "deleted")]
+
+    def test_feed_skips_unsettled_changes(self, settings, test_pereval):
+        settings.PEREVAL_CHANGES_SETTLE_SECONDS = 60
+        data = self.get_changes()
+        assert data["changes"] == []
+        assert data["next"] == 0
+
+    def test_feed_requires_email(self, db):
+        response = self.client.get(self.url)
+        assert response.status_code == 400
@@ -1,5 +1,10 @@
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
 
+from pereval.data_manager import VersionConflict
 from pereval.models import Area, Image, Level, Pereval, User
 
 
@@ -73,12 +78,61 @@ class TestPerevalDataManager:
         assert pereval.images.count() == 1
         assert pereval.images.first().title == "Новое изображение"
 
+    def test_update_pereval_image_diff(self, test_pereval, test_area, test_image):
+        removed = Image.objects.create(pereval=test_pereval, title="Удаляемое", image=test_image.image.name)
+        new_file = SimpleUploadedFile("new.jpg", b"new_content", content_type="image/jpeg")
+        updated_data = dict(
+            self.test_data["pereval"],
+            images=[{"id": test_image.id, "title": "Новая подпись"}, {"title": "Новое изображение"}],
+        )
+        with CaptureQueriesContext(connection) as captured:
+            self.data_manager.update_pereval(test_pereval.id, updated_data, test_area, [new_file])
+        image_writes = [
+            query["sql"].split()[0]
+            for query in captured.captured_queries
+            if '"pereval_image"' in query["sql"] and not query["sql"].startswith("SELECT")
+        ]
+        assert sorted(image_writes) == ["DELETE", "INSERT", "UPDATE"]
+
+        images = list(test_pereval.images.order_by("id"))
+        assert images[0].id == test_image.id
+        assert [image.title for image in images] == ["Новая подпись", "Новое изображение"]
+        assert images[0].image.name == test_image.image.name
+        assert not Image.objects.filter(id=removed.id).exists()
+
+    def test_update_pereval_unchanged_images_are_not_written(self, test_pereval, test_area, test_image):
+        updated_data = dict(self.test_data["pereval"], images=[{"id": test_image.id, "title": test_image.title}])
+        with CaptureQueriesContext(connection) as captured:
+            self.data_manager.update_pereval(test_pereval.id, updated_data, test_area)
+        assert not [
+            query
+            for query in captured.captured_queries
+            if '"pereval_image"' in query["sql"] and not query["sql"].startswith("SELECT")
+        ]
+        assert test_pereval.images.get().id == test_image.id
+
+    def test_update_pereval_foreign_image(self, test_pereval, test_area, test_image):
+        updated_data = dict(self.test_data["pereval"], images=[{"id": test_image.id + 100}])
+        with pytest.raises(ValueError, match=f"Изображения {test_image.id + 100} не принадлежат перевалу"):
+            self.data_manager.update_pereval(test_pereval.id, updated_data, test_area)
+        assert test_pereval.images.get().id == test_image.id
+
     def test_update_pereval_not_new(self, test_pereval, test_area):
         test_pereval.status = "pending"
         test_pereval.save()
         with pytest.raises(ValueError, match="Редактирование возможно только для статуса 'new'"):
             self.data_manager.update_pereval(test_pereval.id, self.test_data["pereval"], test_area)
 
+    def test_update_pereval_version_conflict(self, test_pereval, test_area):
+        with pytest.raises(VersionConflict):
+            self.data_manager.update_pereval(
+                test_pereval.id, self.test_data["pereval"], test_area, expected_versions={test_pereval.version + 1}
+            )
+        pereval = self.data_manager.update_pereval(
+            test_pereval.id, self.test_data["pereval"], test_area, expected_versions={test_pereval.version}
+        )
+        assert pereval.version == test_pereval.version + 1
+
     def test_create_level(self, test_pereval):
         level_data = {"winter": "1А", "summer": "1Б", "autumn": "1А", "spring": ""}
         Level.objects.filter(pereval=test_pereval).delete()
@@ -106,3 +160,108 @@ class TestPerevalDataManager:
         assert Pereval.objects.count() == 1
         assert Level.objects.count() == 1
         assert Image.objects.count() == 1
+
+    def _bulk_items(self, count):
+        items = []
+        for i in range(count):
+            pereval_data = dict(self.test_data["pereval"], title=f"Перевал {i}", images=[])
+            items.append(
+                {
+                    "user": dict(self.test_data["user"], email=f"user{i % 3}@email.tld"),
+                    "area": self.test_data["area"],
+                    "pereval": pereval_data,
+                }
+            )
+        return items
+
+    @pytest.mark.django_db
+    def test_submit_many(self):
+        results = self.data_manager.submit_many(self._bulk_items(7), batch_size=3)
+        assert len(results) == 7
+        assert all("id" in result for result in results)
+        assert Pereval.objects.count() == 7
+        assert Level.objects.count() == 7
+        assert User.objects.count() == 3
+        assert Area.objects.count() == 1
+        assert Pereval.objects.get(id=results[4]["id"]).title == "Перевал 4"
+
+    def test_submit_many_duplicates(self, test_pereval):
+        items = self._bulk_items(2)
+        items[1]["pereval"]["title"] = "Перевал 0"
+        duplicate = dict(items[0], pereval=dict(self.test_data["pereval"], images=[]))
+        results = self.data_manager.submit_many(items + [duplicate])
+        assert "id" in results[0]
+        assert results[1] == {"error": "Перевал с такими данными уже существует"}
+        assert results[2] == {"error": "Перевал с такими данными уже существует"}
+        assert Pereval.objects.count() == 2
+
+    @pytest.mark.django_db
+    def test_submit_many_missing_parent_area(self):
+        items = self._bulk_items(1)
+        items[0]["area"] = {"title": "Новый район", "parent_id": 999}
+        results = self.data_manager.submit_many(items)
+        assert results == [{"error": "Район с parent_id 999 не найден"}]
+        assert Pereval.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_submit_many_area_created_concurrently(self, monkeypatch):
+        items = self._bulk_items(2)
+        items[1]["area"] = {"title": "Новый район", "parent_id": None}
+        bulk_create = QuerySet.bulk_create
+        competing = []
+
+        def race(queryset, objs, *args, **kwargs):
+            if queryset.model is Area and not competing:
+                # Параллельная транзакция успела создать район после поиска существующих
+                competing.append(Area.objects.create(title=self.test_data["area"]["title"]))
+                competing[0].path = Area.path_segment(competing[0].id)
+                competing[0].save()
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        monkeypatch.setattr(QuerySet, "bulk_create", race)
+        results = self.data_manager.submit_many(items)
+        assert all("id" in result for result in results)
+        assert Area.objects.count() == 2
+        first, second = (Pereval.objects.get(id=result["id"]).area for result in results)
+        assert first == competing[0]
+        assert first.path == Area.path_segment(first.id)
+        assert second.path == Area.path_segment(second.id)
+
+    @pytest.mark.django_db
+    def test_submit_many_query_count(self):
+        # Число запросов зависит от числа пачек, а не от числа перевалов
+        with CaptureQueriesContext(connection) as small:
+            self.data_manager.submit_many(self._bulk_items(4), batch_size=2)
+        User.objects.all().delete()
+        Area.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.data_manager.submit_many(self._bulk_items(60), batch_size=30)
+        assert Pereval.objects.count() == 60
+        assert len(large.captured_queries) == len(small.captured_queries)
+
+    def test_submit_data_statement_count(self, test_user, test_area, test_image_file):
+        # SAVEPOINT, upsert пользователя и SELECT существующего, upsert района и SELECT существующего, перевал,
+        # запись в журнал изменений, уровни, upsert блоба, изображения, RELEASE SAVEPOINT
+        with CaptureQueriesContext(connection) as ctx:
+            pereval = self.data_manager.submit_data(self.test_data, [test_image_file])
+        assert len(ctx.captured_queries) == 11
+        # Существующие пользователь и район не перезаписываются: DO UPDATE только у счетчика блоба
+        updates = [query["sql"] for query in ctx.captured_queries if "DO UPDATE" in query["sql"]]
+        assert len(updates) == 1
+        assert updates[0].startswith('INSERT INTO "pereval_blob"')
+        assert pereval.user == test_user
+        assert pereval.area == test_area
+        assert User.objects.count() == 1
+        assert Area.objects.count() == 1
+
+    @pytest.mark.django_db
+    def test_submit_data_is_atomic(self, monkeypatch):
+        def fail(pereval, level_data):
+            raise ValueError("Сбой при создании уровней")
+
+        monkeypatch.setattr(self.data_manager, "create_level", fail)
+        with pytest.raises(ValueError, match="Сбой при создании уровней"):
+            self.data_manager.submit_data(self.test_data)
+        assert Pereval.objects.count() == 0
+        assert User.objects.count() == 0
+        assert Area.objects.count() == 0
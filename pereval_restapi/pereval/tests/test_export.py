@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Permission
+from django.contrib.auth.models import User as AuthUser
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from pereval import export
+from pereval.models import Area, Level, Pereval
+
+
+class TestExport:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, media_root, test_pereval, test_image, test_user):
+        exporter = AuthUser.objects.create_user("exporter")
+        exporter.user_permissions.add(Permission.objects.get(codename="export_pereval"))
+        client.force_login(exporter)
+        self.client = client
+        self.test_pereval = test_pereval
+        self.caucasus = Area.objects.create(title="Кавказ")
+        self.second = Pereval.objects.create(
+            title="Второй перевал",
+            user=test_user,
+            area=self.caucasus,
+            latitude="43.349912",
+            longitude="42.439138",
+            height=3600,
+        )
+        Level.objects.create(pereval=self.second, summer="2А")
+
+    def export(self, export_format, **params):
+        response = self.client.get(reverse("submit_data_export", args=[export_format]), params)
+        assert response.status_code == 200
+        assert response.streaming
+        return response, b"".join(response.streaming_content).decode()
+
+    def test_ndjson_matches_detail(self):
+        response, body = self.export("ndjson")
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert "X-Export-Next-Since" in response
+        items = [json.loads(line) for line in body.splitlines()]
+        assert [item["id"] for item in items] == [self.test_pereval.id, self.second.id]
+        assert items[0] == self.client.get(reverse("submit_data_detail", args=[self.test_pereval.id])).json()
+
+    def test_csv(self):
+        _, body = self.export("csv")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        assert [row["title"] for row in rows] == ["Тестовый перевал", "Второй перевал"]
+        assert rows[1]["area_title"] == "Кавказ"
+        assert rows[1]["level_summer"] == "2А"
+        assert rows[0]["images"].startswith("http://testserver/media/")
+
+    def test_geojson(self):
+        _, body = self.export("geojson")
+        collection = json.loads(body)
+        assert collection["type"] == "FeatureCollection"
+        feature = collection["features"][1]
+        assert feature["geometry"] == {"type": "Point", "coordinates": [42.439138, 43.349912]}
+        assert feature["properties"]["height"] == 3600
+        assert feature["properties"]["title"] == "Второй перевал"
+
+    def test_since_and_area_filters(self):
+        since = timezone.now() + timedelta(seconds=1)
+        Pereval.objects.filter(id=self.second.id).update(updated_at=since + timedelta(seconds=1))
+        _, body = self.export("ndjson", since=since.isoformat())
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [self.second.id]
+        _, body = self.export("ndjson", area=self.caucasus.id)
+        assert [json.loads(line)["id"] for line in body.splitlines()] == [self.second.id]
+
+    def test_one_images_query_per_chunk(self, django_assert_num_queries):
+        # Строки перевалов читаются одним курсором, изображения — одним запросом на порцию
+        with django_assert_num_queries(2):
+            list(export.stream("ndjson", Pereval.objects.all(), chunk_size=2))
+        with django_assert_num_queries(3):
+            list(export.stream("ndjson", Pereval.objects.all(), chunk_size=1))
+
+    def test_rejects_unknown_format_and_area(self):
+        assert self.client.get(reverse("submit_data_export", args=["xml"])).status_code == 404
+        assert self.client.get(reverse("submit_data_export", args=["csv"]), {"area": 10**9}).status_code == 404
+        assert self.client.get(reverse("submit_data_export", args=["csv"]), {"since": "вчера"}).status_code == 400
+
+    def test_requires_export_permission(self, moderator):
+        url = reverse("submit_data_export", args=["csv"])
+        assert APIClient().get(url).status_code == 401
+
+        # Право модерации не дает доступа к контактам авторов
+        outsider = APIClient()
+        outsider.force_login(moderator)
+        response = outsider.get(url)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Недостаточно прав для выгрузки"
+
+        staff = APIClient()
+        staff.force_login(AuthUser.objects.create_user("staff", is_staff=True))
+        assert staff.get(url).status_code == 200
+
+    def test_command(self, tmp_path, capsys):
+        output = tmp_path / "perevals.geojson"
+        call_command(
+            "export_perevals", "--format", "geojson", "--output", str(output), "--base-url", "https://example.com"
+        )
+        features = json.loads(output.read_text())["features"]
+        assert len(features) == 2
+        assert features[0]["properties"]["images"][0]["image"].startswith("https://example.com/media/")
+        assert "since для следующей выгрузки" in capsys.readouterr().err
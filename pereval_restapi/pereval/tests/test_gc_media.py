@@ -0,0 +1,82 @@
+import os
+import time
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+
+from pereval.models import Blob, Image
+
+
+class TestGcMedia:
+    @pytest.fixture(autouse=True)
+    def setup(self, media_root, data_manager, test_pereval):
+        self.media_root = media_root
+
+        def upload(content):
+            file = SimpleUploadedFile("photo.jpg", content, content_type="image/jpeg")
+            return data_manager.create_images(test_pereval, [{"title": "Фото"}], [file])[0]
+
+        self.kept = upload(b"kept")
+        orphan = upload(b"orphan")
+        self.orphan_name = orphan.image.name
+        orphan.delete()
+
+        self.legacy_kept = "images/2020/01/01/kept.jpg"
+        Image.objects.create(pereval=test_pereval, title="Старое", image=self.legacy_kept)
+        self.files = {
+            "kept": self.kept.image.name,
+            "kept_variant": f"variants/{self.kept.image.name}/thumbnail.webp",
+            "orphan": self.orphan_name,
+            "orphan_variant": f"variants/{self.orphan_name}/thumbnail.webp",
+            "legacy_kept": self.legacy_kept,
+            "legacy_orphan": "images/2020/01/01/orphan.jpg",
+            "staging": "blobs/tmp/0123456789abcdef",
+        }
+        old = time.time() - 7200
+        for name in self.files.values():
+            path = media_root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if not path.exists():
+                path.write_bytes(b"x")
+            os.utime(path, (old, old))
+        # Загрузка в процессе: моложе grace, не удаляется
+        self.recent = media_root / "images/2020/01/02/recent.jpg"
+        self.recent.parent.mkdir(parents=True)
+        self.recent.write_bytes(b"x")
+
+    def exists(self, key):
+        return (self.media_root / self.files[key]).exists()
+
+    def test_dry_run_lists_without_deleting(self, capsys):
+        call_command("gc_media", "--dry-run")
+        output = capsys.readouterr().out
+        for key in ("orphan", "orphan_variant", "legacy_orphan", "staging"):
+            assert self.files[key] in output
+            assert self.exists(key)
+        assert "без ссылок 4" in output
+        assert Blob.objects.filter(name=self.orphan_name).exists()
+
+    def test_deletes_only_unreferenced_files(self, capsys):
+        call_command("gc_media", "--batch-size", "2", "--progress", "3")
+        output = capsys.readouterr().out
+        assert "Просмотрено: файлов 3" in output
+        assert "Готово: файлов 8, без ссылок 4, удалено 4" in output
+        for key in ("kept", "kept_variant", "legacy_kept"):
+            assert self.exists(key)
+        for key in ("orphan", "orphan_variant", "legacy_orphan", "staging"):
+            assert not self.exists(key)
+        assert self.recent.exists()
+        assert not Blob.objects.filter(name=self.orphan_name).exists()
+        assert Blob.objects.filter(name=self.kept.image.name, refcount=1).exists()
+        # Опустевшие каталоги вариантов удалены
+        assert not (self.media_root / self.files["orphan_variant"]).parent.exists()
+
+    def test_keeps_blob_with_live_refcount(self):
+        Blob.objects.filter(name=self.orphan_name).update(refcount=1)
+        call_command("gc_media")
+        assert self.exists("orphan")
+
+    def test_rejects_invalid_options(self):
+        with pytest.raises(CommandError):
+            call_command("gc_media", "--batch-size", "0")
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+from django.urls import reverse
+
+from pereval import geo
+from pereval.models import Pereval
+
+
+class TestGeohash:
+    def test_encode(self):
+        assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+        assert geo.encode(42.6, -5.6, 5) == "ezs42"
+
+    def test_next_prefix(self):
+        assert geo.next_prefix("u4p") == "u4q"
+        assert geo.next_prefix("u4z") == "u5"
+        assert geo.next_prefix("zz") is None
+
+    def test_bbox_prefixes_cover_points(self):
+        rng = random.Random(1)
+        prefixes = geo.bbox_prefixes(43.0, 42.0, 43.5, 43.0)
+        assert 0 < len(prefixes) <= 16
+        for _ in range(200):
+            point = geo.encode(rng.uniform(43.0, 43.5), rng.uniform(42.0, 43.0))
+            assert any(point.startswith(prefix) for prefix in prefixes)
+
+    def test_haversine(self):
+        # Эльбрус — Казбек
+        assert geo.haversine_km(43.3499, 42.4453, 42.6970, 44.5178) == pytest.approx(183.4, abs=1.0)
+
+
+class TestGeoAPI:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, test_user, test_area):
+        self.client = client
+        rng = random.Random(7)
+        self.points = {}
+        for i in range(60):
+            lat, lon = round(rng.uniform(42.0, 44.0), 6), round(rng.uniform(40.0, 46.0), 6)
+            pereval = Pereval.objects.create(
+                title=f"Перевал {i}", user=test_user, area=test_area, latitude=lat, longitude=lon, height=3000
+            )
+            self.points[pereval.id] = (lat, lon)
+
+    def test_geohash_maintained_on_save(self):
+        pereval = Pereval.objects.first()
+        assert pereval.geohash == geo.encode(pereval.latitude, pereval.longitude)
+        pereval.latitude, pereval.longitude = 45.0, 7.0
+        pereval.save()
+        pereval.refresh_from_db()
+        assert pereval.geohash == geo.encode(45.0, 7.0)
+
+    def test_bbox(self):
+        params = {"min_lat": 42.5, "min_lon": 41.0, "max_lat": 43.5, "max_lon": 44.0, "limit": 500}
+        response = self.client.get(reverse("submit_data_bbox"), params)
+        assert response.status_code == 200
+        expected = {pk for pk, (lat, lon) in self.points.items() if 42.5 <= lat <= 43.5 and 41.0 <= lon <= 44.0}
+        assert {item["id"] for item in response.json()} == expected
+
+    def test_bbox_invalid(self):
+        response = self.client.get(reverse("submit_data_bbox"), {"min_lat": 44, "min_lon": 41, "max_lat": 43})
+        assert response.status_code == 400
+        assert "max_lon" in response.json()["message"]
+
+    def test_bbox_antimeridian(self, test_user, test_area):
+        east = Pereval.objects.create(
+            title="Восток", user=test_user, area=test_area, latitude=65.0, longitude=179.5, height=100
+        )
+        west = Pereval.objects.create(
+            title="Запад", user=test_user, area=test_area, latitude=65.0, longitude=-179.5, height=100
+        )
+        params = {"min_lat": 60, "min_lon": 179, "max_lat": 70, "max_lon": -179}
+        response = self.client.get(reverse("submit_data_bbox"), params)
+        assert {item["id"] for item in response.json()} == {east.id, west.id}
+
+    def test_nearest(self):
+        lat, lon = 43.0, 43.0
+        response = self.client.get(reverse("submit_data_nearest"), {"lat": lat, "lon": lon, "limit": 5})
+        assert response.status_code == 200
+        data = response.json()
+        expected = sorted(self.points, key=lambda pk: geo.haversine_km(lat, lon, *self.points[pk]))[:5]
+        assert [item["id"] for item in data] == expected
+        assert data[0]["distance"] <= data[-1]["distance"]
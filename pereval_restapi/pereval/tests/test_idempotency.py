@@ -0,0 +1,123 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.db.models import QuerySet
+from django.urls import reverse
+from django.utils import timezone
+
+from pereval.data_manager import PerevalDataManager
+from pereval.models import IdempotencyKey, Pereval
+
+
+class TestIdempotencyKey:
+    @pytest.fixture(autouse=True)
+    def setup(self, db, client, test_data, test_image_file, media_root):
+        self.client = client
+        self.url = reverse("submit_data")
+        self.payload = {"data": json.dumps(test_data), "images": test_image_file}
+
+    def post(self, key="key-1", payload=None):
+        payload = payload or self.payload
+        for value in payload.values():
+            if hasattr(value, "seek"):
+                value.seek(0)
+        return self.client.post(self.url, payload, format="multipart", headers={"Idempotency-Key": key})
+
+    def test_repeat_returns_first_response_with_one_query(self, django_assert_num_queries):
+        first = self.post()
+        assert first.status_code == 200
+        with django_assert_num_queries(1):
+            repeat = self.post()
+        assert repeat.status_code == 200
+        assert repeat.json() == first.json()
+        assert repeat["Idempotent-Replayed"] == "true"
+        assert Pereval.objects.count() == 1
+
+        other = self.post(key="key-2")
+        assert other.json()["message"] == "Перевал с такими данными уже существует"
+
+    def test_validation_error_is_replayed(self):
+        first = self.post(payload={"data": "{"})
+        assert first.status_code == 400
+        repeat = self.post(payload={"data": "{"})
+        assert repeat.status_code == 400
+        assert repeat.json() == first.json()
+
+    def test_server_error_is_not_stored(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise DatabaseError
+
+        with monkeypatch.context() as patch:
+            patch.setattr(PerevalDataManager, "submit_data", fail)
+            assert self.post().status_code == 500
+        assert not IdempotencyKey.objects.exists()
+        assert self.post().status_code == 200
+
+    def in_flight(self, **changes):
+        """Первый запрос с ключом key-1 выполнен, его запись снова выглядит незавершенной."""
+        assert self.post().status_code == 200
+        IdempotencyKey.objects.update(status_code=None, response=None, **changes)
+
+    def test_duplicate_in_flight_is_short_circuited(self):
+        self.in_flight()
+        response = self.post()
+        assert response.status_code == 409
+        assert response["Retry-After"] == "1"
+        assert Pereval.objects.count() == 1
+
+    def test_abandoned_and_expired_keys_are_reclaimed(self, settings):
+        started = timezone.now() - timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_LOCK_SECONDS + 1)
+        self.in_flight(created_at=started)
+        Pereval.objects.all().delete()
+        assert self.post().status_code == 200
+        assert Pereval.objects.count() == 1
+        assert IdempotencyKey.objects.get(key="key-1").status_code == 200
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_TTL))
+        response = self.post()
+        assert "Idempotent-Replayed" not in response
+        assert response.json()["message"] == "Перевал с такими данными уже существует"
+
+    def test_key_reused_for_other_submission(self, test_data):
+        first = self.post()
+        assert first.status_code == 200
+
+        test_data["pereval"]["title"] = "Другой перевал"
+        other_data = self.post(payload={**self.payload, "data": json.dumps(test_data)})
+        assert other_data.status_code == 422
+        assert other_data.json()["message"] == "Idempotency-Key уже использован для другого запроса"
+
+        other_file = SimpleUploadedFile("test_image.jpg", b"other content", content_type="image/jpeg")
+        assert self.post(payload={**self.payload, "images": other_file}).status_code == 422
+        assert Pereval.objects.count() == 1
+
+        # Порядок ключей и пробелы в data отпечаток не меняют
+        reordered = json.dumps(dict(reversed(json.loads(self.payload["data"]).items())), indent=2)
+        repeat = self.post(payload={**self.payload, "data": reordered})
+        assert repeat["Idempotent-Replayed"] == "true"
+        assert repeat.json() == first.json()
+
+        assert self.post(key="x" * 256).status_code == 400
+
+    def test_concurrent_claim_returns_winning_record(self, monkeypatch, settings):
+        now = timezone.now()
+        IdempotencyKey.objects.create(key="key-1", fingerprint="a" * 64, created_at=now)
+        # Запись появилась между поиском и вставкой
+        monkeypatch.setattr(QuerySet, "first", lambda queryset: None)
+        ttl = timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_TTL)
+        lock_timeout = timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_LOCK_SECONDS)
+        record, claimed = IdempotencyKey.claim("key-1", "b" * 64, now, ttl=ttl, lock_timeout=lock_timeout)
+        assert not claimed
+        assert record.fingerprint == "a" * 64
+
+    def test_expire_command(self, settings, capsys):
+        now = timezone.now()
+        IdempotencyKey.objects.create(key="old", fingerprint="", created_at=now - timedelta(days=2))
+        IdempotencyKey.objects.create(key="new", fingerprint="", created_at=now)
+        call_command("expire_idempotency_keys", "--batch-size", "1")
+        assert "Удалено ключей идемпотентности: 1" in capsys.readouterr().out
+        assert list(IdempotencyKey.objects.values_list("key", flat=True)) == ["new"]
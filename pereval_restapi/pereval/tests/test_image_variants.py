@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from PIL import Image as PILImage
+
+from pereval.image_variants import VARIANT_FORMATS, VARIANT_SIZES, generate_variants, schedule_variants
+from pereval.models import Image
+
+
+@pytest.fixture
+def photo_file():
+    buffer = io.BytesIO()
+    PILImage.new("RGB", (3000, 2000), "steelblue").save(buffer, "JPEG")
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+class TestImageVariants:
+    def test_generate_variants(self, media_root, photo_file):
+        name = default_storage.save("images/photo.jpg", photo_file)
+        variants = generate_variants(name)
+        assert set(variants) == set(VARIANT_SIZES)
+        for variant, files in variants.items():
+            assert set(files) == set(VARIANT_FORMATS)
+            with default_storage.open(files["webp"]) as fh, PILImage.open(fh) as image:
+                assert max(image.size) == VARIANT_SIZES[variant]
+                assert image.format == "WEBP"
+
+    def test_generate_variants_not_an_image(self, media_root):
+        name = default_storage.save("images/broken.jpg", SimpleUploadedFile("broken.jpg", b"file_content"))
+        assert generate_variants(name) == {}
+
+    def test_variants_scheduled_after_commit(
+        self, settings, media_root, data_manager, test_pereval, photo_file, django_capture_on_commit_callbacks
+    ):
+        settings.PEREVAL_IMAGE_VARIANT_WORKERS = 0
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            images = data_manager.create_images(test_pereval, [{"title": "Фото"}], [photo_file])
+            assert Image.objects.get(id=images[0].id).variants == {}
+        assert any(getattr(callback, "func", None) is schedule_variants for callback in callbacks)
+        image = Image.objects.get(id=images[0].id)
+        assert set(image.variants) == set(VARIANT_SIZES)
+
+    def test_variants_in_detail_response(self, client, media_root, test_pereval):
+        Image.objects.create(
+            pereval=test_pereval,
+            title="Фото",
+            image="images/photo.jpg",
+            variants={"thumbnail": {"webp": "variants/images/photo.jpg/thumbnail.webp"}},
+        )
+        response = client.get(reverse("submit_data_detail", args=[test_pereval.id]))
+        assert response.status_code == 200
+        assert response.json()["images"][0]["variants"] == {
+            "thumbnail": {"webp": "http://testserver/media/variants/images/photo.jpg/thumbnail.webp"}
+        }
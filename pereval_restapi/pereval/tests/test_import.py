@@ -0,0 +1,115 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from pereval import importer
+from pereval.data_manager import PerevalDataManager
+from pereval.models import Level, Pereval
+
+CSV_HEADER = "title,latitude,longitude,height,user_email,user_first_name,user_last_name,area_title,level_summer\n"
+
+
+class TestImportPerevals:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path, test_pereval):
+        self.tmp_path = tmp_path
+        self.test_pereval = test_pereval
+
+    def write(self, name, content):
+        path = self.tmp_path / name
+        path.write_text(content, encoding="utf-8")
+        return str(path)
+
+    def test_csv_with_duplicates_and_invalid_rows(self, capsys):
+        path = self.write(
+            "perevals.csv",
+            CSV_HEADER
+            + "Новый,43.1,42.2,3000,club@email.tld,Иван,Иванов,Кавказ,1Б\n"
+            # Уже есть в базе
+            + "Тестовый перевал,45,7,1000,club@email.tld,Иван,Иванов,Кавказ,\n"
+            # Повтор внутри файла
+            + "Новый,43.1,42.2,3000,club@email.tld,Иван,Иванов,Кавказ,1Б\n"
+            + "Ошибка,100,42.2,3000,club@email.tld,Иван,Иванов,Кавказ,\n",
+        )
+        rejects = self.tmp_path / "rejects.ndjson"
+        call_command("import_perevals", path, "--rejects", str(rejects), "--batch-size", "2")
+        assert "записей 4, добавлено 1, отклонено 3" in capsys.readouterr().out
+
+        created = Pereval.objects.get(title="Новый")
+        assert created.area.title == "Кавказ"
+        assert created.user.email == "club@email.tld"
+        assert Level.objects.get(pereval=created).summer == "1Б"
+        rejected = {item["record"]: item["message"] for item in map(json.loads, rejects.read_text().splitlines())}
+        assert rejected.keys() == {2, 3, 4}
+        assert rejected[2] == rejected[3] == "Перевал с такими данными уже существует"
+        assert "coords" in rejected[4]["pereval"]
+
+    def test_geojson_with_flat_properties(self):
+        feature = {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [42.2, 43.1, 3000]},
+            "properties": {
+                "title": "Новый",
+                "user_email": "club@email.tld",
+                "user_first_name": "Иван",
+                "user_last_name": "Иванов",
+                "area_title": "Кавказ",
+            },
+        }
+        line = {**feature, "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}}
+        path = self.write("perevals.geojson", json.dumps({"type": "FeatureCollection", "features": [feature, line]}))
+        call_command("import_perevals", path)
+        created = Pereval.objects.get(title="Новый")
+        assert (float(created.latitude), float(created.longitude), created.height) == (43.1, 42.2, 3000)
+
+    @pytest.mark.parametrize("export_format", ["csv", "geojson", "ndjson"])
+    def test_export_round_trip(self, export_format):
+        path = str(self.tmp_path / f"perevals.{export_format}")
+        call_command("export_perevals", "--format", export_format, "--output", path)
+        Pereval.objects.all().delete()
+        call_command("import_perevals", path)
+        imported = Pereval.objects.get()
+        assert (imported.title, imported.latitude, imported.height) == ("Тестовый перевал", 45, 1000)
+        assert imported.area_id == self.test_pereval.area_id
+        assert Level.objects.get(pereval=imported).summer == "1А"
+
+    def test_geojson_reader_streams_across_blocks(self):
+        features = [{"type": "Feature", "id": index, "properties": {"text": "[],{}" * index}} for index in range(20)]
+        content = json.dumps({"type": "FeatureCollection", "name": "тест", "features": features}, indent=1)
+        assert list(importer.geojson_records(io.StringIO(content), read_size=7)) == features
+
+    def test_broken_ndjson_line_is_rejected(self, capsys):
+        exported = self.tmp_path / "export.ndjson"
+        call_command("export_perevals", "--format", "ndjson", "--output", str(exported))
+        record = json.loads(exported.read_text())
+        lines = [
+            json.dumps({**record, "title": "Первый"}),
+            '{"title": "Оборвано',
+            json.dumps({**record, "title": "Второй"}),
+        ]
+        rejects = self.tmp_path / "rejects.ndjson"
+        call_command("import_perevals", self.write("perevals.ndjson", "\n".join(lines)), "--rejects", str(rejects))
+        assert "записей 3, добавлено 2, отклонено 1" in capsys.readouterr().out
+        assert {"Первый", "Второй"} <= set(Pereval.objects.values_list("title", flat=True))
+        (rejected,) = map(json.loads, rejects.read_text().splitlines())
+        assert rejected["record"] == 2
+        assert "JSONDecodeError" in rejected["message"]
+
+    def test_insert_errors_are_not_format_errors(self, monkeypatch):
+        def fail(*args, **kwargs):
+            raise ValueError("сбой вставки")
+
+        monkeypatch.setattr(PerevalDataManager, "submit_many", fail)
+        path = self.write("perevals.csv", CSV_HEADER + "Новый,43.1,42.2,3000,club@email.tld,Иван,Иванов,Кавказ,1Б\n")
+        with pytest.raises(ValueError, match="сбой вставки"):
+            call_command("import_perevals", path)
+
+    def test_rejects_broken_files(self):
+        with pytest.raises(CommandError, match="нет колонок"):
+            call_command("import_perevals", self.write("bad.csv", "title,latitude\nA,1\n"))
+        with pytest.raises(CommandError, match="после записи"):
+            call_command("import_perevals", self.write("bad.geojson", '{"features": [{"type": "Feature"'))
+        with pytest.raises(CommandError, match="--format"):
+            call_command("import_perevals", self.write("perevals.txt", ""))
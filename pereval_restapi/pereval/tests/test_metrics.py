@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from django.urls import reverse
+
+from pereval import metrics
+
+
+def parse(text):
+    """Строки экспозиции без комментариев: {имя с метками: значение}."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, settings, tmp_path):
+        self.client = client
+        settings.PEREVAL_METRICS_DIR = str(tmp_path)
+        self.directory = tmp_path
+        metrics.registry.reset()
+        yield
+        metrics.registry.reset()
+
+    def scrape(self):
+        response = self.client.get(reverse("metrics"))
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        return parse(response.content.decode())
+
+    def test_records_request_histograms(self, test_pereval):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        self.client.get(url)
+        self.client.get(url)
+        samples = self.scrape()
+        labels = 'endpoint="submit_data_detail",method="GET"'
+        assert samples[f'pereval_http_requests_total{{{labels},status="200"}}'] == 2
+        assert samples[f"pereval_http_request_duration_seconds_count{{{labels}}}"] == 2
+        # Второй ответ из кэша: SQL-запросов нет
+        assert samples[f'pereval_http_db_queries_bucket{{{labels},le="1"}}'] == 1
+        assert samples[f"pereval_http_db_queries_sum{{{labels}}}"] >= 2
+        assert samples[f"pereval_http_serializer_duration_seconds_sum{{{labels}}}"] > 0
+        assert samples[f"pereval_http_response_size_bytes_sum{{{labels}}}"] > 0
+        assert samples['pereval_detail_cache_total{result="hits"}'] >= 1
+
+    def test_records_request_size_and_status(self, db, test_data):
+        # Изображение заявлено, но не загружено: 400
+        self.client.post(reverse("submit_data"), {"data": json.dumps(test_data)}, format="multipart")
+        self.client.get(reverse("submit_data_detail", args=[0]))
+        samples = self.scrape()
+        labels = 'endpoint="submit_data",method="POST"'
+        assert samples[f'pereval_http_requests_total{{{labels},status="400"}}'] == 1
+        assert samples[f"pereval_http_request_size_bytes_sum{{{labels}}}"] > 0
+        assert samples['pereval_http_requests_total{endpoint="submit_data_detail",method="GET",status="404"}'] == 1
+
+    def test_sums_snapshots_of_other_processes(self, test_pereval):
+        self.client.get(reverse("submit_data_detail", args=[test_pereval.id]))
+        metrics.registry.flush(force=True)
+        own = next(self.directory.glob("*.json"))
+        (self.directory / "1-1.json").write_text(own.read_text())
+        (self.directory / "2-2.json").write_text("{не дописан")
+        samples = self.scrape()
+        labels = 'endpoint="submit_data_detail",method="GET"'
+        assert samples[f"pereval_http_request_duration_seconds_count{{{labels}}}"] == 2
+        assert samples[f'pereval_http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+
+    def test_disabled(self, settings, test_pereval):
+        settings.PEREVAL_METRICS_ENABLED = False
+        self.client.get(reverse("submit_data_detail", args=[test_pereval.id]))
+        assert not any(name.startswith("pereval_http_") for name in parse(metrics.render(metrics.registry.collect())))
@@ -0,0 +1,111 @@
+import base64
+
+import pytest
+from django.contrib.auth.models import User as AuthUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from pereval.models import Pereval, PerevalChange
+
+
+class TestModeration:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, test_user, test_area, moderator):
+        client.force_login(moderator)
+        self.client = client
+        self.queue_url = reverse("moderation_queue")
+        self.transition_url = reverse("moderation_transition")
+        self.perevals = [
+            Pereval.objects.create(
+                title=f"Перевал {n}",
+                user=test_user,
+                area=test_area,
+                latitude=43 + n / 100,
+                longitude=42.0,
+                height=3000,
+                status=status,
+            )
+            for n, status in enumerate(["pending", "new", "pending", "accepted", "pending"])
+        ]
+
+    def transition(self, ids, status):
+        response = self.client.post(self.transition_url, {"ids": ids, "status": status}, format="json")
+        assert response.status_code == 200
+        return response.json()["results"]
+
+    def test_queue_is_oldest_first_with_keyset_pages(self):
+        first = self.client.get(self.queue_url, {"page_size": 2})
+        assert first.status_code == 200
+        assert [item["title"] for item in first.json()] == ["Перевал 0", "Перевал 2"]
+        second = self.client.get(first["Link"].split(";")[0].strip("<>"))
+        assert [item["title"] for item in second.json()] == ["Перевал 4"]
+        assert "Link" not in second
+
+    def test_queue_by_status(self):
+        response = self.client.get(self.queue_url, {"status": "new"})
+        assert [item["title"] for item in response.json()] == ["Перевал 1"]
+        assert self.client.get(self.queue_url, {"status": "unknown"}).status_code == 400
+        assert self.client.get(self.queue_url, {"cursor": "%%%"}).status_code == 400
+
+    def test_transitions(self):
+        pending, new, _, accepted, _ = self.perevals
+        results = self.transition([pending.id, new.id, accepted.id, 10**9], "accepted")
+        assert results == [
+            {"id": pending.id, "status": 200, "message": ""},
+            {"id": new.id, "status": 409, "message": "Переход из статуса 'new' в 'accepted' недопустим"},
+            {"id": accepted.id, "status": 409, "message": "Переход из статуса 'accepted' в 'accepted' недопустим"},
+            {"id": 10**9, "status": 404, "message": "Перевал не найден"},
+        ]
+        assert dict(Pereval.objects.values_list("id", "status"))[pending.id] == "accepted"
+        assert Pereval.objects.get(id=new.id).status == "new"
+
+        assert self.transition([new.id], "pending")[0]["status"] == 200
+        assert self.transition([new.id], "rejected")[0]["status"] == 200
+
+    def test_batch_is_one_update(self):
+        ids = [self.perevals[0].id, self.perevals[2].id, self.perevals[4].id]
+        with CaptureQueriesContext(connection) as captured:
+            self.transition(ids, "rejected")
+        updates = [query["sql"] for query in captured.captured_queries if query["sql"].startswith("UPDATE")]
+        assert len(updates) == 1
+        assert set(Pereval.objects.filter(id__in=ids).values_list("status", flat=True)) == {"rejected"}
+
+    def test_bumps_version_and_records_change(self, django_capture_on_commit_callbacks):
+        pereval = self.perevals[0]
+        url = reverse("submit_data_detail", args=[pereval.id])
+        assert self.client.get(url).json()["status"] == "pending"
+        with django_capture_on_commit_callbacks(execute=True):
+            self.transition([pereval.id], "accepted")
+        response = self.client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["status"] == "accepted"
+        assert response["ETag"] == f'"{pereval.id}.{pereval.version + 1}"'
+        change = PerevalChange.objects.filter(pereval_id=pereval.id).order_by("id").last()
+        assert (change.kind, change.status, change.version) == ("status", "accepted", pereval.version + 1)
+
+    def test_rejects_invalid_request(self):
+        response = self.client.post(self.transition_url, {"ids": [], "status": "accepted"}, format="json")
+        assert response.status_code == 400
+        response = self.client.post(self.transition_url, {"ids": [1], "status": "new"}, format="json")
+        assert response.status_code == 400
+        assert "status" in response.json()["message"]
+
+    def test_requires_moderator(self):
+        pereval = self.perevals[0]
+        anonymous = APIClient()
+        assert anonymous.get(self.queue_url).status_code == 401
+        assert anonymous.post(self.transition_url, {"ids": [pereval.id], "status": "accepted"}).status_code == 401
+
+        outsider = APIClient()
+        outsider.force_login(AuthUser.objects.create_user("outsider"))
+        assert outsider.get(self.queue_url).status_code == 403
+        response = outsider.post(self.transition_url, {"ids": [pereval.id], "status": "accepted"}, format="json")
+        assert response.status_code == 403
+        assert Pereval.objects.get(id=pereval.id).status == "pending"
+
+        staff = APIClient()
+        staff.credentials(HTTP_AUTHORIZATION="Basic " + base64.b64encode(b"staff:staff").decode())
+        AuthUser.objects.create_user("staff", password="staff", is_staff=True)
+        assert staff.get(self.queue_url).status_code == 200
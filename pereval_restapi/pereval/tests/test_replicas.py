@@ -0,0 +1,81 @@
+import json
+import time
+
+import pytest
+from django.db import transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from pereval import replicas
+from pereval.models import Area, Level, Pereval, User
+
+
+@pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+class TestReplicaRouting:
+    """База replica не реплицируется: пока строки не скопированы в нее, она изображает отставшую реплику."""
+
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, client, test_data, test_pereval):
+        settings.PEREVAL_READ_REPLICAS = ["replica"]
+        self.client = client
+        self.test_data = test_data
+        self.test_pereval = test_pereval
+        self.url = reverse("submit_data_detail", args=[test_pereval.id])
+
+    def replicate(self, **changes):
+        pereval = Pereval.objects.get(id=self.test_pereval.id)
+        User.objects.using("replica").bulk_create([pereval.user])
+        Area.objects.using("replica").bulk_create([pereval.area])
+        for name, value in changes.items():
+            setattr(pereval, name, value)
+        Pereval.objects.using("replica").bulk_create([pereval])
+        Level.objects.using("replica").bulk_create([pereval.level])
+
+    def test_get_reads_from_replica(self):
+        assert self.client.get(self.url).status_code == 404
+        self.replicate(title="Отставшее название")
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert response.json()["title"] == "Отставшее название"
+        assert replicas.PIN_HEADER not in response
+
+    def test_reads_outside_request_and_in_transaction_use_primary(self):
+        assert replicas.read_alias() == "default"
+        with replicas.read_from("replica"):
+            assert not Pereval.objects.filter(id=self.test_pereval.id).exists()
+            with transaction.atomic():
+                assert Pereval.objects.filter(id=self.test_pereval.id).exists()
+            self.test_pereval.title = "Запись"
+            self.test_pereval.save()
+        assert Pereval.objects.get(id=self.test_pereval.id).title == "Запись"
+
+    def test_write_pins_client_to_primary(self):
+        self.replicate(title="Отставшее название")
+        assert self.client.get(self.url).json()["title"] == "Отставшее название"
+
+        self.test_data["pereval"].update(title="Новое название", images=[])
+        data = {"data": json.dumps(self.test_data)}
+        response = self.client.patch(self.url, data, format="multipart", HTTP_IF_MATCH=self.test_pereval.etag)
+        assert response.status_code == 200
+        until = float(response[replicas.PIN_HEADER])
+        assert time.time() < until <= time.time() + 10
+        assert response.cookies[replicas.PIN_COOKIE].value == response[replicas.PIN_HEADER]
+
+        # Cookie закрепляет клиента, ответ реплики из кэша ему не отдается
+        pinned = self.client.get(self.url)
+        assert pinned.json()["title"] == "Новое название"
+        # Клиент без cookie передает метку заголовком
+        header = {replicas.PIN_HEADER: response[replicas.PIN_HEADER]}
+        assert APIClient().get(self.url, headers=header).json()["title"] == "Новое название"
+        assert APIClient().get(self.url).json()["title"] == "Отставшее название"
+
+    @pytest.mark.parametrize("offset", [-1, 3600])
+    def test_expired_or_forged_pin_is_ignored(self, offset):
+        header = {replicas.PIN_HEADER: str(time.time() + offset)}
+        assert self.client.get(self.url, headers=header).status_code == 404
+
+    def test_failed_write_does_not_pin(self):
+        response = self.client.patch(self.url, {"data": "{}"}, format="multipart")
+        assert response.status_code == 428
+        assert replicas.PIN_HEADER not in response
+        assert replicas.PIN_COOKIE not in response.cookies
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+import yaml
+from django.core.management import call_command
+from django.urls import reverse
+
+from pereval import schema
+
+
+class TestOpenAPISchema:
+    @pytest.fixture(autouse=True)
+    def setup(self, settings, tmp_path, client):
+        settings.PEREVAL_OPENAPI_DIR = tmp_path
+        self.tmp_path = tmp_path
+        self.client = client
+        self.url = reverse("schema-json", kwargs={"schema_format": "json"})
+
+    def test_generate_command_writes_json_and_yaml(self):
+        call_command("generate_openapi")
+        spec = json.loads((self.tmp_path / "openapi.json").read_text())
+        assert spec["info"]["title"] == "Pereval API"
+        assert "/submitData/{id}/" in spec["paths"]
+        assert yaml.safe_load((self.tmp_path / "openapi.yaml").read_text()) == spec
+
+    def test_serves_generated_file_without_drf_yasg(self, monkeypatch):
+        call_command("generate_openapi", "--format", "json")
+        monkeypatch.setattr(schema, "generate", lambda *args, **kwargs: pytest.fail("схема строится на лету"))
+
+        response = self.client.get(self.url)
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/json"
+        assert response.content == (self.tmp_path / "openapi.json").read_bytes()
+        assert response["Cache-Control"] == "public, max-age=86400"
+        etag = response["ETag"]
+
+        not_modified = self.client.get(self.url, headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+
+        # Новая сборка меняет ETag
+        schema.write("json", b'{"swagger": "2.0"}')
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_missing_file_is_generated_only_in_debug(self, settings):
+        response = self.client.get(self.url)
+        assert response.status_code == 503
+        assert "generate_openapi" in response.json()["message"]
+
+        settings.DEBUG = True
+        response = self.client.get(reverse("schema-json", kwargs={"schema_format": "yaml"}))
+        assert response.status_code == 200
+        assert response["Cache-Control"] == "no-cache"
+        assert "/submitData/{id}/" in yaml.safe_load(response.content)["paths"]
+
+    def test_ui_loads_generated_schema(self):
+        response = self.client.get(reverse("schema-swagger-ui"), HTTP_ACCEPT="text/html")
+        assert response.status_code == 200
+        assert self.url in response.content.decode()
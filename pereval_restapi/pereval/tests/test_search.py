@@ -0,0 +1,85 @@
+import pytest
+from django.urls import reverse
+
+from pereval import search
+from pereval.models import Pereval
+
+
+class TestNormalize:
+    def test_transliterates_cyrillic(self):
+        assert search.normalize("Эльбрус Восточный") == "elbrus vostochnyy"
+
+    def test_folds_latin_variants(self):
+        assert search.normalize("Khibiny") == search.normalize("Хибины")
+        assert search.normalize("Dombaj") == search.normalize("Домбай")
+
+    def test_strips_diacritics_and_punctuation(self):
+        assert search.normalize("Col de l'Iséran, 2770") == "col de l iseran 2770"
+
+    def test_empty(self):
+        assert search.normalize(None) == ""
+        assert search.query_tokens("  ,. ") == []
+
+
+class TestPerevalSearch:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, test_user, test_area):
+        self.client = client
+        self.url = reverse("submit_data_search")
+
+        def create(title, latitude, **fields):
+            return Pereval.objects.create(
+                title=title, user=test_user, area=test_area, latitude=latitude, longitude=42.0, height=3000, **fields
+            )
+
+        self.elbrus = create("Эльбрус", 43.1, beauty_title="пер.", other_titles="Elbrus East")
+        self.saddle = create("Седловина Эльбруса", 43.2, connect="Эльбрус — Терскол, ледник")
+        self.kazbek = create("Казбек", 42.7, connect="Гергети")
+
+    def search_titles(self, query, **params):
+        response = self.client.get(self.url, {"q": query, **params})
+        assert response.status_code == 200
+        return [item["title"] for item in response.json()]
+
+    def test_prefix_and_transliteration(self):
+        assert set(self.search_titles("эльбр")) == {"Эльбрус", "Седловина Эльбруса"}
+        assert set(self.search_titles("elbrus")) == {"Эльбрус", "Седловина Эльбруса"}
+        assert self.search_titles("kazb") == ["Казбек"]
+
+    def test_all_words_must_match(self):
+        assert self.search_titles("эльбрус терскол") == ["Седловина Эльбруса"]
+
+    def test_searches_description(self):
+        assert self.search_titles("gergeti") == ["Казбек"]
+
+    def test_ranks_better_matches_first(self):
+        assert self.search_titles("elbrus")[0] == "Эльбрус"
+
+    def test_index_follows_updates_and_deletes(self):
+        self.kazbek.title = "Мкинварцвери"
+        self.kazbek.save()
+        assert self.search_titles("казбек") == []
+        assert self.search_titles("mkinvar") == ["Мкинварцвери"]
+        Pereval.objects.filter(id=self.kazbek.id).delete()
+        assert self.search_titles("mkinvar") == []
+
+    def test_keyset_pagination(self):
+        first = self.client.get(self.url, {"q": "эльбрус", "page_size": 1})
+        assert len(first.json()) == 1
+        next_link = first["Link"].split(";")[0].strip("<>")
+        second = self.client.get(next_link)
+        assert len(second.json()) == 1
+        assert "Link" not in second
+        assert {first.json()[0]["title"], second.json()[0]["title"]} == {"Эльбрус", "Седловина Эльбруса"}
+
+    def test_bulk_inserted_passes_are_indexed(self, data_manager, test_data):
+        item = dict(test_data, pereval=dict(test_data["pereval"], title="Ушба", images=[]))
+        data_manager.submit_many([item])
+        assert self.search_titles("ushba") == ["Ушба"]
+
+    def test_rejects_empty_query(self):
+        assert self.client.get(self.url, {"q": " - "}).status_code == 400
+        assert self.client.get(self.url).status_code == 400
+
+    def test_rejects_invalid_cursor(self):
+        assert self.client.get(self.url, {"q": "elbrus", "cursor": "%%%"}).status_code == 400
@@ -0,0 +1,64 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from pereval.models import Area, Image, Level, Pereval
+from pereval.serializers import PerevalDetailFastSerializer, PerevalDetailSerializer
+
+
+class TestPerevalDetailFastSerializer:
+    @pytest.fixture(autouse=True)
+    def setup(self, test_pereval, test_user):
+        self.request = APIRequestFactory().get("/api/submitData/")
+        self.context = {"request": self.request}
+        Image.objects.create(
+            pereval=test_pereval,
+            title="Фото",
+            image="images/photo.jpg",
+            variants={"thumbnail": {"webp": "variants/images/photo.jpg/thumbnail.webp"}},
+        )
+        Image.objects.create(pereval=test_pereval, title=None, image="images/other.png")
+
+        parent = Area.objects.create(title="Кавказ")
+        child = Area.objects.create(title="Эльбрус", parent=parent)
+        second = Pereval.objects.create(
+            beauty_title=None,
+            title="Второй перевал",
+            other_titles=None,
+            connect=None,
+            user=test_user,
+            area=child,
+            latitude="43.349912",
+            longitude="42.439138",
+            height=3600,
+            status="accepted",
+        )
+        Level.objects.create(pereval=second, winter=None, summer="2А", autumn="", spring=None)
+
+    def render_both(self, queryset, many):
+        expected = PerevalDetailSerializer(
+            list(queryset.with_details()) if many else queryset.with_details().get(),
+            many=many,
+            context=self.context,
+        ).data
+        rows = list(PerevalDetailFastSerializer.values(queryset))
+        actual = PerevalDetailFastSerializer(rows if many else rows[0], many=many, context=self.context).data
+        return JSONRenderer().render(expected), JSONRenderer().render(actual)
+
+    def test_single_matches_detail_serializer(self, test_pereval):
+        expected, actual = self.render_both(Pereval.objects.filter(id=test_pereval.id), many=False)
+        assert actual == expected
+
+    def test_many_matches_detail_serializer(self):
+        expected, actual = self.render_both(Pereval.objects.order_by("id"), many=True)
+        assert actual == expected
+
+    def test_without_request_matches_detail_serializer(self):
+        self.context = {}
+        expected, actual = self.render_both(Pereval.objects.order_by("id"), many=True)
+        assert actual == expected
+
+    def test_many_runs_two_queries(self, django_assert_num_queries):
+        with django_assert_num_queries(2):
+            rows = list(PerevalDetailFastSerializer.values(Pereval.objects.order_by("id")))
+            PerevalDetailFastSerializer(rows, many=True, context=self.context).data
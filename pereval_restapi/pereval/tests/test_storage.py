@@ -0,0 +1,34 @@
+import hashlib
+import os
+import time
+
+from django.core.files.base import ContentFile
+
+from pereval.storage import ContentAddressedStorage
+
+
+class TestContentAddressedStorage:
+    def test_save_by_hash(self, tmp_path):
+        storage = ContentAddressedStorage(location=tmp_path)
+        digest = hashlib.sha256(b"photo").hexdigest()
+        name = storage.save("images/2025/01/01/IMG_0001.JPEG", ContentFile(b"photo"))
+        assert name == f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+        assert storage.blob_sha256(name) == digest
+        assert (tmp_path / name).read_bytes() == b"photo"
+
+    def test_identical_content_not_rewritten(self, tmp_path):
+        storage = ContentAddressedStorage(location=tmp_path)
+        first = storage.save("a.jpg", ContentFile(b"photo"))
+        old = time.time() - 3600
+        os.utime(tmp_path / first, (old, old))
+        inode = (tmp_path / first).stat().st_ino
+        second = storage.save("b.jpg", ContentFile(b"photo"))
+        assert first == second
+        # Файл не заменен, но время изменения обновлено: gc_media не удалит переиспользуемый блоб
+        assert (tmp_path / first).stat().st_ino == inode
+        assert (tmp_path / first).stat().st_mtime > old
+        assert list((tmp_path / "blobs" / "tmp").iterdir()) == []
+
+    def test_blob_sha256_ignores_other_names(self, tmp_path):
+        storage = ContentAddressedStorage(location=tmp_path)
+        assert storage.blob_sha256("images/2025/01/01/photo.jpg") is None
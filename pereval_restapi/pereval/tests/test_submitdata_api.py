@@ -3,7 +3,8 @@ import json
 import pytest
 from django.urls import reverse
 
-from pereval.models import Image, Pereval
+from pereval.cache import detail_cache
+from pereval.models import Image, Level, Pereval
 
 
 class TestSubmitDataAPI:
@@ -40,6 +41,30 @@ class TestSubmitDataAPI:
         assert len(data["images"]) == 1
         assert data["images"][0]["title"] == "Тестовое изображение"
 
+    def test_get_submit_data_by_id_cached(self, test_pereval, test_image, django_assert_num_queries):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        first = self.client.get(url)
+        assert first["X-Cache"] == "MISS"
+        with django_assert_num_queries(0):
+            second = self.client.get(url)
+        assert second["X-Cache"] == "HIT"
+        assert second.content == first.content
+
+    def test_get_submit_data_by_id_invalidated(self, test_pereval, test_image, django_capture_on_commit_callbacks):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        assert self.client.get(url).json()["status"] == "new"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_pereval.status = "pending"
+            test_pereval.save()
+        response = self.client.get(url)
+        assert response["X-Cache"] == "MISS"
+        assert response.json()["status"] == "pending"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            test_image.delete()
+        assert self.client.get(url).json()["images"] == []
+
     def test_patch_submit_data(self, test_pereval, test_image_file):
         url = reverse("submit_data_detail", args=[test_pereval.id])
         updated_data = self.test_data.copy()
@@ -52,26 +77,87 @@ class TestSubmitDataAPI:
             }
         )
         data = {"data": json.dumps(updated_data), "images": test_image_file}
-        response = self.client.patch(url, data, format="multipart")
+        response = self.client.patch(url, data, format="multipart", HTTP_IF_MATCH=test_pereval.etag)
         assert response.status_code == 200
         assert response.json() == {"state": 1, "message": ""}
         pereval = Pereval.objects.get(id=test_pereval.id)
+        assert response["ETag"] == pereval.etag != test_pereval.etag
         assert pereval.title == "Обновленный перевал"
         assert pereval.latitude == 46.0
         assert pereval.level.winter == "1Б"
         assert pereval.images.count() == 1
         assert pereval.images.first().title == "Новое изображение"
 
+    def test_patch_submit_data_updates_image_title_in_place(self, test_pereval, test_image):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        self.test_data["pereval"]["images"] = [{"id": test_image.id, "title": "Исправленная подпись"}]
+        response = self.client.patch(
+            url, {"data": json.dumps(self.test_data)}, format="multipart", HTTP_IF_MATCH=test_pereval.etag
+        )
+        assert response.status_code == 200
+        images = self.client.get(url).json()["images"]
+        assert [(image["id"], image["title"]) for image in images] == [(test_image.id, "Исправленная подпись")]
+
+    def test_patch_submit_data_rejects_extra_files(self, test_pereval, test_image, test_image_file):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        self.test_data["pereval"]["images"] = [{"id": test_image.id}]
+        data = {"data": json.dumps(self.test_data), "images": test_image_file}
+        response = self.client.patch(url, data, format="multipart", HTTP_IF_MATCH=test_pereval.etag)
+        assert response.status_code == 400
+
     def test_patch_submit_data_not_new(self, test_pereval, test_image_file):
         test_pereval.status = "pending"
         test_pereval.save()
         url = reverse("submit_data_detail", args=[test_pereval.id])
         data = {"data": json.dumps(self.test_data), "images": test_image_file}
-        response = self.client.patch(url, data, format="multipart")
+        response = self.client.patch(url, data, format="multipart", HTTP_IF_MATCH=test_pereval.etag)
         assert response.status_code == 400
         assert response.json()["state"] == 0
         assert "Редактирование возможно только для статуса 'new'" in response.json()["message"]
 
+    def test_patch_submit_data_requires_if_match(self, test_pereval):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        response = self.client.patch(url, {"data": json.dumps(self.test_data)}, format="multipart")
+        assert response.status_code == 428
+        assert response.json()["state"] == 0
+
+    def test_patch_submit_data_stale_if_match(self, test_pereval):
+        stale_etag = test_pereval.etag
+        test_pereval.title = "Изменен другим клиентом"
+        test_pereval.save()
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        data = {"data": json.dumps(dict(self.test_data, pereval=dict(self.test_data["pereval"], images=[])))}
+        response = self.client.patch(url, data, format="multipart", HTTP_IF_MATCH=stale_etag)
+        assert response.status_code == 412
+        assert Pereval.objects.get(id=test_pereval.id).title == "Изменен другим клиентом"
+
+    def test_get_submit_data_by_id_not_modified(self, test_pereval, test_image, django_assert_num_queries):
+        url = reverse("submit_data_detail", args=[test_pereval.id])
+        response = self.client.get(url)
+        assert response["ETag"] == test_pereval.etag
+        assert "Last-Modified" in response
+        # Повторный запрос с ETag отвечает 304 прямо из кэша
+        with django_assert_num_queries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=test_pereval.etag)
+        assert response.status_code == 304
+        assert response.content == b""
+
+        detail_cache.cache.clear()
+        with django_assert_num_queries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=test_pereval.etag)
+        assert response.status_code == 304
+
+    def test_get_submit_data_by_email_not_modified(self, test_pereval, test_image):
+        url = reverse("submit_data") + "?user__email=testuser@email.tld"
+        etag = self.client.get(url)["ETag"]
+        assert self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        test_pereval.title = "Новое название"
+        test_pereval.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
     def test_get_submit_data_by_email(self, test_pereval, test_image):
         url = reverse("submit_data") + "?user__email=testuser@email.tld"
         response = self.client.get(url)
@@ -88,3 +174,70 @@ class TestSubmitDataAPI:
         response = self.client.get(url)
         assert response.status_code == 400
         assert response.json() == {"status": 400, "message": "Email обязателен"}
+
+    def test_get_submit_data_by_email_paginated(self, test_user, test_area):
+        for i in range(5):
+            Pereval.objects.create(
+                title=f"Перевал {i}", user=test_user, area=test_area, latitude=45.0, longitude=7.0 + i, height=1000
+            )
+        url = reverse("submit_data") + "?user__email=testuser@email.tld&page_size=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert len(data) <= 2
+            seen.extend(item["id"] for item in data)
+            url = response.headers.get("Link", "").partition(">")[0].lstrip("<") or None
+        expected = list(Pereval.objects.order_by("-date_added", "-id").values_list("id", flat=True))
+        assert seen == expected
+
+    def test_get_submit_data_by_email_invalid_cursor(self, test_pereval):
+        url = reverse("submit_data") + "?user__email=testuser@email.tld&cursor=broken"
+        response = self.client.get(url)
+        assert response.status_code == 400
+        assert response.json() == {"status": 400, "message": "Некорректный курсор"}
+
+    def test_get_submit_data_by_email_query_count(self, test_user, test_area, django_assert_num_queries):
+        for i in range(10):
+            pereval = Pereval.objects.create(
+                title=f"Перевал {i}", user=test_user, area=test_area, latitude=45.0, longitude=7.0 + i, height=1000
+            )
+            Level.objects.create(pereval=pereval, winter="1А")
+            for j in range(3):
+                Image.objects.create(pereval=pereval, title=f"Фото {j}", image=f"images/{i}_{j}.jpg")
+        url = reverse("submit_data") + "?user__email=testuser@email.tld"
+        # Страница перевалов с user/area/level одним запросом и изображения вторым
+        with django_assert_num_queries(2):
+            response = self.client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()) == 10
+        assert all(len(item["images"]) == 3 for item in response.json())
+
+    @pytest.mark.django_db
+    def test_post_submit_data_bulk(self):
+        first = dict(self.test_data, pereval=dict(self.test_data["pereval"], images=[]))
+        second = dict(first, pereval=dict(first["pereval"], title="Второй перевал"))
+        invalid = dict(first, pereval=dict(first["pereval"], title=" "))
+        response = self.client.post(reverse("submit_data_bulk"), [first, second, first, invalid], format="json")
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["status"] for result in results] == [200, 200, 400, 400]
+        assert results[2]["message"] == "Перевал с такими данными уже существует"
+        assert Pereval.objects.count() == 2
+        assert Pereval.objects.get(id=results[1]["id"]).title == "Второй перевал"
+
+    @pytest.mark.django_db
+    def test_post_submit_data_bulk_ndjson(self):
+        item = dict(self.test_data, pereval=dict(self.test_data["pereval"], images=[]))
+        body = "\n".join(json.dumps(dict(item, pereval=dict(item["pereval"], title=f"Перевал {i}"))) for i in range(3))
+        response = self.client.post(reverse("submit_data_bulk"), body, content_type="application/x-ndjson")
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()["results"]] == [200, 200, 200]
+        assert Pereval.objects.count() == 3
+
+    @pytest.mark.django_db
+    def test_post_submit_data_bulk_not_list(self):
+        response = self.client.post(reverse("submit_data_bulk"), self.test_data, format="json")
+        assert response.status_code == 400
+        assert response.json() == {"status": 400, "message": "Ожидается массив объектов"}
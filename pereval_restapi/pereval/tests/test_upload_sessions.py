@@ -0,0 +1,173 @@
+import hashlib
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.urls import reverse
+from django.utils import timezone
+
+from pereval.data_manager import PerevalDataManager
+from pereval.models import Image, Pereval, PerevalChange, UploadSession
+from pereval.storage import ContentAddressedStorage
+from pereval.uploads import write_chunk
+
+CONTENT = bytes(range(256)) * 40
+
+
+class TestUploadSessions:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, test_pereval, media_root, settings):
+        settings.PEREVAL_UPLOAD_CHUNK_MAX_SIZE = 4096
+        self.client = client
+        self.test_pereval = test_pereval
+        self.media_root = media_root
+
+    def create(self, length=len(CONTENT), pereval_id=None, **overrides):
+        data = {"title": "Вид с седловины", "file_name": "photo.JPG", "content_type": "image/jpeg", "length": length}
+        url = reverse("upload_session_create", args=[pereval_id or self.test_pereval.id])
+        return self.client.post(url, {**data, **overrides}, format="json")
+
+    def put(self, location, start, chunk, total=len(CONTENT)):
+        return self.client.generic(
+            "PUT",
+            location,
+            chunk,
+            content_type="application/offset+octet-stream",
+            headers={"Content-Range": f"bytes {start}-{start + len(chunk) - 1}/{total}"},
+        )
+
+    def upload(self, location, chunk_size=4096):
+        for start in range(0, len(CONTENT), chunk_size):
+            response = self.put(location, start, CONTENT[start : start + chunk_size])
+            assert response.status_code == 200
+        return response
+
+    def test_chunked_upload_attaches_image(self, django_capture_on_commit_callbacks):
+        created = self.create()
+        assert created.status_code == 201
+        location = created["Location"]
+        assert created.json()["offset"] == 0
+
+        assert self.upload(location)["Upload-Offset"] == str(len(CONTENT))
+        finalize = reverse("upload_session_finalize", args=[created.json()["id"]])
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(finalize)
+        assert response.status_code == 200
+
+        image = Image.objects.get(id=response.json()["id"])
+        assert image.pereval_id == self.test_pereval.id
+        assert image.title == "Вид с седловины"
+        assert image.image.name.endswith(f"{hashlib.sha256(CONTENT).hexdigest()}.jpg")
+        assert image.image.read() == CONTENT
+        assert image.blob.refcount == 1
+        assert not any((self.media_root / "uploads").iterdir())
+
+        pereval = Pereval.objects.get(id=self.test_pereval.id)
+        assert pereval.version == self.test_pereval.version + 1
+        assert PerevalChange.objects.filter(pereval_id=pereval.id, kind=PerevalChange.UPDATED).exists()
+        detail = self.client.get(reverse("submit_data_detail", args=[pereval.id])).json()
+        assert [item["id"] for item in detail["images"]] == [image.id]
+
+        # Повторное завершение возвращает то же изображение
+        assert self.client.post(finalize).json()["id"] == image.id
+        assert self.put(location, 0, CONTENT[:10]).status_code == 409
+
+    def test_resume_after_interrupted_chunk(self):
+        created = self.create()
+        location = created["Location"]
+        assert self.put(location, 0, CONTENT[:4096]).status_code == 200
+
+        # Обрыв посреди части: принятые байты сохраняются, offset показывает, откуда продолжать
+        session = UploadSession.objects.get()
+        path = self.media_root / "uploads" / str(session.id)
+        received = write_chunk(path, io.BytesIO(CONTENT[4096:5000]), 4096, 4096)
+        assert session.advance(4096, received)
+
+        head = self.client.head(location)
+        assert head["Upload-Offset"] == "5000"
+        conflict = self.put(location, 4096, CONTENT[4096:8192])
+        assert conflict.status_code == 409
+        assert conflict["Upload-Offset"] == "5000"
+
+        assert self.put(location, 5000, CONTENT[5000:9000]).status_code == 200
+        assert self.put(location, 9000, CONTENT[9000:]).status_code == 200
+        response = self.client.post(reverse("upload_session_finalize", args=[session.id]))
+        assert Image.objects.get(id=response.json()["id"]).image.read() == CONTENT
+
+    def test_rejects_invalid_chunks(self):
+        location = self.create()["Location"]
+        assert self.put(location, 0, b"x" * 4097).status_code == 413
+        assert self.put(location, 0, CONTENT[:10], total=1).status_code == 400
+        assert self.put(location, len(CONTENT) - 5, b"x" * 10).status_code == 400
+        response = self.client.generic("PUT", location, b"abc", content_type="application/offset+octet-stream")
+        assert response.status_code == 400
+
+        session_id = UploadSession.objects.get().id
+        response = self.client.post(reverse("upload_session_finalize", args=[session_id]))
+        assert response.status_code == 409
+        assert response.json()["message"] == f"Принято 0 из {len(CONTENT)} байт"
+
+    def test_create_validation(self, settings):
+        assert self.create(content_type="text/plain").status_code == 400
+        assert self.create(length=settings.PEREVAL_UPLOAD_MAX_FILE_SIZE + 1).status_code == 400
+        Pereval.objects.filter(id=self.test_pereval.id).update(status="pending")
+        assert self.create().status_code == 400
+        assert self.create(pereval_id=self.test_pereval.id + 1).status_code == 404
+
+    def test_finalize_requires_new_status(self):
+        created = self.create()
+        self.upload(created["Location"])
+        Pereval.objects.filter(id=self.test_pereval.id).update(status="pending")
+        response = self.client.post(reverse("upload_session_finalize", args=[created.json()["id"]]))
+        assert response.status_code == 400
+        assert not Image.objects.exists()
+
+    def test_failed_finalize_can_be_retried(self, monkeypatch, django_capture_on_commit_callbacks):
+        created = self.create()
+        self.upload(created["Location"])
+        finalize = reverse("upload_session_finalize", args=[created.json()["id"]])
+        staging_copy = ContentAddressedStorage.staging_copy
+
+        def moderated_meanwhile(storage, path):
+            # Статус меняется после проверки до транзакции, но до блокировки перевала
+            Pereval.objects.filter(id=self.test_pereval.id).update(status="pending")
+            return staging_copy(storage, path)
+
+        monkeypatch.setattr(ContentAddressedStorage, "staging_copy", moderated_meanwhile)
+        assert self.client.post(finalize).status_code == 400
+        monkeypatch.undo()
+
+        def fail(*args, **kwargs):
+            raise DatabaseError
+
+        Pereval.objects.filter(id=self.test_pereval.id).update(status="new")
+        monkeypatch.setattr(PerevalDataManager, "create_images", fail)
+        assert self.client.post(finalize).status_code == 500
+        monkeypatch.undo()
+
+        assert not Image.objects.exists()
+        upload = self.media_root / "uploads" / created.json()["id"]
+        assert upload.read_bytes() == CONTENT
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.client.post(finalize)
+        assert response.status_code == 200
+        assert Image.objects.get(id=response.json()["id"]).image.read() == CONTENT
+        assert not upload.exists()
+
+    def test_cancel_and_expire(self, capsys):
+        location = self.create()["Location"]
+        self.put(location, 0, CONTENT[:100])
+        assert self.client.delete(location).status_code == 204
+        assert self.client.get(location).status_code == 404
+        assert not any((self.media_root / "uploads").iterdir())
+
+        old = UploadSession.objects.get(id=self.create().json()["id"])
+        self.put(reverse("upload_session", args=[old.id]), 0, CONTENT[:100])
+        UploadSession.objects.filter(id=old.id).update(created_at=timezone.now() - timedelta(days=2))
+        fresh = self.create().json()["id"]
+        call_command("expire_upload_sessions")
+        assert "Удалено сессий загрузки: 1" in capsys.readouterr().out
+        assert [str(pk) for pk in UploadSession.objects.values_list("id", flat=True)] == [fresh]
+        assert not (self.media_root / "uploads" / str(old.id)).exists()
@@ -0,0 +1,124 @@
+import hashlib
+import json
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.http import UnreadablePostError
+from django.test.client import FakePayload
+from django.urls import reverse
+
+from pereval.models import Blob, Image, Pereval
+from pereval.uploads import StreamingImageUploadHandler
+
+
+class TestStreamingUploads:
+    @pytest.fixture(autouse=True)
+    def setup(self, client, test_data, media_root):
+        self.client = client
+        self.test_data = test_data
+        self.media_root = media_root
+
+    def _stored_files(self):
+        return [path for path in self.media_root.rglob("*") if path.is_file()]
+
+    @pytest.mark.django_db
+    def test_image_stored_once(self):
+        content = b"\xff\xd8\xff" + b"x" * 200_000
+        digest = hashlib.sha256(content).hexdigest()
+        image_file = SimpleUploadedFile("photo.jpg", content, content_type="image/jpeg")
+        response = self.client.post(
+            reverse("submit_data"), {"data": json.dumps(self.test_data), "images": image_file}, format="multipart"
+        )
+        assert response.status_code == 200
+        image = Image.objects.get()
+        assert image.image.name == f"blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg"
+        assert image.blob.sha256 == digest
+        assert (self.media_root / image.image.name).read_bytes() == content
+        assert len(self._stored_files()) == 1
+
+    @pytest.mark.django_db
+    def test_identical_images_stored_once(self):
+        content = b"\xff\xd8\xff" + b"y" * 1000
+        for title in ("Первый", "Второй"):
+            pereval_data = dict(self.test_data["pereval"], title=title)
+            data = json.dumps(dict(self.test_data, pereval=pereval_data))
+            image_file = SimpleUploadedFile("photo.jpg", content, content_type="image/jpeg")
+            response = self.client.post(
+                reverse("submit_data"), {"data": data, "images": image_file}, format="multipart"
+            )
+            assert response.status_code == 200
+        assert Image.objects.count() == 2
+        blob = Blob.objects.get()
+        assert blob.refcount == 2
+        assert len(self._stored_files()) == 1
+
+        Pereval.objects.get(title="Первый").delete()
+        blob.refresh_from_db()
+        assert blob.refcount == 1
+
+    @pytest.mark.django_db
+    def test_oversize_file_rejected(self, settings):
+        settings.PEREVAL_UPLOAD_MAX_FILE_SIZE = 1000
+        image_file = SimpleUploadedFile("photo.jpg", b"x" * 5000, content_type="image/jpeg")
+        response = self.client.post(
+            reverse("submit_data"), {"data": json.dumps(self.test_data), "images": image_file}, format="multipart"
+        )
+        assert response.status_code == 413
+        assert response.json()["status"] == 413
+        assert Pereval.objects.count() == 0
+        assert self._stored_files() == []
+
+    @pytest.mark.django_db
+    def test_oversize_body_rejected(self, settings):
+        settings.PEREVAL_UPLOAD_MAX_BODY_SIZE = 100
+        image_file = SimpleUploadedFile("photo.jpg", b"x" * 500, content_type="image/jpeg")
+        response = self.client.post(
+            reverse("submit_data"), {"data": json.dumps(self.test_data), "images": image_file}, format="multipart"
+        )
+        assert response.status_code == 413
+        assert response.json()["message"] == "Размер запроса превышает 100 байт"
+        assert self._stored_files() == []
+
+    @pytest.mark.django_db
+    def test_unsupported_type_rejected(self):
+        image_file = SimpleUploadedFile("notes.txt", b"text", content_type="text/plain")
+        response = self.client.post(
+            reverse("submit_data"), {"data": json.dumps(self.test_data), "images": image_file}, format="multipart"
+        )
+        assert response.status_code == 415
+        assert response.json()["message"] == "Недопустимый тип файла text/plain"
+        assert Pereval.objects.count() == 0
+
+    @pytest.mark.django_db
+    def test_interrupted_body_leaves_no_temp_file(self, monkeypatch):
+        read = FakePayload.read
+        received = []
+
+        def disconnect(payload, size=-1, /):
+            # Клиент отключается посреди файла
+            if sum(received) > 100_000:
+                raise OSError("Connection reset by peer")
+            chunk = read(payload, size)
+            received.append(len(chunk))
+            return chunk
+
+        monkeypatch.setattr(FakePayload, "read", disconnect)
+        image_file = SimpleUploadedFile("photo.jpg", b"\xff\xd8\xff" + b"x" * 300_000, content_type="image/jpeg")
+        with pytest.raises(UnreadablePostError):
+            self.client.post(
+                reverse("submit_data"), {"data": json.dumps(self.test_data), "images": image_file}, format="multipart"
+            )
+        assert self._stored_files() == []
+
+    def test_sha256_computed(self, rf):
+        handler = StreamingImageUploadHandler(rf.post("/"))
+        handler.handle_raw_input(None, {}, 10, b"boundary")
+        with pytest.raises(StopFutureHandlers):
+            handler.new_file("images", "photo.jpg", "image/jpeg", 6)
+        handler.receive_data_chunk(b"abc", 0)
+        handler.receive_data_chunk(b"def", 3)
+        stored = handler.file_complete(6)
+        assert stored.sha256 == hashlib.sha256(b"abcdef").hexdigest()
+        assert stored.size == 6
+        stored.close()
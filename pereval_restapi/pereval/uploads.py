@@ -0,0 +1,138 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+from django.http import UnreadablePostError
+
+from pereval.storage import ContentAddressedStorage, get_image_storage
+
+
+class UploadRejected(Exception):
+    """Загрузка отклонена до конца чтения тела запроса."""
+
+    def __init__(self, message, status_code=413):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    Файл, который обработчик загрузки уже записал в хранилище.
+    PerevalDataManager привязывает его к Image по имени, без повторного сохранения.
+    """
+
+    def __init__(self, storage, storage_name, name, content_type, size, charset, sha256):
+        super().__init__(
+            file=storage.open(storage_name),
+            name=name,
+            content_type=content_type,
+            size=size,
+            charset=charset,
+        )
+        self.storage_name = storage_name
+        self.sha256 = sha256
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """
+    Обработчик multipart-загрузки изображений поля images.
+    Каждая часть пишется сразу в файл внутри хранилища (без буфера в памяти), по ходу считается
+    SHA-256 и проверяются тип и размер. По завершении файл переименовывается на место по хешу
+    или удаляется, если такой блоб уже есть. Слишком большое тело отклоняется по Content-Length до чтения.
+    """
+
+    field_name = "images"
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.storage = get_image_storage()
+        self.max_file_size = settings.PEREVAL_UPLOAD_MAX_FILE_SIZE
+        self.max_body_size = settings.PEREVAL_UPLOAD_MAX_BODY_SIZE
+        self.allowed_types = settings.PEREVAL_UPLOAD_ALLOWED_TYPES
+        self.active = False
+        self.destination = None
+
+    def handle_raw_input(self, input_data, meta, content_length, boundary, encoding=None):
+        if content_length > self.max_body_size:
+            raise UploadRejected(f"Размер запроса превышает {self.max_body_size} байт")
+        return None
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.active = field_name == self.field_name and isinstance(self.storage, ContentAddressedStorage)
+        if not self.active:
+            return
+
+        if content_type not in self.allowed_types:
+            self.upload_interrupted()
+            raise UploadRejected(f"Недопустимый тип файла {content_type}", status_code=415)
+
+        self.temp_path, self.destination = self.storage.staging_file()
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.size += len(raw_data)
+        if self.size > self.max_file_size:
+            self.upload_interrupted()
+            raise UploadRejected(f"Размер файла {self.file_name} превышает {self.max_file_size} байт")
+        self.sha256.update(raw_data)
+        self.destination.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.destination.close()
+        self.destination = None
+        self.active = False
+        sha256 = self.sha256.hexdigest()
+        storage_name = self.storage.adopt(self.temp_path, sha256, os.path.splitext(self.file_name)[1])
+        return StoredUploadedFile(
+            self.storage,
+            storage_name,
+            self.file_name,
+            self.content_type,
+            self.size,
+            self.charset,
+            sha256,
+        )
+
+    def upload_interrupted(self):
+        # Удаляем только недописанный временный файл: готовые блобы могут разделяться
+        # с другими изображениями, неиспользуемые подберет сборщик мусора
+        if self.destination is not None:
+            self.destination.close()
+            self.destination = None
+            os.remove(self.temp_path)
+        self.active = False
+
+
+def write_chunk(path, stream, start, length, block_size=64 * 1024):
+    """
+    Пишет часть загрузки по частям в файл сессии с позиции start, читая тело запроса блоками.
+    Обрыв соединения не теряет уже принятое: возвращается число записанных байт.
+    :param path: путь файла сессии (создается, если его нет)
+    :param stream: файлоподобный объект тела запроса
+    :param start: позиция первого байта части
+    :param length: ожидаемый размер части
+    :return: int — число записанных байт
+    """
+    received = 0
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o666), "r+b") as file:
+        file.seek(start)
+        while received < length:
+            try:
+                block = stream.read(min(block_size, length - received))
+            except (OSError, UnreadablePostError):
+                break
+            if not block:
+                break
+            file.write(block)
+            received += len(block)
+    return received
@@ -1,8 +1,32 @@
 from django.urls import path
 
-from pereval.views import SubmitDataView
+from pereval.views import (
+    ModerationQueueView,
+    ModerationTransitionView,
+    PerevalBBoxView,
+    PerevalChangesView,
+    PerevalExportView,
+    PerevalNearestView,
+    PerevalSearchView,
+    SubmitDataBulkView,
+    SubmitDataView,
+    UploadSessionCreateView,
+    UploadSessionFinalizeView,
+    UploadSessionView,
+)
 
 urlpatterns = [
     path("submitData/", SubmitDataView.as_view(), name="submit_data"),
+    path("submitData/bulk/", SubmitDataBulkView.as_view(), name="submit_data_bulk"),
+    path("submitData/bbox/", PerevalBBoxView.as_view(), name="submit_data_bbox"),
+    path("submitData/nearest/", PerevalNearestView.as_view(), name="submit_data_nearest"),
+    path("submitData/changes/", PerevalChangesView.as_view(), name="submit_data_changes"),
+    path("submitData/search/", PerevalSearchView.as_view(), name="submit_data_search"),
+    path("submitData/export/<str:export_format>/", PerevalExportView.as_view(), name="submit_data_export"),
+    path("moderation/", ModerationQueueView.as_view(), name="moderation_queue"),
+    path("moderation/transition/", ModerationTransitionView.as_view(), name="moderation_transition"),
     path("submitData/<int:id>/", SubmitDataView.as_view(), name="submit_data_detail"),
+    path("submitData/<int:id>/uploads/", UploadSessionCreateView.as_view(), name="upload_session_create"),
+    path("uploads/<uuid:session_id>/", UploadSessionView.as_view(), name="upload_session"),
+    path("uploads/<uuid:session_id>/finalize/", UploadSessionFinalizeView.as_view(), name="upload_session_finalize"),
 ]
@@ -1,21 +1,266 @@
+import hashlib
 import json
+import re
+from datetime import timedelta
 
-from django.db import DatabaseError
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, parse_etags
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status as http_status
-from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.permissions import AllowAny
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from pereval.data_manager import PerevalDataManager
-from pereval.models import Pereval
-from pereval.serializers import PerevalDetailSerializer, SubmitDataSerializer
+from pereval import export, search
+from pereval.cache import detail_cache
+from pereval.data_manager import PerevalDataManager, VersionConflict
+from pereval.metrics import MetricsJSONRenderer
+from pereval.models import Area, IdempotencyKey, Pereval, PerevalChange, UploadSession, User
+from pereval.pagination import KeysetPagination, RankPagination
+from pereval.parsers import NDJSONParser
+from pereval.permissions import CanExport, CanModerate
+from pereval.serializers import (
+    BBoxQuerySerializer,
+    ChangesQuerySerializer,
+    ExportQuerySerializer,
+    ModerationQueueQuerySerializer,
+    NearestQuerySerializer,
+    PerevalDetailFastSerializer,
+    PerevalDetailSerializer,
+    SearchQuerySerializer,
+    StatusTransitionSerializer,
+    SubmitDataSerializer,
+    UploadSessionSerializer,
+)
+from pereval.storage import get_image_storage
+from pereval.uploads import StreamingImageUploadHandler, UploadRejected, write_chunk
 
+IDEMPOTENCY_HEADER = "Idempotency-Key"
 
-class SubmitDataView(APIView):
+
+def validator_headers(etag, last_modified=None):
+    """
+    Заголовки ETag и Last-Modified ответа.
+    :param etag: ETag в кавычках
+    :param last_modified: время изменения как unix timestamp (опционально)
+    :return: dict
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def conditional_response(request, etag, last_modified=None):
+    """
+    Проверяет If-None-Match / If-Modified-Since до сериализации ответа.
+    :return: ответ 304 (или 412) либо None, если нужно отдать полный ответ
+    """
+    response = HttpResponse(headers=validator_headers(etag, last_modified))
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified, response=response)
+    return None if conditional is response else conditional
+
+
+def parse_if_match(header, pereval_id):
+    """
+    Извлекает версии перевала из заголовка If-Match.
+    :param header: значение заголовка, например "12.3" или *
+    :param pereval_id: ID перевала из URL
+    :return: множество версий или None для * (подходит любая)
+    """
+    etags = parse_etags(header)
+    if etags == ["*"]:
+        return None
+    versions = set()
+    for etag in etags:
+        pk, _, version = etag.strip('"').partition(".")
+        if pk == str(pereval_id) and version.isdigit():
+            versions.add(int(version))
+    return versions
+
+
+def submission_fingerprint(request):
+    """
+    Отпечаток отправки для Idempotency-Key: метод, путь, поле data и SHA-256 каждого файла images.
+    JSON поля data нормализуется, так что порядок ключей и пробелы на отпечаток не влияют.
+    :param request: объект Request с уже разобранным телом
+    :return: str, hex SHA-256
+    """
+    raw = request.data.get("data", "{}")
+    try:
+        data = json.dumps(json.loads(raw), sort_keys=True, ensure_ascii=False)
+    except json.JSONDecodeError:
+        data = raw
+    digest = hashlib.sha256(f"{request.method} {request.path}\n{data}".encode())
+    for upload in request.FILES.getlist("images", []):
+        sha256 = getattr(upload, "sha256", None)
+        if sha256 is None:
+            # Файл принят не потоковым обработчиком (хранилище без адресации по содержимому)
+            sha256 = hashlib.sha256(b"".join(upload.chunks())).hexdigest()
+            upload.seek(0)
+        digest.update(f"\n{sha256}".encode())
+    return digest.hexdigest()
+
+
+def idempotent(request, handler):
+    """
+    Выполняет handler() не более одного раза на значение заголовка Idempotency-Key.
+    Ключ занимается после разбора тела: повтор той же отправки получает сохраненный первый ответ
+    с заголовком Idempotent-Replayed, тот же ключ с другими данными или файлами — 422. Ответы 5xx не сохраняются.
+    :param request: объект Request
+    :param handler: функция без аргументов, возвращающая Response
+    :return: Response
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if key is None:
+        return handler()
+    if not key or len(key) > 255:
+        return Response(
+            {"status": 400, "message": "Некорректный заголовок Idempotency-Key", "id": None},
+            status=http_status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        fingerprint = submission_fingerprint(request)
+    except UploadRejected as e:
+        return Response({"status": e.status_code, "message": str(e), "id": None}, status=e.status_code)
+    record, claimed = IdempotencyKey.claim(
+        key,
+        fingerprint,
+        timezone.now(),
+        ttl=timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_TTL),
+        lock_timeout=timedelta(seconds=settings.PEREVAL_IDEMPOTENCY_LOCK_SECONDS),
+    )
+    if not claimed:
+        if record.fingerprint != fingerprint:
+            return Response(
+                {"status": 422, "message": "Idempotency-Key уже использован для другого запроса", "id": None},
+                status=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record.status_code is None:
+            return Response(
+                {"status": 409, "message": "Запрос с этим Idempotency-Key еще обрабатывается", "id": None},
+                status=http_status.HTTP_409_CONFLICT,
+                headers={"Retry-After": "1"},
+            )
+        return Response(record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+    try:
+        response = handler()
+    except BaseException:
+        record.release()
+        raise
+    if response.status_code >= 500:
+        record.release()
+    else:
+        record.complete(response.status_code, response.data)
+    return response
+
+
+def detail_validators(row):
+    """ETag и Last-Modified перевала по строке PerevalDetailFastSerializer.values()."""
+    return f'"{row["id"]}.{row["version"]}"', int(row["updated_at"].timestamp())
+
+
+def detail_response(cached, cache_status):
+    """Ответ GET /submitData/<id>/ из записи кэша detail_cache."""
+    return HttpResponse(
+        cached["body"],
+        content_type="application/json",
+        headers={**validator_headers(cached["etag"], cached["last_modified"]), "X-Cache": cache_status},
+    )
+
+
+def page_etag(rows, next_cursor):
+    """ETag страницы списка: зависит от состава, версий записей и курсора следующей страницы."""
+    digest = hashlib.sha1(",".join([f"{row['id']}.{row['version']}" for row in rows] + [next_cursor or ""]).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def json_response(data, status=http_status.HTTP_200_OK, headers=None):
+    """JSON-ответ асинхронного обработчика: то же тело, что у Response с MetricsJSONRenderer."""
+    return HttpResponse(
+        MetricsJSONRenderer().render(data), status=status, content_type="application/json", headers=headers
+    )
+
+
+class AsyncGetMixin:
+    """
+    При PEREVAL_ASYNC_VIEWS GET обслуживает асинхронный метод aget прямо в цикле событий ASGI:
+    медленный клиент не занимает поток пула, ORM и кэш вызываются через их async API.
+    Прочие методы и GET браузерного API (Accept: text/html) идут в синхронное представление DRF,
+    которое сервер ASGI выполняет в пуле потоков, как и раньше.
+    Если представление требует аутентификации или прав, они проверяются в пуле потоков до вызова aget;
+    отказ отдает синхронное представление, чтобы ответ 401/403 совпадал с синхронным путем.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        if settings.PEREVAL_ASYNC_VIEWS:
+            return cls.as_async_view(**initkwargs)
+        return super().as_view(**initkwargs)
+
+    @classmethod
+    def as_async_view(cls, **initkwargs):
+        sync_view = sync_to_async(super().as_view(**initkwargs))
+        guarded = bool(cls.authentication_classes) or any(
+            permission is not AllowAny for permission in cls.permission_classes
+        )
+
+        async def view(request, *args, **kwargs):
+            if request.method != "GET" or "text/html" in request.headers.get("Accept", ""):
+                return await sync_view(request, *args, **kwargs)
+            handler = cls(**initkwargs)
+            handler.args, handler.kwargs = args, kwargs
+            if guarded:
+                handler.request = handler.initialize_request(request, *args, **kwargs)
+                try:
+                    await sync_to_async(handler.check_access)(handler.request)
+                except APIException:
+                    return await sync_view(request, *args, **kwargs)
+            else:
+                handler.request = Request(request)
+            response = await handler.aget(handler.request, *args, **kwargs)
+            patch_vary_headers(response, ["Accept"])
+            return response
+
+        # Атрибуты представления DRF: по ним drf_yasg строит схему, а CsrfViewMiddleware пропускает запрос
+        view.cls = cls
+        view.initkwargs = initkwargs
+        view.csrf_exempt = True
+        return view
+
+    def check_access(self, request):
+        self.perform_authentication(request)
+        self.check_permissions(request)
+
+
+class SubmitDataView(AsyncGetMixin, APIView):
     parser_classes = (MultiPartParser, FormParser)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Изображения пишутся в хранилище потоково, минуя буфер в памяти и временные файлы
+        self.upload_handler = StreamingImageUploadHandler(request)
+        request.upload_handlers.insert(0, self.upload_handler)
+        return super().initialize_request(request, *args, **kwargs)
+
+    def handle_exception(self, exc):
+        # Разбор тела оборвался (клиент отключился, испорчен multipart): Django не сообщает об этом
+        # обработчику загрузки, поэтому недописанный временный файл удаляем здесь. Готовые блобы
+        # не трогаем — они могут разделяться с параллельными запросами, неиспользуемые подберет gc_media
+        self.upload_handler.upload_interrupted()
+        return super().handle_exception(exc)
+
     @swagger_auto_schema(
         operation_description="Получить список перевалов по email пользователя или данные перевала по ID.",
         manual_parameters=[
@@ -26,11 +271,43 @@ class SubmitDataView(APIView):
                 type=openapi.TYPE_STRING,
                 required=False,
             ),
+            openapi.Parameter(
+                "area",
+                openapi.IN_QUERY,
+                description="ID района: перевалы этого района и всех его подрайонов",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="Курсор следующей страницы из заголовка Link предыдущего ответа",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                "If-None-Match",
+                openapi.IN_HEADER,
+                description="ETag из предыдущего ответа: если данные не изменились, вернется 304 без тела",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description=f"Размер страницы (по умолчанию {KeysetPagination.default_page_size}, "
+                f"не более {KeysetPagination.max_page_size})",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
         ],
         responses={
             200: openapi.Response(
-                description="Список перевалов или данные перевала", schema=PerevalDetailSerializer(many=True)
+                description="Список перевалов или данные перевала. "
+                'Ссылка на следующую страницу списка передаётся в заголовке Link с rel="next"',
+                schema=PerevalDetailSerializer(many=True),
             ),
+            304: openapi.Response(description="Данные не изменились с версии из If-None-Match"),
             400: openapi.Response(
                 description="Ошибка: Email обязателен",
                 examples={"application/json": {"status": 400, "message": "Email обязателен"}},
@@ -49,9 +326,30 @@ class SubmitDataView(APIView):
         # Обработка GET /submitData/<id>/
         if id is not None:
             try:
-                pereval = Pereval.objects.get(id=id)
-                serializer = PerevalDetailSerializer(pereval, context={"request": request})
-                return Response(serializer.data, status=http_status.HTTP_200_OK)
+                base_url = request.build_absolute_uri("/")
+                cached, generation = detail_cache.get(id, base_url)
+                if cached is None:
+                    row = PerevalDetailFastSerializer.values(Pereval.objects.filter(id=id)).first()
+                    if row is None:
+                        raise Pereval.DoesNotExist
+                    etag, last_modified = detail_validators(row)
+                    not_modified = conditional_response(request, etag, last_modified)
+                    if not_modified is not None:
+                        return not_modified
+                    serializer = PerevalDetailFastSerializer(row, context={"request": request})
+                    cached = {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "body": MetricsJSONRenderer().render(serializer.data),
+                    }
+                    detail_cache.set(id, generation, base_url, cached)
+                    cache_status = "MISS"
+                else:
+                    not_modified = conditional_response(request, cached["etag"], cached["last_modified"])
+                    if not_modified is not None:
+                        return not_modified
+                    cache_status = "HIT"
+                return detail_response(cached, cache_status)
 
             except Pereval.DoesNotExist:
                 return Response(
@@ -63,24 +361,132 @@ class SubmitDataView(APIView):
                     status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
 
-        # Обработка GET /submitData/?user__email=<email>
+        # Обработка GET /submitData/?user__email=<email>&area=<id>
         email = request.query_params.get("user__email")
-        if not email:
+        area_id = request.query_params.get("area")
+        if not email and not area_id:
             return Response({"status": 400, "message": "Email обязателен"}, status=http_status.HTTP_400_BAD_REQUEST)
 
         try:
-            perevals = Pereval.objects.filter(user__email=email)
-            serializer = PerevalDetailSerializer(perevals, many=True, context={"request": request})
-            return Response(serializer.data, status=http_status.HTTP_200_OK)
+            perevals = Pereval.objects.all()
+            if email:
+                perevals = perevals.filter(user__email=email)
+            if area_id:
+                if not area_id.isdigit():
+                    raise ValueError("Некорректный id района")
+                area = Area.objects.filter(id=area_id).first()
+                if area is None:
+                    return Response(
+                        {"status": 404, "message": "Район не найден"}, status=http_status.HTTP_404_NOT_FOUND
+                    )
+                perevals = perevals.in_area(area)
+
+            paginator = KeysetPagination()
+            rows = paginator.paginate_queryset(PerevalDetailFastSerializer.values(perevals), request)
+            etag = page_etag(rows, paginator.next_cursor)
+            not_modified = conditional_response(request, etag)
+            if not_modified is not None:
+                return not_modified
+            serializer = PerevalDetailFastSerializer(rows, many=True, context={"request": request})
+            return Response(
+                serializer.data,
+                status=http_status.HTTP_200_OK,
+                headers={**paginator.get_headers(), **validator_headers(etag)},
+            )
+        except ValueError as e:
+            return Response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response(
                 {"status": 500, "message": f"Ошибка сервера: {str(e)}"},
                 status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    async def aget(self, request, id=None):
+        # Асинхронный вариант get: тот же ответ через async API ORM и кэша
+        if id is not None:
+            try:
+                base_url = request.build_absolute_uri("/")
+                cached, generation = await detail_cache.aget(id, base_url)
+                if cached is None:
+                    row = await PerevalDetailFastSerializer.values(Pereval.objects.filter(id=id)).afirst()
+                    if row is None:
+                        return json_response(
+                            {"status": 404, "message": "Перевал не найден", "id": None},
+                            status=http_status.HTTP_404_NOT_FOUND,
+                        )
+                    etag, last_modified = detail_validators(row)
+                    not_modified = conditional_response(request, etag, last_modified)
+                    if not_modified is not None:
+                        return not_modified
+                    serializer = PerevalDetailFastSerializer(row, context={"request": request})
+                    cached = {
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "body": MetricsJSONRenderer().render(await serializer.adata()),
+                    }
+                    await detail_cache.aset(id, generation, base_url, cached)
+                    cache_status = "MISS"
+                else:
+                    not_modified = conditional_response(request, cached["etag"], cached["last_modified"])
+                    if not_modified is not None:
+                        return not_modified
+                    cache_status = "HIT"
+                return detail_response(cached, cache_status)
+            except Exception as e:
+                return json_response(
+                    {"status": 500, "message": f"Ошибка сервера: {str(e)}", "id": None},
+                    status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        email = request.query_params.get("user__email")
+        area_id = request.query_params.get("area")
+        if not email and not area_id:
+            return json_response(
+                {"status": 400, "message": "Email обязателен"}, status=http_status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            perevals = Pereval.objects.all()
+            if email:
+                perevals = perevals.filter(user__email=email)
+            if area_id:
+                if not area_id.isdigit():
+                    raise ValueError("Некорректный id района")
+                area = await Area.objects.filter(id=area_id).afirst()
+                if area is None:
+                    return json_response(
+                        {"status": 404, "message": "Район не найден"}, status=http_status.HTTP_404_NOT_FOUND
+                    )
+                perevals = perevals.in_area(area)
+
+            paginator = KeysetPagination()
+            rows = await paginator.apaginate_queryset(PerevalDetailFastSerializer.values(perevals), request)
+            etag = page_etag(rows, paginator.next_cursor)
+            not_modified = conditional_response(request, etag)
+            if not_modified is not None:
+                return not_modified
+            serializer = PerevalDetailFastSerializer(rows, many=True, context={"request": request})
+            return json_response(
+                await serializer.adata(), headers={**paginator.get_headers(), **validator_headers(etag)}
+            )
+        except ValueError as e:
+            return json_response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return json_response(
+                {"status": 500, "message": f"Ошибка сервера: {str(e)}"},
+                status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
     @swagger_auto_schema(
         operation_description="Создать новый перевал с данными пользователя, района, координат, уровней сложности и изображений.",
         manual_parameters=[
+            openapi.Parameter(
+                "Idempotency-Key",
+                openapi.IN_HEADER,
+                description="Ключ отправки: повтор с тем же ключом вернет первый ответ без повторной обработки",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
             openapi.Parameter(
                 "data",
                 openapi.IN_FORM,
@@ -102,6 +508,34 @@ class SubmitDataView(APIView):
                 description="Перевал успешно создан",
                 examples={"application/json": {"status": 200, "message": "", "id": 1}},
             ),
+            413: openapi.Response(
+                description="Файл или запрос превышает допустимый размер",
+                examples={"application/json": {"status": 413, "message": "Размер запроса превышает 157286400 байт"}},
+            ),
+            409: openapi.Response(
+                description="Запрос с тем же Idempotency-Key еще обрабатывается; повторите позже",
+                examples={
+                    "application/json": {
+                        "status": 409,
+                        "message": "Запрос с этим Idempotency-Key еще обрабатывается",
+                        "id": None,
+                    }
+                },
+            ),
+            422: openapi.Response(
+                description="Idempotency-Key уже использован для отправки с другими данными или файлами",
+                examples={
+                    "application/json": {
+                        "status": 422,
+                        "message": "Idempotency-Key уже использован для другого запроса",
+                        "id": None,
+                    }
+                },
+            ),
+            415: openapi.Response(
+                description="Недопустимый тип файла изображения",
+                examples={"application/json": {"status": 415, "message": "Недопустимый тип файла text/plain"}},
+            ),
             400: openapi.Response(
                 description="Ошибка валидации или формата данных",
                 examples={
@@ -117,6 +551,9 @@ class SubmitDataView(APIView):
         },
     )
     def post(self, request):
+        return idempotent(request, lambda: self.submit(request))
+
+    def submit(self, request):
         try:
             data = json.loads(request.data.get("data", "{}"))
             serializer = SubmitDataSerializer(data=data)
@@ -142,6 +579,8 @@ class SubmitDataView(APIView):
             pereval = manager.submit_data(serializer.validated_data, image_files)
             return Response({"status": 200, "message": "", "id": pereval.id}, status=http_status.HTTP_200_OK)
 
+        except UploadRejected as e:
+            return Response({"status": e.status_code, "message": str(e), "id": None}, status=e.status_code)
         except json.JSONDecodeError:
             return Response(
                 {"status": 400, "message": "Некорректный формат JSON в поле data", "id": None},
@@ -156,8 +595,19 @@ class SubmitDataView(APIView):
             return Response({"status": 400, "message": str(e), "id": None}, status=http_status.HTTP_400_BAD_REQUEST)
 
     @swagger_auto_schema(
-        operation_description="Обновить существующий перевал (доступно только для статуса 'new').",
+        operation_description="Обновить существующий перевал (доступно только для статуса 'new'). "
+        "Заголовок If-Match должен содержать ETag, полученный при чтении перевала. "
+        "Непустой pereval.images задает итоговый набор изображений: {id, title} сохраняет существующее "
+        "изображение и меняет его подпись, {title} без id добавляет новое из файлов images по порядку, "
+        "не перечисленные изображения удаляются.",
         manual_parameters=[
+            openapi.Parameter(
+                "If-Match",
+                openapi.IN_HEADER,
+                description='ETag перевала, например "12.3"; * — без проверки версии',
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
             openapi.Parameter(
                 "data",
                 openapi.IN_FORM,
@@ -168,9 +618,9 @@ class SubmitDataView(APIView):
             openapi.Parameter(
                 "images",
                 openapi.IN_FORM,
-                description="Файлы изображений (multipart/form-data)",
+                description="Файлы новых изображений — элементов pereval.images без id (multipart/form-data)",
                 type=openapi.TYPE_FILE,
-                required=True,
+                required=False,
             ),
         ],
         consumes=["multipart/form-data"],
@@ -188,6 +638,14 @@ class SubmitDataView(APIView):
                 description="Перевал не найден",
                 examples={"application/json": {"state": 0, "message": "Перевал не найден"}},
             ),
+            412: openapi.Response(
+                description="Перевал изменен после чтения: версия не совпадает с If-Match",
+                examples={"application/json": {"state": 0, "message": "Перевал уже изменен: текущая версия 4"}},
+            ),
+            428: openapi.Response(
+                description="Не передан заголовок If-Match",
+                examples={"application/json": {"state": 0, "message": "Требуется заголовок If-Match с ETag перевала"}},
+            ),
             500: openapi.Response(
                 description="Ошибка сервера",
                 examples={"application/json": {"state": 0, "message": "Неизвестная ошибка"}},
@@ -195,6 +653,14 @@ class SubmitDataView(APIView):
         },
     )
     def patch(self, request, id=None):
+        if_match = request.META.get("HTTP_IF_MATCH")
+        if not if_match:
+            return Response(
+                {"state": 0, "message": "Требуется заголовок If-Match с ETag перевала"},
+                status=http_status.HTTP_428_PRECONDITION_REQUIRED,
+            )
+        expected_versions = parse_if_match(if_match, id)
+
         try:
             data = json.loads(request.data.get("data", "{}"))
             serializer = SubmitDataSerializer(data=data)
@@ -203,13 +669,15 @@ class SubmitDataView(APIView):
 
             image_files = request.FILES.getlist("images", [])
             images_data = serializer.validated_data.get("pereval", {}).get("images", [])
+            # Файлы передаются только для новых изображений — элементов images без id
+            new_images_data = [image for image in images_data if "id" not in image]
 
-            if images_data and not image_files:
+            if new_images_data and not image_files:
                 return Response(
                     {"state": 0, "message": "Файлы изображений не переданы"}, status=http_status.HTTP_400_BAD_REQUEST
                 )
 
-            if images_data and len(image_files) != len(images_data):
+            if len(image_files) != len(new_images_data):
                 return Response(
                     {"state": 0, "message": "Количество загруженных файлов не совпадает с количеством заголовков"},
                     status=http_status.HTTP_400_BAD_REQUEST,
@@ -220,11 +688,23 @@ class SubmitDataView(APIView):
             manager = PerevalDataManager()
             area = manager.create_area(serializer.validated_data["area"])
 
-            manager.update_pereval(
-                pereval_id=id, pereval_data=serializer.validated_data["pereval"], area=area, image_files=image_files
+            pereval = manager.update_pereval(
+                pereval_id=id,
+                pereval_data=serializer.validated_data["pereval"],
+                area=area,
+                image_files=image_files,
+                expected_versions=expected_versions,
+            )
+            return Response(
+                {"state": 1, "message": ""},
+                status=http_status.HTTP_200_OK,
+                headers=validator_headers(pereval.etag, int(pereval.updated_at.timestamp())),
             )
-            return Response({"state": 1, "message": ""}, status=http_status.HTTP_200_OK)
 
+        except VersionConflict as e:
+            return Response({"state": 0, "message": str(e)}, status=http_status.HTTP_412_PRECONDITION_FAILED)
+        except UploadRejected as e:
+            return Response({"state": 0, "message": str(e)}, status=e.status_code)
         except Pereval.DoesNotExist:
             return Response({"state": 0, "message": "Перевал не найден"}, status=http_status.HTTP_404_NOT_FOUND)
         except json.JSONDecodeError:
@@ -238,3 +718,768 @@ class SubmitDataView(APIView):
                 {"state": 0, "message": f"Неизвестная ошибка: {str(e)}"},
                 status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+class SubmitDataBulkView(APIView):
+    parser_classes = (JSONParser, NDJSONParser)
+    max_items = 1000
+
+    @swagger_auto_schema(
+        operation_description="Пакетно создать перевалы. Тело — JSON-массив или NDJSON (application/x-ndjson) "
+        "из объектов того же формата, что поле data в POST /submitData/. Изображения добавляются отдельно.",
+        request_body=openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+        responses={
+            200: openapi.Response(
+                description="Результат по каждому элементу в порядке запроса",
+                examples={
+                    "application/json": {
+                        "status": 200,
+                        "message": "",
+                        "results": [
+                            {"index": 0, "status": 200, "message": "", "id": 1},
+                            {
+                                "index": 1,
+                                "status": 400,
+                                "message": "Перевал с такими данными уже существует",
+                                "id": None,
+                            },
+                        ],
+                    }
+                },
+            ),
+            400: openapi.Response(
+                description="Ошибка формата запроса",
+                examples={"application/json": {"status": 400, "message": "Ожидается массив объектов"}},
+            ),
+            500: openapi.Response(
+                description="Ошибка сервера",
+                examples={"application/json": {"status": 500, "message": "Ошибка подключения к базе данных"}},
+            ),
+        },
+    )
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return Response(
+                {"status": 400, "message": "Ожидается массив объектов"}, status=http_status.HTTP_400_BAD_REQUEST
+            )
+        if len(items) > self.max_items:
+            return Response(
+                {"status": 400, "message": f"Не более {self.max_items} перевалов за один запрос"},
+                status=http_status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(items)
+        valid_indexes = []
+        valid_items = []
+        for index, item in enumerate(items):
+            serializer = SubmitDataSerializer(data=item)
+            if not serializer.is_valid():
+                results[index] = {"index": index, "status": 400, "message": serializer.errors, "id": None}
+            elif serializer.validated_data["pereval"].get("images"):
+                results[index] = {
+                    "index": index,
+                    "status": 400,
+                    "message": "Изображения не поддерживаются в пакетной загрузке",
+                    "id": None,
+                }
+            else:
+                valid_indexes.append(index)
+                valid_items.append(serializer.validated_data)
+
+        try:
+            manager = PerevalDataManager()
+            for index, result in zip(valid_indexes, manager.submit_many(valid_items)):
+                if "id" in result:
+                    results[index] = {"index": index, "status": 200, "message": "", "id": result["id"]}
+                else:
+                    results[index] = {"index": index, "status": 400, "message": result["error"], "id": None}
+        except DatabaseError:
+            return Response(
+                {"status": 500, "message": "Ошибка подключения к базе данных"},
+                status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return Response({"status": 200, "message": "", "results": results}, status=http_status.HTTP_200_OK)
+
+
+class PerevalBBoxView(AsyncGetMixin, APIView):
+    @swagger_auto_schema(
+        operation_description="Перевалы в прямоугольнике карты. Если min_lon > max_lon, "
+        "прямоугольник пересекает антимеридиан.",
+        query_serializer=BBoxQuerySerializer,
+        responses={
+            200: openapi.Response(description="Список перевалов", schema=PerevalDetailSerializer(many=True)),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": {"min_lat": ["Обязательное поле."]}}},
+            ),
+        },
+    )
+    def get(self, request):
+        params = BBoxQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        perevals = Pereval.objects.in_bbox(data["min_lat"], data["min_lon"], data["max_lat"], data["max_lon"])
+        rows = PerevalDetailFastSerializer.values(perevals.order_by("id"))[: data["limit"]]
+        serializer = PerevalDetailFastSerializer(list(rows), many=True, context={"request": request})
+        return Response(serializer.data, status=http_status.HTTP_200_OK)
+
+    async def aget(self, request):
+        params = BBoxQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return json_response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        perevals = Pereval.objects.in_bbox(data["min_lat"], data["min_lon"], data["max_lat"], data["max_lon"])
+        rows = PerevalDetailFastSerializer.values(perevals.order_by("id"))[: data["limit"]]
+        serializer = PerevalDetailFastSerializer([row async for row in rows], many=True, context={"request": request})
+        return json_response(await serializer.adata())
+
+
+class PerevalNearestView(AsyncGetMixin, APIView):
+    @swagger_auto_schema(
+        operation_description="Ближайшие к точке перевалы с расстоянием в километрах (поле distance).",
+        query_serializer=NearestQuerySerializer,
+        responses={
+            200: openapi.Response(description="Список перевалов, ближайшие первыми"),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": {"lat": ["Обязательное поле."]}}},
+            ),
+        },
+    )
+    def get(self, request):
+        params = NearestQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        ranked = Pereval.objects.nearest(data["lat"], data["lon"], data["limit"])
+        rows = PerevalDetailFastSerializer.values(Pereval.objects.filter(id__in=[pk for _, pk in ranked]))
+        rows = {row["id"]: row for row in rows}
+        serializer = PerevalDetailFastSerializer(
+            [rows[pk] for _, pk in ranked], many=True, context={"request": request}
+        )
+        results = serializer.data
+        for item, (distance, _) in zip(results, ranked):
+            item["distance"] = round(distance, 3)
+        return Response(results, status=http_status.HTTP_200_OK)
+
+    async def aget(self, request):
+        params = NearestQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return json_response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        ranked = await sync_to_async(Pereval.objects.nearest)(data["lat"], data["lon"], data["limit"])
+        rows = PerevalDetailFastSerializer.values(Pereval.objects.filter(id__in=[pk for _, pk in ranked]))
+        rows = {row["id"]: row async for row in rows}
+        serializer = PerevalDetailFastSerializer(
+            [rows[pk] for _, pk in ranked], many=True, context={"request": request}
+        )
+        results = await serializer.adata()
+        for item, (distance, _) in zip(results, ranked):
+            item["distance"] = round(distance, 3)
+        return json_response(results)
+
+
+class PerevalChangesView(AsyncGetMixin, APIView):
+    @swagger_auto_schema(
+        operation_description="Изменения перевалов пользователя после курсора since: созданные, измененные, "
+        "сменившие статус и удаленные. Для каждого перевала отдается последнее состояние; полные данные "
+        "берутся из GET /submitData/<id>/. Первая синхронизация — since=0, далее — значение next из ответа.",
+        query_serializer=ChangesQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="Изменения и курсор для следующего запроса",
+                examples={
+                    "application/json": {
+                        "changes": [
+                            {
+                                "id": 12,
+                                "change": "status",
+                                "status": "accepted",
+                                "version": 3,
+                                "changed_at": "2025-06-01T12:00:00+03:00",
+                            }
+                        ],
+                        "next": 120,
+                        "has_more": False,
+                    }
+                },
+            ),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": {"user__email": ["Обязательное поле."]}}},
+            ),
+        },
+    )
+    def get(self, request):
+        params = ChangesQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        user_id = User.objects.filter(email=data["user__email"]).values_list("id", flat=True).first()
+        if user_id is None:
+            return Response({"changes": [], "next": data["since"], "has_more": False}, status=http_status.HTTP_200_OK)
+
+        settled_before = timezone.now() - timedelta(seconds=settings.PEREVAL_CHANGES_SETTLE_SECONDS)
+        changes, next_cursor, has_more = PerevalChange.feed(user_id, data["since"], data["limit"], settled_before)
+        return Response(
+            {"changes": changes, "next": next_cursor, "has_more": has_more},
+            status=http_status.HTTP_200_OK,
+        )
+
+    async def aget(self, request):
+        params = ChangesQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return json_response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        data = params.validated_data
+
+        user_id = await User.objects.filter(email=data["user__email"]).values_list("id", flat=True).afirst()
+        if user_id is None:
+            return json_response({"changes": [], "next": data["since"], "has_more": False})
+
+        settled_before = timezone.now() - timedelta(seconds=settings.PEREVAL_CHANGES_SETTLE_SECONDS)
+        changes, next_cursor, has_more = await sync_to_async(PerevalChange.feed)(
+            user_id, data["since"], data["limit"], settled_before
+        )
+        return json_response({"changes": changes, "next": next_cursor, "has_more": has_more})
+
+
+class PerevalSearchView(AsyncGetMixin, APIView):
+    @swagger_auto_schema(
+        operation_description="Полнотекстовый поиск по title, beauty_title, other_titles и connect. "
+        "Каждое слово запроса ищется как префикс, кириллица и латиница взаимозаменяемы (эльбрус = elbrus). "
+        'Результаты упорядочены по релевантности; ссылка на следующую страницу — в заголовке Link с rel="next".',
+        query_serializer=SearchQuerySerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="Курсор следующей страницы из заголовка Link предыдущего ответа",
+                type=openapi.TYPE_STRING,
+                required=False,
+            ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description=f"Размер страницы (по умолчанию {RankPagination.default_page_size}, "
+                f"не более {RankPagination.max_page_size})",
+                type=openapi.TYPE_INTEGER,
+                required=False,
+            ),
+        ],
+        responses={
+            200: openapi.Response(description="Найденные перевалы", schema=PerevalDetailSerializer(many=True)),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": {"q": ["Обязательное поле."]}}},
+            ),
+        },
+    )
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        query = params.validated_data["q"]
+
+        paginator = RankPagination()
+        try:
+            ranked = paginator.paginate_ranked(lambda limit, after: search.search(query, limit, after), request)
+        except ValueError as e:
+            return Response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        rows = PerevalDetailFastSerializer.values(Pereval.objects.filter(id__in=[pk for _, pk in ranked]))
+        rows = {row["id"]: row for row in rows}
+        serializer = PerevalDetailFastSerializer(
+            [rows[pk] for _, pk in ranked if pk in rows], many=True, context={"request": request}
+        )
+        return Response(serializer.data, status=http_status.HTTP_200_OK, headers=paginator.get_headers())
+
+    async def aget(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return json_response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        query = params.validated_data["q"]
+
+        paginator = RankPagination()
+        fetch = sync_to_async(lambda limit, after: search.search(query, limit, after))
+        try:
+            ranked = await paginator.apaginate_ranked(fetch, request)
+        except ValueError as e:
+            return json_response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        rows = PerevalDetailFastSerializer.values(Pereval.objects.filter(id__in=[pk for _, pk in ranked]))
+        rows = {row["id"]: row async for row in rows}
+        serializer = PerevalDetailFastSerializer(
+            [rows[pk] for _, pk in ranked if pk in rows], many=True, context={"request": request}
+        )
+        return json_response(await serializer.adata(), headers=paginator.get_headers())
+
+
+MODERATION_ACCESS_RESPONSES = {
+    401: openapi.Response(
+        description="Не выполнен вход",
+        examples={"application/json": {"detail": "Учетные данные не были предоставлены."}},
+    ),
+    403: openapi.Response(
+        description="Нет права pereval.moderate_pereval",
+        examples={"application/json": {"detail": "Недостаточно прав для модерации"}},
+    ),
+}
+
+
+class ModerationQueueView(AsyncGetMixin, APIView):
+    authentication_classes = (BasicAuthentication, SessionAuthentication)
+    permission_classes = (CanModerate,)
+
+    @swagger_auto_schema(
+        operation_description="Очередь модерации: перевалы со статусом status (по умолчанию pending) "
+        'от старых к новым. Ссылка на следующую страницу — в заголовке Link с rel="next".',
+        query_serializer=ModerationQueueQuerySerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                "cursor",
+                openapi.IN_QUERY,
+                description="Курсор следующей страницы из заголовка Link",
+                type=openapi.TYPE_STRING,
+            ),
+            openapi.Parameter(
+                "page_size",
+                openapi.IN_QUERY,
+                description="Размер страницы (по умолчанию 50, не более 200)",
+                type=openapi.TYPE_INTEGER,
+            ),
+        ],
+        responses={
+            200: openapi.Response(description="Страница очереди", schema=PerevalDetailSerializer(many=True)),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": "Некорректный курсор"}},
+            ),
+            **MODERATION_ACCESS_RESPONSES,
+        },
+    )
+    def get(self, request):
+        params = ModerationQueueQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination(descending=False)
+        try:
+            rows = paginator.paginate_queryset(
+                PerevalDetailFastSerializer.values(Pereval.objects.filter(status=params.validated_data["status"])),
+                request,
+            )
+        except ValueError as e:
+            return Response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+        serializer = PerevalDetailFastSerializer(rows, many=True, context={"request": request})
+        return Response(serializer.data, status=http_status.HTTP_200_OK, headers=paginator.get_headers())
+
+    async def aget(self, request):
+        params = ModerationQueueQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return json_response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        paginator = KeysetPagination(descending=False)
+        try:
+            rows = await paginator.apaginate_queryset(
+                PerevalDetailFastSerializer.values(Pereval.objects.filter(status=params.validated_data["status"])),
+                request,
+            )
+        except ValueError as e:
+            return json_response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+        serializer = PerevalDetailFastSerializer(rows, many=True, context={"request": request})
+        return json_response(await serializer.adata(), headers=paginator.get_headers())
+
+
+class ModerationTransitionView(APIView):
+    authentication_classes = (BasicAuthentication, SessionAuthentication)
+    permission_classes = (CanModerate,)
+
+    @swagger_auto_schema(
+        operation_description="Пакетная смена статуса модерации. Допустимые переходы: new → pending, "
+        "pending → accepted или rejected. Все допустимые перевалы пакета обновляются одним запросом, "
+        "результат — по каждому id.",
+        request_body=StatusTransitionSerializer,
+        responses={
+            200: openapi.Response(
+                description="Результат по каждому id в порядке запроса",
+                examples={
+                    "application/json": {
+                        "status": 200,
+                        "message": "",
+                        "results": [
+                            {"id": 1, "status": 200, "message": ""},
+                            {"id": 2, "status": 409, "message": "Переход из статуса 'new' в 'accepted' недопустим"},
+                            {"id": 3, "status": 404, "message": "Перевал не найден"},
+                        ],
+                    }
+                },
+            ),
+            400: openapi.Response(
+                description="Ошибка валидации",
+                examples={
+                    "application/json": {
+                        "status": 400,
+                        "message": {"status": ["Значения new нет среди допустимых вариантов."]},
+                    }
+                },
+            ),
+            500: openapi.Response(
+                description="Ошибка сервера",
+                examples={"application/json": {"status": 500, "message": "Ошибка подключения к базе данных"}},
+            ),
+            **MODERATION_ACCESS_RESPONSES,
+        },
+    )
+    def post(self, request):
+        serializer = StatusTransitionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"status": 400, "message": serializer.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+
+        try:
+            transitions = PerevalDataManager().transition_status(
+                serializer.validated_data["ids"], serializer.validated_data["status"]
+            )
+        except DatabaseError:
+            return Response(
+                {"status": 500, "message": "Ошибка подключения к базе данных"},
+                status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        results = []
+        for result in transitions:
+            if "error" not in result:
+                results.append({"id": result["id"], "status": 200, "message": ""})
+            else:
+                code = 404 if result["previous"] is None else 409
+                results.append({"id": result["id"], "status": code, "message": result["error"]})
+        return Response({"status": 200, "message": "", "results": results}, status=http_status.HTTP_200_OK)
+
+
+EXPORT_ACCESS_RESPONSES = {
+    401: MODERATION_ACCESS_RESPONSES[401],
+    403: openapi.Response(
+        description="Нет права pereval.export_pereval",
+        examples={"application/json": {"detail": "Недостаточно прав для выгрузки"}},
+    ),
+}
+
+
+class PerevalExportView(APIView):
+    # Выгрузка содержит email и телефоны всех авторов
+    authentication_classes = (BasicAuthentication, SessionAuthentication)
+    permission_classes = (CanExport,)
+
+    @swagger_auto_schema(
+        operation_description="Потоковая выгрузка всех перевалов: ndjson (объекты как в GET /submitData/<id>/), "
+        "csv или geojson. Память сервера не зависит от объема выгрузки. Для инкрементальной выгрузки передайте "
+        "since — значение заголовка X-Export-Next-Since предыдущего ответа. Удаленные перевалы — "
+        "в GET /submitData/changes/. Доступна сотрудникам и пользователям с правом pereval.export_pereval.",
+        query_serializer=ExportQuerySerializer,
+        manual_parameters=[
+            openapi.Parameter(
+                "export_format",
+                openapi.IN_PATH,
+                description="Формат выгрузки",
+                type=openapi.TYPE_STRING,
+                enum=list(export.FORMATS),
+            ),
+        ],
+        responses={
+            200: openapi.Response(description="Файл выгрузки"),
+            400: openapi.Response(
+                description="Ошибка валидации параметров",
+                examples={"application/json": {"status": 400, "message": {"since": ["Неправильный формат datetime."]}}},
+            ),
+            404: openapi.Response(
+                description="Неизвестный формат или район",
+                examples={"application/json": {"status": 404, "message": "Район не найден"}},
+            ),
+            **EXPORT_ACCESS_RESPONSES,
+        },
+    )
+    def get(self, request, export_format):
+        if export_format not in export.FORMATS:
+            return Response(
+                {"status": 404, "message": f"Неизвестный формат выгрузки '{export_format}'"},
+                status=http_status.HTTP_404_NOT_FOUND,
+            )
+        params = ExportQuerySerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response({"status": 400, "message": params.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        area = None
+        if "area" in params.validated_data:
+            area = Area.objects.filter(id=params.validated_data["area"]).first()
+            if area is None:
+                return Response({"status": 404, "message": "Район не найден"}, status=http_status.HTTP_404_NOT_FOUND)
+
+        next_since = export.next_since()
+        queryset = export.export_queryset(params.validated_data.get("since"), area)
+        content_type, extension = export.FORMATS[export_format]
+        return StreamingHttpResponse(
+            export.stream(export_format, queryset, context={"request": request}),
+            content_type=content_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="perevals.{extension}"',
+                "X-Export-Next-Since": next_since.isoformat(),
+            },
+        )
+
+
+UPLOAD_SESSION_EXAMPLE = {
+    "status": 200,
+    "message": "",
+    "id": "4f0c5c1e-8a42-4c1e-9d0f-2a6b8e3f9b10",
+    "offset": 4194304,
+    "length": 10485760,
+}
+
+
+def upload_response(session, status=200, message=""):
+    """Ответ о состоянии загрузки по частям: offset в теле и в заголовке Upload-Offset."""
+    return Response(
+        {
+            "status": status,
+            "message": message,
+            "id": str(session.id),
+            "offset": session.offset,
+            "length": session.length,
+        },
+        status=status,
+        headers={
+            "Upload-Offset": str(session.offset),
+            "Upload-Length": str(session.length),
+            "Cache-Control": "no-store",
+        },
+    )
+
+
+def get_upload_session(session_id):
+    # Offset читается с основной базы: на реплике он может отставать от уже принятых частей
+    return UploadSession.objects.using(DEFAULT_DB_ALIAS).filter(pk=session_id).first()
+
+
+def upload_not_found():
+    return Response({"status": 404, "message": "Сессия загрузки не найдена"}, status=http_status.HTTP_404_NOT_FOUND)
+
+
+class UploadSessionCreateView(APIView):
+    parser_classes = (JSONParser,)
+
+    @swagger_auto_schema(
+        operation_description="Начать загрузку изображения перевала по частям (в духе протокола tus). "
+        "Дальше части отправляются PUT /uploads/<id>/ с Content-Range, принятый объем — GET /uploads/<id>/, "
+        "после последней части POST /uploads/<id>/finalize/ добавляет изображение к перевалу. "
+        "Доступно только для статуса 'new'.",
+        request_body=UploadSessionSerializer,
+        responses={
+            201: openapi.Response(
+                description="Сессия создана; адрес для частей — в заголовке Location",
+                examples={"application/json": {**UPLOAD_SESSION_EXAMPLE, "status": 201, "offset": 0}},
+            ),
+            400: openapi.Response(
+                description="Ошибка валидации или статус перевала не 'new'",
+                examples={"application/json": {"status": 400, "message": {"length": ["Размер файла превышает"]}}},
+            ),
+            404: openapi.Response(
+                description="Перевал не найден",
+                examples={"application/json": {"status": 404, "message": "Перевал не найден"}},
+            ),
+        },
+    )
+    def post(self, request, id):
+        serializer = UploadSessionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({"status": 400, "message": serializer.errors}, status=http_status.HTTP_400_BAD_REQUEST)
+        pereval = Pereval.objects.filter(id=id).only("status").first()
+        if pereval is None:
+            return Response({"status": 404, "message": "Перевал не найден"}, status=http_status.HTTP_404_NOT_FOUND)
+        if pereval.status != "new":
+            return Response(
+                {"status": 400, "message": "Добавлять изображения можно только к перевалу в статусе 'new'"},
+                status=http_status.HTTP_400_BAD_REQUEST,
+            )
+
+        session = UploadSession.objects.create(pereval=pereval, **serializer.validated_data)
+        response = upload_response(session, status=http_status.HTTP_201_CREATED)
+        response["Location"] = reverse("upload_session", args=[session.id])
+        return response
+
+
+class UploadSessionView(APIView):
+    content_range_re = re.compile(r"^bytes (\d+)-(\d+)/(\d+|\*)$")
+
+    @swagger_auto_schema(
+        operation_description="Сколько байт загрузки уже принято: с этой позиции клиент продолжает после обрыва. "
+        "HEAD возвращает то же в заголовках Upload-Offset и Upload-Length.",
+        responses={
+            200: openapi.Response(
+                description="Состояние загрузки", examples={"application/json": UPLOAD_SESSION_EXAMPLE}
+            ),
+            404: openapi.Response(
+                description="Сессия не найдена или истекла",
+                examples={"application/json": {"status": 404, "message": "Сессия загрузки не найдена"}},
+            ),
+        },
+    )
+    def get(self, request, session_id):
+        session = get_upload_session(session_id)
+        if session is None:
+            return upload_not_found()
+        return upload_response(session)
+
+    @swagger_auto_schema(
+        operation_description="Отправить часть файла. Заголовок Content-Range: bytes <начало>-<конец>/<размер>; "
+        "начало должно совпадать с принятым offset, размер части — не больше PEREVAL_UPLOAD_CHUNK_MAX_SIZE. "
+        "При обрыве соединения принятые байты сохраняются.",
+        manual_parameters=[
+            openapi.Parameter(
+                "Content-Range",
+                openapi.IN_HEADER,
+                description="Диапазон части, например bytes 0-4194303/10485760",
+                type=openapi.TYPE_STRING,
+                required=True,
+            ),
+        ],
+        request_body=openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BINARY),
+        responses={
+            200: openapi.Response(description="Часть принята", examples={"application/json": UPLOAD_SESSION_EXAMPLE}),
+            400: openapi.Response(
+                description="Некорректный Content-Range или часть получена не полностью",
+                examples={
+                    "application/json": {
+                        **UPLOAD_SESSION_EXAMPLE,
+                        "status": 400,
+                        "message": "Некорректный заголовок Content-Range",
+                    }
+                },
+            ),
+            409: openapi.Response(
+                description="Начало части не совпадает с offset или загрузка уже завершена",
+                examples={
+                    "application/json": {
+                        **UPLOAD_SESSION_EXAMPLE,
+                        "status": 409,
+                        "message": "Ожидается часть с позиции 4194304",
+                    }
+                },
+            ),
+            413: openapi.Response(description="Часть больше PEREVAL_UPLOAD_CHUNK_MAX_SIZE"),
+        },
+    )
+    def put(self, request, session_id):
+        session = get_upload_session(session_id)
+        if session is None:
+            return upload_not_found()
+        if session.image_id is not None:
+            return upload_response(session, http_status.HTTP_409_CONFLICT, "Загрузка уже завершена")
+
+        match = self.content_range_re.match(request.headers.get("Content-Range", ""))
+        start, end = (int(match.group(1)), int(match.group(2))) if match else (0, -1)
+        size = end - start + 1
+        total = match.group(3) if match else None
+        if match is None or size <= 0 or end >= session.length or total not in ("*", str(session.length)):
+            return upload_response(session, http_status.HTTP_400_BAD_REQUEST, "Некорректный заголовок Content-Range")
+        if size > settings.PEREVAL_UPLOAD_CHUNK_MAX_SIZE:
+            return upload_response(
+                session,
+                http_status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                f"Размер части превышает {settings.PEREVAL_UPLOAD_CHUNK_MAX_SIZE} байт",
+            )
+        content_length = request.headers.get("Content-Length")
+        if content_length is not None and content_length != str(size):
+            return upload_response(
+                session, http_status.HTTP_400_BAD_REQUEST, "Content-Length не совпадает с Content-Range"
+            )
+        if start != session.offset:
+            return upload_response(
+                session, http_status.HTTP_409_CONFLICT, f"Ожидается часть с позиции {session.offset}"
+            )
+
+        path = get_image_storage().upload_path(session.id)
+        received = write_chunk(path, request, start, size)
+        if not session.advance(start, received):
+            session = get_upload_session(session_id)
+            return upload_response(session, http_status.HTTP_409_CONFLICT, "Часть уже принята параллельным запросом")
+        if received < size:
+            return upload_response(
+                session, http_status.HTTP_400_BAD_REQUEST, f"Часть получена не полностью: {received} из {size} байт"
+            )
+        return upload_response(session)
+
+    @swagger_auto_schema(
+        operation_description="Отменить загрузку и удалить принятые части.",
+        responses={204: openapi.Response(description="Загрузка отменена")},
+    )
+    def delete(self, request, session_id):
+        session = get_upload_session(session_id)
+        if session is None:
+            return upload_not_found()
+        session.discard()
+        return Response(status=http_status.HTTP_204_NO_CONTENT)
+
+
+class UploadSessionFinalizeView(APIView):
+    @swagger_auto_schema(
+        operation_description="Завершить загрузку по частям: собранный файл добавляется к перевалу как изображение "
+        "с подписью из сессии. Повторный вызов возвращает то же изображение.",
+        responses={
+            200: openapi.Response(
+                description="Изображение добавлено",
+                examples={"application/json": {"status": 200, "message": "", "id": 15}},
+            ),
+            400: openapi.Response(
+                description="Статус перевала уже не 'new'",
+                examples={
+                    "application/json": {
+                        "status": 400,
+                        "message": "Добавлять изображения можно только к перевалу в статусе 'new'",
+                    }
+                },
+            ),
+            409: openapi.Response(
+                description="Файл принят не полностью",
+                examples={
+                    "application/json": {
+                        **UPLOAD_SESSION_EXAMPLE,
+                        "status": 409,
+                        "message": "Принято 4194304 из 10485760 байт",
+                    }
+                },
+            ),
+        },
+    )
+    def post(self, request, session_id):
+        session = get_upload_session(session_id)
+        if session is None:
+            return upload_not_found()
+        if session.image_id is None and session.offset < session.length:
+            return upload_response(
+                session, http_status.HTTP_409_CONFLICT, f"Принято {session.offset} из {session.length} байт"
+            )
+
+        try:
+            if session.image_id is None:
+                PerevalDataManager().attach_upload(session)
+        except FileNotFoundError:
+            # Параллельный запрос уже завершил сессию и удалил ее файл: его результат и отдаем
+            session = get_upload_session(session_id)
+            if session is None or session.image_id is None:
+                return Response(
+                    {"status": 409, "message": "Загрузка уже завершается"}, status=http_status.HTTP_409_CONFLICT
+                )
+        except ValueError as e:
+            return Response({"status": 400, "message": str(e)}, status=http_status.HTTP_400_BAD_REQUEST)
+        except DatabaseError:
+            return Response(
+                {"status": 500, "message": "Ошибка подключения к базе данных"},
+                status=http_status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response({"status": 200, "message": "", "id": session.image_id}, status=http_status.HTTP_200_OK)
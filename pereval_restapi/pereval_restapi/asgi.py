@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pereval_restapi.settings")
+# GET обслуживается асинхронными обработчиками в цикле событий, без пула потоков
+os.environ.setdefault("PEREVAL_ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
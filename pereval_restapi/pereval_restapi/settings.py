@@ -27,6 +27,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "pereval.metrics.MetricsMiddleware",
+    "pereval.replicas.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -67,11 +69,31 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: хосты через запятую, база и учетные данные — как у основной
+PEREVAL_READ_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv("FSTR_DB_REPLICA_HOSTS", "").split(",")), start=1):
+    alias = f"replica_{number}"
+    DATABASES[alias] = {**DATABASES["default"], "HOST": host.strip(), "TEST": {"MIRROR": "default"}}
+    PEREVAL_READ_REPLICAS.append(alias)
+
 if "test" in sys.argv or "pytest" in sys.modules:
-    DATABASES["default"] = {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": ":memory:",
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        },
+        # Отдельная база без репликации; тесты маршрутизации включают ее через PEREVAL_READ_REPLICAS
+        "replica": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": ":memory:",
+        },
     }
+    PEREVAL_READ_REPLICAS = []
+
+DATABASE_ROUTERS = ["pereval.replicas.PrimaryReplicaRouter"]
+
+# После успешной записи клиент столько секунд читает с основной базы; должно покрывать отставание реплик
+PEREVAL_READ_YOUR_WRITES_SECONDS = int(os.getenv("PEREVAL_READ_YOUR_WRITES_SECONDS", "10"))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,11 +131,74 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    # Оригиналы изображений перевалов: content-addressed, одинаковые файлы хранятся один раз
+    "images": {"BACKEND": "pereval.storage.ContentAddressedStorage"},
+}
+
+# Кэш Django: Redis, если задан REDIS_URL, иначе память процесса
+CACHES = {
+    "default": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": os.getenv("REDIS_URL")}
+        if os.getenv("REDIS_URL")
+        else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    ),
+}
+
+# Кэш готовых ответов GET /api/submitData/<id>/
+PEREVAL_DETAIL_CACHE_ALIAS = "default"
+PEREVAL_DETAIL_CACHE_TIMEOUT = int(os.getenv("PEREVAL_DETAIL_CACHE_TIMEOUT", 60 * 60))
+
+# Журнал изменений отдает записи не моложе этого числа секунд: запись с меньшим id может быть
+# зафиксирована позже записи с большим, и клиент не должен перешагнуть ее курсором
+PEREVAL_CHANGES_SETTLE_SECONDS = int(os.getenv("PEREVAL_CHANGES_SETTLE_SECONDS", "5"))
+
+# Число процессов для генерации уменьшенных копий изображений; 0 — синхронно в процессе запроса
+PEREVAL_IMAGE_VARIANT_WORKERS = int(os.getenv("PEREVAL_IMAGE_VARIANT_WORKERS", "2"))
+
+# Ограничения потоковой загрузки изображений в /api/submitData/
+PEREVAL_UPLOAD_MAX_FILE_SIZE = int(os.getenv("PEREVAL_UPLOAD_MAX_FILE_SIZE", 25 * 1024 * 1024))
+PEREVAL_UPLOAD_MAX_BODY_SIZE = int(os.getenv("PEREVAL_UPLOAD_MAX_BODY_SIZE", 150 * 1024 * 1024))
+PEREVAL_UPLOAD_ALLOWED_TYPES = ("image/jpeg", "image/png", "image/webp", "image/heic", "image/heif")
+
+# Загрузка по частям (/api/submitData/<id>/uploads/): наибольшая часть одного PUT ограничивает время воркера
+# на запрос; незавершенные сессии старше PEREVAL_UPLOAD_SESSION_TTL удаляет expire_upload_sessions
+PEREVAL_UPLOAD_CHUNK_MAX_SIZE = int(os.getenv("PEREVAL_UPLOAD_CHUNK_MAX_SIZE", 8 * 1024 * 1024))
+PEREVAL_UPLOAD_SESSION_TTL = int(os.getenv("PEREVAL_UPLOAD_SESSION_TTL", 24 * 60 * 60))
+
+# Ответы на POST /api/submitData/ с Idempotency-Key хранятся столько секунд (удаляет expire_idempotency_keys);
+# незавершенная обработка дольше PEREVAL_IDEMPOTENCY_LOCK_SECONDS считается брошенной, и ключ можно занять снова
+PEREVAL_IDEMPOTENCY_TTL = int(os.getenv("PEREVAL_IDEMPOTENCY_TTL", 24 * 60 * 60))
+PEREVAL_IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("PEREVAL_IDEMPOTENCY_LOCK_SECONDS", 5 * 60))
+
+# Метрики Prometheus на /metrics. Под gunicorn с несколькими воркерами задайте PEREVAL_METRICS_DIR:
+# каждый процесс сбрасывает туда свой снимок не чаще PEREVAL_METRICS_FLUSH_SECONDS, /metrics суммирует все.
+# Каталог очищают при перезапуске сервиса, как и для multiprocess-режима prometheus_client
+PEREVAL_METRICS_ENABLED = os.getenv("PEREVAL_METRICS_ENABLED", "1") == "1"
+PEREVAL_METRICS_DIR = os.getenv("PEREVAL_METRICS_DIR")
+PEREVAL_METRICS_FLUSH_SECONDS = float(os.getenv("PEREVAL_METRICS_FLUSH_SECONDS", "1"))
+
+# Асинхронные обработчики GET (aget) вместо синхронных представлений DRF в пуле потоков.
+# Включается в asgi.py; под WSGI асинхронное представление требует своего цикла событий на запрос
+PEREVAL_ASYNC_VIEWS = os.getenv("PEREVAL_ASYNC_VIEWS", "0") == "1"
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_RENDERER_CLASSES": [
+        "pereval.metrics.MetricsJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
 }
 
 SWAGGER_USE_COMPAT_RENDERERS = False
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"schema_format": "json"})}
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"schema_format": "json"})}
+
+# Схема OpenAPI, сгенерированная при сборке командой generate_openapi
+PEREVAL_OPENAPI_DIR = Path(os.getenv("PEREVAL_OPENAPI_DIR", BASE_DIR / "openapi"))
+PEREVAL_OPENAPI_MAX_AGE = int(os.getenv("PEREVAL_OPENAPI_MAX_AGE", 24 * 60 * 60))
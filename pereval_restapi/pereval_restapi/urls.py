@@ -1,19 +1,15 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import include, path
-from drf_yasg import openapi
+from django.urls import include, path, re_path
 from drf_yasg.views import get_schema_view
+from pereval import schema
+from pereval.metrics import metrics_view
 from rest_framework import permissions
 
+# Страницы UI строятся без обхода эндпоинтов; саму схему они загружают с /swagger.json (SPEC_URL в настройках)
 schema_view = get_schema_view(
-    openapi.Info(
-        title="Pereval API",
-        default_version="v1",
-        description="API для управления данными перевалов",
-        contact=openapi.Contact(email="harisova.karina.k@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
+    schema.API_INFO,
     public=True,
     permission_classes=(permissions.AllowAny,),
 )
@@ -21,7 +17,9 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics", metrics_view, name="metrics"),
     path("api/", include("pereval.urls")),
+    re_path(r"^swagger\.(?P<schema_format>json|yaml)$", schema.schema_view, name="schema-json"),
     path("swagger/", schema_view.with_ui("swagger", cache_timeout=0), name="schema-swagger-ui"),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)